@@ -1,46 +1,192 @@
 # ===============================================
 # 1ZERO14X - Versão Web (Render / Flask)
 # ===============================================
+import asyncio
+import atexit
+import functools
+import hashlib
+import heapq
+import itertools
+import json
 import os
+import queue
+import random
+import signal
+import sqlite3
+import sys
 import threading
 import time
 import requests
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta, timezone
-from collections import deque, defaultdict
-from flask import Flask, jsonify, render_template
+from collections import deque, defaultdict, namedtuple
+from flask import Flask, g, jsonify, redirect, request
 from flask_httpauth import HTTPBasicAuth
+from canal_coletor import CanalSQLite
+from entrega import RecursoEstatico, comprimir, escolher_codificacao
+from gravador import GravadorFeed
+from metricas import RegistroMetricas
+from perfilador import FORMATOS, THREAD_COLETOR, perfilar
+from persistencia import ArmazemDuravel, LeitorHistorico, PerfisUsuarios
 
 # -------------------------------
 # Configurações gerais e API Blaze
 # -------------------------------
-API_URL = 'https://blaze.bet.br/api/singleplayer-originals/originals/roulette_games/recent/1'
+API_URL = os.environ.get('API_URL', 'https://blaze.bet.br/api/singleplayer-originals/originals/roulette_games/recent/1')
 FUSO_BRASIL = timezone(timedelta(hours=-3))
 
+# User-Agent de navegador para tentar evitar bloqueio 451
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Códigos compactos das cores (BufferRodadas e avaliador vetorizado)
+CORES = ('branco', 'vermelho', 'preto')
+CODIGO_COR = {cor: codigo for codigo, cor in enumerate(CORES)}
+COR_DESCONHECIDA = 255
+
+# Arquivo do canal do processo coletor dedicado (definido pelo gunicorn.conf.py).
+# Sem ele, cada processo roda a própria thread de coleta (modo de desenvolvimento).
+CANAL_COLETOR = os.environ.get('CANAL_COLETOR')
+
+# Banco durável de rodadas, sinais e estatísticas (warm start); vazio desliga
+DB_PATH = os.environ.get('DB_PATH', '1zero14x.db')
+
+# Gravação bruta do feed (segmentos .jsonl.gz para replay/backtest); vazio desliga
+GRAVACAO_DIR = os.environ.get('GRAVACAO_DIR', '')
+GRAVACAO_LIMITE_MB = int(os.environ.get('GRAVACAO_LIMITE_MB', 512))  # Espaço máximo por feed
+
+# Intervalo mínimo (segundos) entre gravações do estado do analisador (também gravado ao encerrar o coletor)
+ESTADO_INTERVALO = float(os.environ.get('ESTADO_INTERVALO', 60))
+
+# Perfis escolhidos pelos usuários (compartilhados entre coletor e workers; ':memory:' = só este processo)
+PERFIS_PATH = os.environ.get('PERFIS_PATH', DB_PATH or ':memory:')
+
+def ler_feeds(texto):
+    """Lê FEEDS no formato 'nome=url,nome2=url2' (ordem preservada; o primeiro é o padrão)"""
+    feeds = {}
+    for item in texto.split(','):
+        nome, separador, url = item.strip().partition('=')
+        if separador and nome.strip() and url.strip():
+            feeds[nome.strip()] = url.strip()
+    return feeds
+
+# Faixa (segundos) de período entre rodadas que o agendador aceita aprender do created_at
+PERIODO_RODADA_MIN = float(os.environ.get('PERIODO_RODADA_MIN', 5))
+PERIODO_RODADA_MAX = float(os.environ.get('PERIODO_RODADA_MAX', 120))
+
+# Mesas/feeds monitorados ao mesmo tempo, cada um com o próprio analisador
+FEEDS_CONFIGURADOS = ler_feeds(os.environ.get('FEEDS', '')) or {'principal': API_URL}
+FEED_PADRAO = next(iter(FEEDS_CONFIGURADOS))
+
 def agora_brasil():
     """Retorna o datetime atual no fuso horário do Brasil"""
     return datetime.now(FUSO_BRASIL)
 
-def buscar_dados_api(api_url):
-    """Função para buscar os dados de rodadas recentes da API com User-Agent."""
-    # Adicionando um User-Agent de navegador para tentar evitar bloqueio 451
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    try:
-        response = requests.get(api_url, headers=headers, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        return data.get('data', [])
-    except Exception as e:
-        print(f"[ERRO API] {e}")
-        return []
-
-def processar_rodada(rodadas_data):
-    """Processa a rodada mais recente e retorna (cor, numero, horario_real)"""
-    if not rodadas_data:
-        return None, None, None
-    
-    rodada = rodadas_data[0]
+def criar_sessao(tamanho_pool=2):
+    """Sessão HTTP com pool de conexões keep-alive (pode ser compartilhada entre feeds)"""
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT, 'Accept': 'application/json'})
+    adaptador = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool, max_retries=0)
+    session.mount('https://', adaptador)
+    session.mount('http://', adaptador)
+    return session
+
+class ClienteBlaze:
+    """Cliente HTTP da API Blaze com conexões keep-alive reaproveitadas (pool)"""
+    def __init__(self, api_url=API_URL, timeout=5, tamanho_pool=2, session=None):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.session = session if session is not None else criar_sessao(tamanho_pool)
+
+    def buscar(self):
+        """Busca as rodadas recentes. Retorna (rodadas, status_http); status None em falha de rede"""
+        try:
+            response = self.session.get(self.api_url, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"[ERRO API] {e}")
+            return [], None
+
+        if response.status_code >= 400:
+            print(f"[ERRO API] HTTP {response.status_code}")
+            return [], response.status_code
+
+        try:
+            return response.json().get('data', []), response.status_code
+        except ValueError as e:
+            print(f"[ERRO API] {e}")
+            return [], response.status_code
+
+class AgendadorColeta:
+    """Agenda as consultas à API de acordo com o período das rodadas aprendido do created_at"""
+    def __init__(self, periodo_padrao=30.0, antecedencia=1.5, intervalo_rapido=0.5,
+                 intervalo_ocioso=3.0, backoff_base=2.0, backoff_bloqueio=15.0, backoff_max=120.0,
+                 periodo_minimo=5.0, periodo_maximo=120.0):
+        self.periodo = periodo_padrao  # Segundos entre rodadas (média móvel exponencial)
+        self.periodo_minimo = periodo_minimo  # Amostras fora da faixa são ignoradas (ruído no created_at)
+        self.periodo_maximo = periodo_maximo
+        self.antecedencia = antecedencia  # Acorda um pouco antes da rodada prevista
+        self.intervalo_rapido = intervalo_rapido  # Consulta rápida em torno da rodada prevista
+        self.intervalo_ocioso = intervalo_ocioso  # Ritmo quando a fase ainda é desconhecida
+        self.backoff_base = backoff_base
+        self.backoff_bloqueio = backoff_bloqueio  # Base maior para HTTP 451
+        self.backoff_max = backoff_max
+        self.ultimo_horario_rodada = None  # created_at (epoch) da última rodada nova
+        self.atrasos = deque(maxlen=20)  # Detecção - created_at (latência + diferença de relógio)
+        self.falhas_seguidas = 0
+        self.ultimo_status_erro = None
+
+    def registrar_rodada(self, horario_rodada, detectado_em=None):
+        """Atualiza o período estimado com o created_at de uma rodada nova"""
+        instante = horario_rodada.timestamp()
+        detectado_em = time.time() if detectado_em is None else detectado_em
+
+        if self.ultimo_horario_rodada is not None and instante > self.ultimo_horario_rodada:
+            delta = instante - self.ultimo_horario_rodada
+            # Divide intervalos longos pelo número de rodadas perdidas no meio
+            amostra = delta / max(1, round(delta / self.periodo))
+            if self.periodo_minimo <= amostra <= self.periodo_maximo:
+                self.periodo += 0.2 * (amostra - self.periodo)
+
+        if self.ultimo_horario_rodada is None or instante > self.ultimo_horario_rodada:
+            self.ultimo_horario_rodada = instante
+            self.atrasos.append(detectado_em - instante)
+        self.registrar_sucesso()
+
+    def registrar_sucesso(self):
+        """Consulta respondida normalmente (com ou sem rodada nova)"""
+        self.falhas_seguidas = 0
+        self.ultimo_status_erro = None
+
+    def registrar_erro(self, status=None):
+        """Registra falha de rede/HTTP para o backoff"""
+        self.falhas_seguidas += 1
+        self.ultimo_status_erro = status
+
+    def proxima_espera(self, agora=None):
+        """Retorna quantos segundos dormir até a próxima consulta"""
+        if self.falhas_seguidas:
+            base = self.backoff_bloqueio if self.ultimo_status_erro == 451 else self.backoff_base
+            teto = min(self.backoff_max, base * (2 ** (self.falhas_seguidas - 1)))
+            return random.uniform(teto / 2, teto)  # Jitter para não sincronizar com outros clientes
+
+        if self.ultimo_horario_rodada is None:
+            return self.intervalo_ocioso
+
+        agora = time.time() if agora is None else agora
+        prevista = self.ultimo_horario_rodada + self.periodo + min(self.atrasos)
+        espera = prevista - self.antecedencia - agora
+        if espera > 0:
+            return espera
+
+        # Em torno da rodada prevista: consulta rápida até detectá-la
+        if agora - prevista < self.periodo / 2:
+            return self.intervalo_rapido
+        # Rodada muito atrasada (feed parado): volta ao ritmo ocioso
+        return self.intervalo_ocioso
+
+def converter_rodada(rodada):
+    """Converte uma rodada da API em (cor, numero, horario_real)"""
     cor = rodada.get('color', '').lower()
     numero = rodada.get('roll')
     horario_utc_str = rodada.get('created_at')
@@ -56,13 +202,168 @@ def processar_rodada(rodadas_data):
     
     return cor, numero, None
 
+class IngestorRodadas:
+    """Extrai da janela de rodadas recentes todas as ainda não processadas (dedup por ID)"""
+    def __init__(self, capacidade=512):
+        self.capacidade = capacidade
+        self.ids_vistos = set()
+        self.ordem_ids = deque()  # Ordem de chegada para descartar os IDs mais antigos
+
+    def marcar_visto(self, rodada_id):
+        """Guarda o ID no conjunto limitado de IDs já vistos"""
+        self.ids_vistos.add(rodada_id)
+        self.ordem_ids.append(rodada_id)
+        if len(self.ordem_ids) > self.capacidade:
+            self.ids_vistos.discard(self.ordem_ids.popleft())
+
+    def novas_rodadas(self, rodadas_data, brutas=None):
+        """Retorna as rodadas novas em ordem cronológica: [(id, cor, numero, horario_real)]
+
+        Se 'brutas' for uma lista, recebe os dicionários da API de todos os IDs ainda não vistos."""
+        primeira_coleta = not self.ids_vistos
+        novas = []
+
+        for rodada in rodadas_data:
+            rodada_id = rodada.get('id')
+            if not rodada_id or rodada_id in self.ids_vistos:
+                continue
+            self.marcar_visto(rodada_id)
+            if brutas is not None:
+                brutas.append(rodada)
+
+            cor, numero, horario_real = converter_rodada(rodada)
+            if cor and numero is not None and horario_real:
+                novas.append((rodada_id, cor, numero, horario_real))
+
+        novas.sort(key=lambda r: r[3])
+
+        # Na partida não há como saber o que já foi analisado: segue só a mais recente
+        if primeira_coleta:
+            return novas[-1:]
+        return novas
+
 # ----------------------------------------
 # CLASSES ORIGINAIS (Lógica de Sinais)
 # ----------------------------------------
 
+class JanelaEstatisticas:
+    """Acertos de uma estratégia (ou nível) nos últimos N sinais e em baldes de 5 min em anel (24h)
+
+    Registrar é O(1): o balde da posição é zerado quando o anel dá a volta. Cada janela
+    (1h/6h/24h) mantém o total corrente [acertos, sinais] em relação ao balde mais novo;
+    quando ele avança, só os baldes que saem da janela são descontados."""
+    MINUTOS_BALDE = 5
+    QUANTIDADE_BALDES = 288
+    JANELAS = (('1h', 12), ('6h', 72), ('24h', 288))  # Nome → quantidade de baldes
+    ULTIMOS = 50  # Tamanho padrão da janela dos últimos sinais
+
+    def __init__(self, ultimos=ULTIMOS):
+        self.ultimos = deque(maxlen=ultimos)  # 1 = WIN, 0 = LOSS
+        self.acertos_ultimos = 0
+        self.baldes = array('q', [-1]) * self.QUANTIDADE_BALDES  # Balde absoluto em cada posição
+        self.sinais = array('I', bytes(4 * self.QUANTIDADE_BALDES))
+        self.acertos = array('I', bytes(4 * self.QUANTIDADE_BALDES))
+        self.atual = None  # Balde mais novo já visto (referência dos totais)
+        self.totais = [[0, 0] for _ in self.JANELAS]  # [acertos, sinais] por janela
+
+    def balde(self, horario):
+        return int(horario.timestamp()) // (60 * self.MINUTOS_BALDE)
+
+    def avancar(self, novo):
+        """Move o balde de referência para 'novo', descontando os baldes que saem de cada janela"""
+        atual = self.atual
+        if atual is not None and novo <= atual:
+            return
+        self.atual = novo
+        if atual is None:
+            return
+        for total, (_, largura) in zip(self.totais, self.JANELAS):
+            if novo - atual >= largura:
+                total[0] = total[1] = 0  # A janela inteira ficou para trás
+                continue
+            # Saem os baldes de idade largura-1 (em relação ao atual) até os que ficam com idade >= largura
+            for balde in range(atual - largura + 1, novo - largura + 1):
+                posicao = balde % self.QUANTIDADE_BALDES
+                if self.baldes[posicao] == balde:
+                    total[0] -= self.acertos[posicao]
+                    total[1] -= self.sinais[posicao]
+
+    def somar(self, atual):
+        """Totais das janelas percorrendo todos os baldes (restauração e relógio atrás do balde mais novo)"""
+        totais = [[0, 0] for _ in self.JANELAS]
+        for posicao in range(self.QUANTIDADE_BALDES):
+            idade = atual - self.baldes[posicao]
+            if 0 <= idade < self.QUANTIDADE_BALDES and self.sinais[posicao]:
+                for total, (_, baldes) in zip(totais, self.JANELAS):
+                    if idade < baldes:
+                        total[0] += self.acertos[posicao]
+                        total[1] += self.sinais[posicao]
+        return totais
+
+    def registrar(self, acertou, horario):
+        """Conta um resultado (WIN/LOSS) no horário em que foi conhecido"""
+        acerto = 1 if acertou else 0
+        if len(self.ultimos) == self.ultimos.maxlen:
+            self.acertos_ultimos -= self.ultimos[0]
+        self.ultimos.append(acerto)
+        self.acertos_ultimos += acerto
+
+        balde = self.balde(horario)
+        self.avancar(balde)
+        idade = self.atual - balde
+        if idade >= self.QUANTIDADE_BALDES:
+            return  # Mais de 24h atrás: fora de todas as janelas (e o anel já reusou a posição)
+        posicao = balde % self.QUANTIDADE_BALDES
+        if self.baldes[posicao] != balde:
+            self.baldes[posicao] = balde
+            self.sinais[posicao] = 0
+            self.acertos[posicao] = 0
+        self.sinais[posicao] += 1
+        self.acertos[posicao] += acerto
+        for total, (_, largura) in zip(self.totais, self.JANELAS):
+            if idade < largura:
+                total[0] += acerto
+                total[1] += 1
+
+    def resumo(self, agora):
+        """{'ultimos': [acertos, sinais], '1h': [...], '6h': [...], '24h': [...]}"""
+        atual = self.balde(agora)
+        if self.atual is not None and atual < self.atual:
+            totais = self.somar(atual)  # Há resultado registrado à frente do relógio
+        else:
+            self.avancar(atual)
+            totais = self.totais
+
+        resumo = {'ultimos': [self.acertos_ultimos, len(self.ultimos)]}
+        resumo.update((nome, list(total)) for (nome, _), total in zip(self.JANELAS, totais))
+        return resumo
+
+    def exportar(self):
+        return {'ultimos': list(self.ultimos),
+                'baldes': [[self.baldes[i], self.sinais[i], self.acertos[i]]
+                           for i in range(self.QUANTIDADE_BALDES) if self.sinais[i]]}
+
+    def restaurar(self, dados):
+        for acerto in dados.get('ultimos', ()):
+            if len(self.ultimos) == self.ultimos.maxlen:
+                self.acertos_ultimos -= self.ultimos[0]
+            self.ultimos.append(acerto)
+            self.acertos_ultimos += acerto
+        for balde, sinais, acertos in dados.get('baldes', ()):
+            posicao = balde % self.QUANTIDADE_BALDES
+            self.baldes[posicao] = balde
+            self.sinais[posicao] = sinais
+            self.acertos[posicao] = acertos
+        ocupados = [balde for balde, sinais in zip(self.baldes, self.sinais) if sinais]
+        if ocupados:
+            self.atual = max(ocupados)
+            self.totais = self.somar(self.atual)
+
 class EstatisticasEstrategias:
     def __init__(self):
         self.estatisticas = defaultdict(lambda: {'sinais': 0, 'acertos': 0})
+        self.janelas = defaultdict(JanelaEstatisticas)  # Estratégia → janelas móveis
+        self.janelas_nivel = defaultdict(JanelaEstatisticas)  # BAIXA/MÉDIA/ALTA/DIRETO → janelas móveis
     
     def registrar_sinal(self, estrategia_nome):
         """Registra um sinal enviado para estatísticas"""
@@ -84,14 +385,119 @@ class EstatisticasEstrategias:
         """Retorna todas as estatísticas"""
         return self.estatisticas
 
-class GerenciadorSinais:
+    def registrar_resultado(self, sinal, acertou, horario):
+        """Conta o resultado do sinal nas janelas móveis de cada estratégia e do nível"""
+        for estrategia_nome in sinal['estrategias']:
+            self.janelas[estrategia_nome].registrar(acertou, horario)
+        self.janelas_nivel[sinal['nivel_confluencia']].registrar(acertou, horario)
+    
+    def get_estatisticas_janelas(self, agora):
+        """Resumo compacto [acertos, sinais] das janelas por estratégia e por nível"""
+        return {
+            'estrategias': {nome: janela.resumo(agora) for nome, janela in self.janelas.items()},
+            'niveis': {nivel: janela.resumo(agora) for nivel, janela in self.janelas_nivel.items()},
+        }
+
+    def exportar(self):
+        return {nome: dict(stats) for nome, stats in self.estatisticas.items()}
+
+    def restaurar(self, dados):
+        """Recarrega os contadores exportados (warm start)"""
+        for nome, stats in dados.items():
+            self.estatisticas[nome].update(stats)
+
+    def exportar_janelas(self):
+        return {'estrategias': {nome: janela.exportar() for nome, janela in self.janelas.items()},
+                'niveis': {nivel: janela.exportar() for nivel, janela in self.janelas_nivel.items()}}
+
+    def restaurar_janelas(self, dados):
+        for nome, janela in dados.get('estrategias', {}).items():
+            self.janelas[nome].restaurar(janela)
+        for nivel, janela in dados.get('niveis', {}).items():
+            self.janelas_nivel[nivel].restaurar(janela)
+
+class ArmazemSinais:
+    """Sinais ativos indexados por minuto alvo, com heap de expiração por janela_fim"""
     def __init__(self):
-        self.todas_estrategias = []  # Armazena TODAS as estratégias verificadas
+        self.sinais = {}  # id → sinal (ordem de criação)
+        self.por_minuto = defaultdict(list)  # minuto_alvo → sinais aguardando
+        self.expiracao = []  # Heap (janela_fim, id); entradas de sinais já finalizados são ignoradas
+        self.ultimo_id = 0  # IDs crescentes, preservados no warm start
+
+    def __len__(self):
+        return len(self.sinais)
+
+    def __iter__(self):
+        return iter(self.sinais.values())
+
+    def adicionar(self, sinal):
+        """Indexa um novo sinal aguardando resultado"""
+        self.ultimo_id += 1
+        sinal['id'] = self.ultimo_id
+        self.indexar(sinal)
+
+    def indexar(self, sinal):
+        """Indexa um sinal que já tem ID (novo ou restaurado)"""
+        self.ultimo_id = max(self.ultimo_id, sinal['id'])
+        self.sinais[sinal['id']] = sinal
+        self.por_minuto[sinal['minuto_alvo']].append(sinal)
+        heapq.heappush(self.expiracao, (sinal['janela_fim'], sinal['id']))
+
+    def remover(self, sinal):
+        """Retira o sinal dos índices (a entrada no heap cai sozinha depois)"""
+        if self.sinais.pop(sinal['id'], None) is None:
+            return
+        mesmo_minuto = self.por_minuto[sinal['minuto_alvo']]
+        mesmo_minuto.remove(sinal)
+        if not mesmo_minuto:
+            del self.por_minuto[sinal['minuto_alvo']]
+
+    def primeiro_do_minuto(self, minuto_alvo):
+        """Primeiro sinal criado para o minuto alvo (ou None)"""
+        mesmo_minuto = self.por_minuto.get(minuto_alvo)
+        return mesmo_minuto[0] if mesmo_minuto else None
+
+    def na_janela(self, minuto_resultado):
+        """Sinais cuja janela (alvo -1min até alvo +1min) contém o minuto do resultado"""
+        sinais = []
+        for delta in (-1, 0, 1):
+            sinais.extend(self.por_minuto.get(minuto_resultado + timedelta(minutes=delta), ()))
+        return sinais
+
+    def expirados(self, agora, exceto=()):
+        """Remove e retorna os sinais com janela_fim anterior a agora, menos os de 'exceto'"""
+        ids_exceto = {sinal['id'] for sinal in exceto}
+        adiados = []
+        vencidos = []
+        while self.expiracao and self.expiracao[0][0] < agora:
+            entrada = heapq.heappop(self.expiracao)
+            sinal = self.sinais.get(entrada[1])
+            if sinal is None:
+                continue
+            if sinal['id'] in ids_exceto:
+                adiados.append(entrada)
+                continue
+            self.remover(sinal)
+            vencidos.append(sinal)
+
+        for entrada in adiados:
+            heapq.heappush(self.expiracao, entrada)
+        return vencidos
+
+class GerenciadorSinais:
+    def __init__(self, relogio=agora_brasil):
+        self.relogio = relogio  # Fonte do "agora" (injetável para replay/backtest)
+        self.ouvintes = []  # Callbacks ouvinte(evento, sinal): 'novo', 'atualizado' e 'finalizado'
+        self.todas_estrategias = {}  # Armazena TODAS as estratégias verificadas (id → estratégia)
         self.sinais_agrupados = defaultdict(list)  # Agrupa por horário
-        self.sinais_ativos = []  # Sinais com confluência mínima
+        self.expiracao_estrategias = []  # Heap (prazo, id) para limpeza incremental
+        self.expiracao_grupos = []  # Heap (prazo, minuto_chave) dos grupos de sinais
+        self.ids_estrategias = itertools.count(1)
+        self.sinais_ativos = ArmazemSinais()  # Sinais com confluência mínima
         self.historico_finalizados = deque(maxlen=60)  # Histórico de sinais finalizados (máximo 60)
         self.estatisticas = EstatisticasEstrategias()
         self.estrategias_ativas = self.criar_estrategias_padrao()
+        self.versao_estrategias = 0  # Muda a cada set_estrategias_ativas
         
         # CONFIGURAÇÃO DE CONFLUÊNCIA (PADRÃO: 4+ para sinal ativo)
         self.config_confluencia = {
@@ -120,60 +526,65 @@ class GerenciadorSinais:
             return 'MINIMA'
     
     def criar_estrategias_padrao(self):
-        """Cria o dicionário padrão com todas estratégias ativas (APENAS as que têm lógica completa)"""
-        todas_estrategias = [
-            "2. Pedra posterior + minuto", "4. 2 pedras posteriores + minuto", 
-            "6. 2ª pedra posterior + minuto", "8. Minuto invertido + hora", "9. Branco + 5min", 
-            "10. Branco + 10min", "11. Pedra 4 + 4min", "12. Pedra 14 + 5min", 
-            "13. Pedra 11 + 3min", "14. 2 pedras iguais +1h", "16. Soma 15/21 +10min", 
-            "19. Branco + Minuto Duplo", "20. 2 pedras iguais +14min", 
-            "21. Seq30 [1] +35min", "21. Seq30 [2] +3min", "21. Seq30 [3] +3min", 
-            "21. Seq30 [4] +5min", "21. Seq30 [5] +3min", "21. Seq30 [6] +5min", 
-            "21. Seq30 [7] +3min", "22. Dobra de Branco", "23. Gêmeas",
-            "24. 50 sem Branco +4min", "25. 60 sem Branco +4min", "26. 80 sem Branco +4min"
-        ]
-        return {estrategia: True for estrategia in todas_estrategias}
+        """Cria o dicionário padrão com todas as estratégias do registro ativas"""
+        return {estrategia.nome: True for estrategia in ESTRATEGIAS}
     
     def set_estrategias_ativas(self, estrategias_ativas):
-        """Define quais estratégias estão ativas"""
+        """Define quais estratégias estão ativas (o analisador reindexa os gatilhos)"""
         self.estrategias_ativas = estrategias_ativas
+        self.versao_estrategias += 1
     
     def is_estrategia_ativa(self, estrategia_nome):
         """Verifica se uma estratégia está ativa"""
         return self.estrategias_ativas.get(estrategia_nome, False)
     
-    def adicionar_estrategia(self, estrategia, horario, minuto_destino, horario_base=None):
-        """Adiciona uma estratégia verificada ao sistema apenas se estiver ativa"""
-        if not self.is_estrategia_ativa(estrategia):
-            return
-            
-        estrategia_data = {
+    @staticmethod
+    def montar_estrategia(estrategia, horario, minuto_destino, horario_base, agora):
+        """Registro de uma estratégia verificada (não muda depois: pode ir para vários gerenciadores)"""
+        return {
             'estrategia': estrategia,
             'horario_previsto': horario,
             'minuto_destino': minuto_destino,
             'horario_base': horario_base or horario,
-            'timestamp_adicao': agora_brasil(),
+            'timestamp_adicao': agora,
             'status': 'pendente',
             'janela_fim': horario.replace(second=30) + timedelta(minutes=1)
         }
-        
-        self.todas_estrategias.append(estrategia_data)
-        
-        # Agrupa por horário (minuto exato)
-        minuto_chave = horario.replace(second=0, microsecond=0)
-        self.sinais_agrupados[minuto_chave].append(estrategia_data)
+
+    def adicionar_estrategia(self, estrategia, horario, minuto_destino, horario_base=None, agora=None):
+        """Adiciona uma estratégia verificada ao sistema (o analisador só dispara as ativas)"""
+        if agora is None:
+            agora = self.relogio()
+        self.receber_estrategia(self.montar_estrategia(estrategia, horario, minuto_destino, horario_base, agora),
+                                agora)
+
+    def receber_estrategia(self, estrategia_data, agora):
+        """Indexa uma estratégia já montada e verifica a confluência do minuto"""
+        minuto_chave = self.indexar_estrategia(estrategia_data)
         
         # Verifica se virou sinal ativo (confluência mínima)
-        self.verificar_confluencia(minuto_chave)
+        self.verificar_confluencia(minuto_chave, agora)
         
         # Limpa dados antigos
-        self.limpar_dados_antigos()
+        self.limpar_dados_antigos(agora)
     
-    def adicionar_sinal_direto(self, estrategia, horario, minuto_destino, horario_base=None):
-        """Adiciona sinal direto sem necessidade de confluência apenas se estiver ativo"""
-        if not self.is_estrategia_ativa(estrategia):
-            return
-            
+    def indexar_estrategia(self, estrategia_data):
+        """Guarda a estratégia, agenda a expiração e agrupa pelo minuto; retorna o minuto_chave"""
+        estrategia_id = next(self.ids_estrategias)
+        self.todas_estrategias[estrategia_id] = estrategia_data
+        heapq.heappush(self.expiracao_estrategias,
+                       (estrategia_data['janela_fim'] + timedelta(minutes=1), estrategia_id))
+        
+        # Agrupa por horário (minuto exato)
+        minuto_chave = estrategia_data['horario_previsto'].replace(second=0, microsecond=0)
+        if minuto_chave not in self.sinais_agrupados:
+            heapq.heappush(self.expiracao_grupos,
+                           (minuto_chave.replace(second=30) + timedelta(minutes=2), minuto_chave))
+        self.sinais_agrupados[minuto_chave].append(estrategia_data)
+        return minuto_chave
+    
+    def adicionar_sinal_direto(self, estrategia, horario, minuto_destino, horario_base=None, agora=None):
+        """Adiciona sinal direto sem necessidade de confluência"""
         sinal_direto = {
             'minuto_alvo': horario.replace(second=0, microsecond=0),
             'horario_previsto': horario,
@@ -184,16 +595,17 @@ class GerenciadorSinais:
             'janela_inicio': horario.replace(second=30) - timedelta(minutes=1),
             'janela_fim': horario.replace(second=30) + timedelta(minutes=1),
             'resultado': 'pendente',
-            'timestamp_criacao': agora_brasil(),
+            'timestamp_criacao': agora if agora is not None else self.relogio(),
             'sinal_direto': True
         }
         
         # Registra estatística
         self.estatisticas.registrar_sinal(estrategia)
         
-        self.sinais_ativos.append(sinal_direto)
+        self.sinais_ativos.adicionar(sinal_direto)
+        self.notificar('novo', sinal_direto)
     
-    def verificar_confluencia(self, minuto_chave):
+    def verificar_confluencia(self, minuto_chave, agora=None):
         """Verifica se há confluência para um minuto específico"""
         estrategias_no_minuto = self.sinais_agrupados[minuto_chave]
         confluencias = len(estrategias_no_minuto)
@@ -201,8 +613,7 @@ class GerenciadorSinais:
         # Verifica se atinge o mínimo para sinal ativo
         if confluencias >= self.config_confluencia['minima_ativa']:
             # Verifica se já existe sinal ativo para este minuto
-            sinal_existente = next((s for s in self.sinais_ativos 
-                                  if s['minuto_alvo'] == minuto_chave), None)
+            sinal_existente = self.sinais_ativos.primeiro_do_minuto(minuto_chave)
             
             if not sinal_existente:
                 nivel = self.get_nivel_confluencia(confluencias)
@@ -217,432 +628,1049 @@ class GerenciadorSinais:
                     'janela_inicio': minuto_chave.replace(second=30) - timedelta(minutes=1),
                     'janela_fim': minuto_chave.replace(second=30) + timedelta(minutes=1),
                     'resultado': 'pendente',
-                    'timestamp_criacao': agora_brasil(),
+                    'timestamp_criacao': agora if agora is not None else self.relogio(),
                     'sinal_direto': False
                 }
-                self.sinais_ativos.append(sinal_ativo)
+                self.sinais_ativos.adicionar(sinal_ativo)
                 
                 # Registra estatísticas para cada estratégia que entrou no sinal ativo
                 for estrategia_data in estrategias_no_minuto:
                     self.estatisticas.registrar_sinal(estrategia_data['estrategia'])
+                self.notificar('novo', sinal_ativo)
             else:
                 # Atualiza sinal existente
                 sinal_existente['estrategias'] = [e['estrategia'] for e in estrategias_no_minuto]
                 sinal_existente['confluencias'] = confluencias
                 sinal_existente['nivel_confluencia'] = self.get_nivel_confluencia(confluencias)
+                self.notificar('atualizado', sinal_existente)
     
-    def processar_resultado(self, horario_resultado, cor):
+    def notificar(self, evento, sinal):
+        """Repassa um evento de sinal para os ouvintes registrados"""
+        for ouvinte in self.ouvintes:
+            ouvinte(evento, sinal)
+
+    def processar_resultado(self, horario_resultado, cor, agora=None):
         """Processa resultado para verificar se acertou algum sinal ativo"""
-        agora = agora_brasil()
-        sinais_para_remover = []
+        if not self.sinais_ativos:
+            return  # Nada aguardando: nenhum WIN nem LOSS possível
+        if agora is None:
+            agora = self.relogio()
+        minuto_resultado = horario_resultado.replace(second=0, microsecond=0)
+        na_janela = self.sinais_ativos.na_janela(minuto_resultado)
         
-        for sinal in self.sinais_ativos:
-            if sinal['status'] == 'aguardando':
-                horario_resultado_sem_segundos = horario_resultado.replace(second=0, microsecond=0)
-                janela_inicio_sem_segundos = sinal['janela_inicio'].replace(second=0, microsecond=0)
-                janela_fim_sem_segundos = sinal['janela_fim'].replace(second=0, microsecond=0)
+        if cor == 'branco':
+            for sinal in na_janela:
+                sinal['resultado'] = 'WIN'
+                sinal['status'] = 'finalizado'
+                sinal['horario_resultado'] = horario_resultado
                 
-                if janela_inicio_sem_segundos <= horario_resultado_sem_segundos <= janela_fim_sem_segundos:
-                    if cor == 'branco':
-                        sinal['resultado'] = 'WIN'
-                        sinal['status'] = 'finalizado'
-                        sinal['horario_resultado'] = horario_resultado
-                        
-                        for estrategia_nome in sinal['estrategias']:
-                            self.estatisticas.registrar_acerto(estrategia_nome)
-                        
-                        self.historico_finalizados.append(sinal.copy())
-                        sinais_para_remover.append(sinal)
-                    else:
-                        pass # Continua aguardando na janela
+                for estrategia_nome in sinal['estrategias']:
+                    self.estatisticas.registrar_acerto(estrategia_nome)
+                self.estatisticas.registrar_resultado(sinal, True, agora)
                 
-                # Verifica se passou do tempo de janela para marcar como LOSS
-                elif agora > sinal['janela_fim']:
-                    sinal['resultado'] = 'LOSS'
-                    sinal['status'] = 'finalizado'
-                    sinal['horario_resultado'] = agora
-                    self.historico_finalizados.append(sinal.copy())
-                    sinais_para_remover.append(sinal)
+                self.sinais_ativos.remover(sinal)
+                self.historico_finalizados.append(sinal.copy())
+                self.notificar('finalizado', sinal)
+            na_janela = []
         
-        # Remove sinais processados
-        for sinal in sinais_para_remover:
-            if sinal in self.sinais_ativos:
-                self.sinais_ativos.remove(sinal)
+        # Passou do tempo de janela: LOSS (quem está na janela deste resultado continua aguardando)
+        for sinal in self.sinais_ativos.expirados(agora, exceto=na_janela):
+            sinal['resultado'] = 'LOSS'
+            sinal['status'] = 'finalizado'
+            sinal['horario_resultado'] = agora
+            self.estatisticas.registrar_resultado(sinal, False, agora)
+            self.historico_finalizados.append(sinal.copy())
+            self.notificar('finalizado', sinal)
     
-    def limpar_dados_antigos(self):
+    def limpar_dados_antigos(self, agora=None):
         """Limpa dados expirados - estratégias apagam 1 minuto após passar o horário"""
-        agora = agora_brasil()
+        if agora is None:
+            agora = self.relogio()
         
-        # Limpa estratégias com mais de 1 minuto após a janela
-        self.todas_estrategias = [e for e in self.todas_estrategias 
-                                if agora <= e.get('janela_fim', agora) + timedelta(minutes=1)]
+        # Os heaps estão ordenados pelo prazo: só sai o que realmente expirou
+        while self.expiracao_estrategias and self.expiracao_estrategias[0][0] < agora:
+            _, estrategia_id = heapq.heappop(self.expiracao_estrategias)
+            del self.todas_estrategias[estrategia_id]
         
-        # Limpa sinais agrupados expirados
-        for minuto_chave in list(self.sinais_agrupados.keys()):
-            if agora > minuto_chave.replace(second=30) + timedelta(minutes=2):  # Janela + 1min
-                del self.sinais_agrupados[minuto_chave]
+        # Sinais agrupados expiram 1min depois da janela
+        while self.expiracao_grupos and self.expiracao_grupos[0][0] < agora:
+            _, minuto_chave = heapq.heappop(self.expiracao_grupos)
+            self.sinais_agrupados.pop(minuto_chave, None)
     
     def get_estrategias_recentes(self):
         """Retorna estratégias recentes (não expiradas)"""
-        agora = agora_brasil()
-        return [e for e in self.todas_estrategias 
-                if agora <= e.get('janela_fim', agora) + timedelta(minutes=1)]
+        self.limpar_dados_antigos()
+        return self.todas_estrategias.values()
     
     def get_sinais_ativos(self):
-        """Retorna sinais ativos não expirados"""
-        agora = agora_brasil()
-        return [s for s in self.sinais_ativos 
-                if s['status'] == 'aguardando' and 
-                agora <= s['janela_fim'] + timedelta(minutes=1)]
+        """Retorna sinais ativos não expirados (os vencidos saem de vez no próximo resultado)"""
+        agora = self.relogio()
+        return [s for s in self.sinais_ativos if agora <= s['janela_fim'] + timedelta(minutes=1)]
+
+    def proxima_expiracao(self):
+        """Quando o próximo sinal listado em get_sinais_ativos deixa de aparecer (None se não há)"""
+        agora = self.relogio()
+        return min((s['janela_fim'] + timedelta(minutes=1) for s in self.sinais_ativos
+                    if agora <= s['janela_fim'] + timedelta(minutes=1)), default=None)
     
     def get_sinais_finalizados(self):
         """Retorna sinais finalizados recentes (últimos 60)"""
         return list(self.historico_finalizados)
+    
+    def exportar_estado(self):
+        """Estado pendente para o warm start: sinais ativos, estratégias aguardando e estatísticas"""
+        return {
+            'ultimo_id_sinal': self.sinais_ativos.ultimo_id,
+            'sinais_ativos': list(self.sinais_ativos),
+            'estrategias': list(self.todas_estrategias.values()),
+            'estatisticas': self.estatisticas.exportar(),
+            'estatisticas_janelas': self.estatisticas.exportar_janelas(),
+        }
+    
+    def restaurar_estado(self, estado, finalizados=()):
+        """Recarrega o que exportar_estado gravou (sem notificar os ouvintes)"""
+        self.estatisticas.restaurar(estado.get('estatisticas', {}))
+        self.estatisticas.restaurar_janelas(estado.get('estatisticas_janelas', {}))
+        for estrategia_data in estado.get('estrategias', ()):
+            self.indexar_estrategia(estrategia_data)
+        self.sinais_ativos.ultimo_id = estado.get('ultimo_id_sinal', 0)
+        for sinal in estado.get('sinais_ativos', ()):
+            self.sinais_ativos.indexar(sinal)
+        self.historico_finalizados.extend(finalizados)
+
+class BufferRodadas:
+    """Buffer circular tipado das últimas rodadas: cor (uint8), pedra (uint8) e epoch em ms (int64)
+
+    Índices negativos contam a partir da rodada mais recente (-1 = última)."""
+    def __init__(self, capacidade=4096):
+        self.capacidade = capacidade
+        self.cores = array('B', bytes(capacidade))
+        self.numeros = array('B', bytes(capacidade))
+        self.epochs = array('q', bytes(8 * capacidade))
+        self.total = 0  # Rodadas já adicionadas (a próxima vai em total % capacidade)
+        self.tamanho = 0
+
+    def __len__(self):
+        return self.tamanho
+
+    def append(self, cor, numero, horario):
+        """Grava a rodada sobrescrevendo a mais antiga quando cheio"""
+        posicao = self.total % self.capacidade
+        self.cores[posicao] = CODIGO_COR.get(cor, COR_DESCONHECIDA)
+        self.numeros[posicao] = numero
+        self.epochs[posicao] = round(horario.timestamp() * 1000)
+        self.total += 1
+        if self.tamanho < self.capacidade:
+            self.tamanho += 1
+
+    def posicao(self, indice):
+        """Converte o índice lógico (0 = mais antiga, -1 = mais recente) na posição do array"""
+        if indice < 0:
+            indice += self.tamanho
+        if not 0 <= indice < self.tamanho:
+            raise IndexError("índice fora do buffer de rodadas")
+        return (self.total - self.tamanho + indice) % self.capacidade
+
+    def cor(self, indice):
+        codigo = self.cores[self.posicao(indice)]
+        return CORES[codigo] if codigo < len(CORES) else ''
+
+    def numero(self, indice):
+        return self.numeros[self.posicao(indice)]
+
+    def epoch_ms(self, indice):
+        return self.epochs[self.posicao(indice)]
+
+    def minuto_epoch(self, indice):
+        """Minuto absoluto da rodada (para comparar 'mesmo minuto' ignorando segundos)"""
+        return self.epochs[self.posicao(indice)] // 60000
+
+    def __getitem__(self, indice):
+        posicao = self.posicao(indice)
+        codigo = self.cores[posicao]
+        return (CORES[codigo] if codigo < len(CORES) else '', self.numeros[posicao],
+                datetime.fromtimestamp(self.epochs[posicao] / 1000, FUSO_BRASIL))
+
+    def __iter__(self):
+        for indice in range(self.tamanho):
+            yield self[indice]
+
+    def ultimas(self, coluna, quantidade=None):
+        """Fatias sem cópia (memoryview) das últimas rodadas de uma coluna ('cores', 'numeros'
+        ou 'epochs'), da mais antiga para a mais recente; são duas fatias quando dá a volta"""
+        quantidade = self.tamanho if quantidade is None else min(quantidade, self.tamanho)
+        visao = memoryview(getattr(self, coluna))
+        fim = self.total % self.capacidade or (self.capacidade if self.total else 0)
+        inicio = fim - quantidade
+        if inicio >= 0:
+            return (visao[inicio:fim],)
+        return (visao[self.capacidade + inicio:], visao[:fim])
+
+class AcumuladorBranco:
+    """Estado incremental de um branco pendente: 1ª e 2ª pedras posteriores e a soma delas"""
+    __slots__ = ('horario', 'primeira', 'segunda', 'soma', 'quantidade')
+
+    def __init__(self, horario):
+        self.horario = horario
+        self.primeira = 0
+        self.segunda = 0
+        self.soma = 0
+        self.quantidade = 0
+
+    def adicionar_pedra(self, numero):
+        """Atualiza o estado com uma pedra colorida posterior ao branco"""
+        self.quantidade += 1
+        self.soma += numero
+        if self.quantidade == 1:
+            self.primeira = numero
+        elif self.quantidade == 2:
+            self.segunda = numero
+
+# ----------------------------------------
+# Registro declarativo das estratégias
+# ----------------------------------------
+# Gatilhos: 'branco' (saiu branco), 'posterior' (chave = 1ª/2ª pedra colorida após um
+# branco), 'pedra' (chave = número da pedra), 'par_igual' (duas pedras iguais no mesmo
+# minuto), 'gemeas' (par igual sem ser branco), 'sem_branco' (chave = contagem de pedras
+# sem branco) e 'seq30' (a cada 30 pedras sem branco, a partir do último branco).
+#
+# A fórmula recebe (horario_base, valor) e devolve a soma do minuto alvo; o valor é o
+# número da pedra ou, no gatilho 'posterior', o AcumuladorBranco.
+
+class Estrategia:
+    """Declaração de uma estratégia: gatilho, fórmula do minuto alvo e tipo de sinal"""
+    __slots__ = ('nome', 'gatilho', 'chaves', 'formula', 'direto', 'uma_hora_depois')
+
+    def __init__(self, nome, gatilho, formula, chave=None, direto=False, uma_hora_depois=False):
+        self.nome = nome
+        self.gatilho = gatilho
+        self.chaves = chave if isinstance(chave, tuple) else (chave,)
+        self.formula = formula
+        self.direto = direto  # Sinal direto, sem depender de confluência
+        self.uma_hora_depois = uma_hora_depois  # Alvo = mesmo minuto da rodada, 1h depois
+
+SEQUENCIA_SEQ30 = [35, 3, 3, 5, 3, 5, 3]
+
+ESTRATEGIAS = [
+    Estrategia("2. Pedra posterior + minuto", 'posterior', lambda h, b: b.primeira + h.minute, chave=1),
+    Estrategia("4. 2 pedras posteriores + minuto", 'posterior', lambda h, b: b.soma + h.minute, chave=2),
+    Estrategia("6. 2ª pedra posterior + minuto", 'posterior', lambda h, b: b.segunda + h.minute, chave=2),
+    Estrategia("8. Minuto invertido + hora", 'branco',
+               lambda h, n: int(str(h.minute).zfill(2)[::-1]) + h.hour + h.minute),
+    Estrategia("9. Branco + 5min", 'branco', lambda h, n: h.minute + 5),
+    Estrategia("10. Branco + 10min", 'branco', lambda h, n: h.minute + 10),
+    Estrategia("11. Pedra 4 + 4min", 'pedra', lambda h, n: h.minute + 4, chave=4),
+    Estrategia("12. Pedra 14 + 5min", 'pedra', lambda h, n: h.minute + 5, chave=14),
+    Estrategia("13. Pedra 11 + 3min", 'pedra', lambda h, n: h.minute + 3, chave=11),
+    Estrategia("14. 2 pedras iguais +1h", 'par_igual', lambda h, n: h.minute, uma_hora_depois=True),
+    Estrategia("16. Soma 15/21 +10min", 'pedra', lambda h, n: h.minute + 10, chave=(15, 21)),
+    Estrategia("19. Branco + Minuto Duplo", 'branco', lambda h, n: h.minute * 2),
+    Estrategia("20. 2 pedras iguais +14min", 'par_igual', lambda h, n: h.minute + 14),
+] + [
+    Estrategia(f"21. Seq30 [{i + 1}] +{soma}min", 'seq30',
+               lambda h, n, total=sum(SEQUENCIA_SEQ30[:i + 1]): h.minute + total)
+    for i, soma in enumerate(SEQUENCIA_SEQ30)
+] + [
+    Estrategia("22. Dobra de Branco", 'branco', lambda h, n: h.minute * 2),
+    Estrategia("23. Gêmeas", 'gemeas', lambda h, n: h.minute + n + 10),
+    Estrategia("24. 50 sem Branco +4min", 'sem_branco', lambda h, n: h.minute + 4, chave=50, direto=True),
+    Estrategia("25. 60 sem Branco +4min", 'sem_branco', lambda h, n: h.minute + 4, chave=60, direto=True),
+    Estrategia("26. 80 sem Branco +4min", 'sem_branco', lambda h, n: h.minute + 4, chave=80, direto=True),
+]
+
+class ContextoRodada:
+    """'Agora' único de uma rodada e tabela minuto → próximo horário alvo (minuto:30)
+
+    A tabela tem 60 posições e é preenchida sob demanda, compartilhada por todas as
+    estratégias da rodada."""
+    __slots__ = ('agora', 'inicio_hora', 'alvos')
+
+    def __init__(self, agora):
+        self.agora = agora
+        self.inicio_hora = agora.replace(minute=0, second=30, microsecond=0)
+        self.alvos = [None] * 60
+
+    def horario_alvo(self, minuto_destino):
+        """Próximo minuto_destino:30 depois de agora (None para minuto fora de 0..59)"""
+        if not 0 <= minuto_destino < 60:
+            return None
+        horario = self.alvos[minuto_destino]
+        if horario is None:
+            horario = self.inicio_hora + timedelta(minutes=minuto_destino)
+            if horario <= self.agora:
+                horario += timedelta(hours=1)
+            self.alvos[minuto_destino] = horario
+        return horario
 
 class AnalisadorEstrategiaHorarios:
-    def __init__(self):
-        self.ultimas_rodadas = deque(maxlen=100)
-        self.gerenciador = GerenciadorSinais()
+    def __init__(self, relogio=agora_brasil):
+        self.relogio = relogio
+        self.ultimas_rodadas = BufferRodadas()
+        self.gerenciador = GerenciadorSinais(relogio)
         self.ultimo_branco = None
-        self.brancos_pendentes = []
+        self.brancos_pendentes = []  # AcumuladorBranco aguardando as 2 pedras posteriores
         self.contador_sem_branco = 0
         self.ultimo_branco_antes_sequencia = None
+        self.indice = {}  # (gatilho, chave) → estratégias ativas inscritas
+        self.contexto = None  # ContextoRodada da rodada em processamento
+        self.versao_indice = None
+        self.perfis = {}  # chave do perfil → GerenciadorSinais de um perfil de usuário (mesmo fluxo)
+        self.versao_perfis = 0
+        self.destinos = {}  # nome da estratégia → gerenciadores que a têm ativa
     
-    # === Métodos de Utilidade/Lookback (APENAS LÓGICA COMPLETA) ===
-
-    def get_pedra_posterior_para_branco(self, horario_branco):
-        """Retorna o número da primeira pedra posterior ao branco (ou None/0)"""
-        for cor, numero, horario in reversed(self.ultimas_rodadas):
-            if horario > horario_branco and cor != 'branco':
-                return numero
-        return 0
-    
-    def get_soma_2_posteriores_para_branco(self, horario_branco):
-        """Retorna a soma das duas primeiras pedras posteriores ao branco (ou None/0)"""
-        somas = []
-        for cor, numero, horario in reversed(self.ultimas_rodadas):
-            if horario > horario_branco and cor != 'branco':
-                somas.append(numero)
-                if len(somas) == 2:
-                    return sum(somas)
-        return sum(somas)
-
-    def get_segunda_posterior_para_branco(self, horario_branco):
-        """Retorna o número da segunda pedra posterior ao branco (ou None/0)"""
-        contador = 0
-        for cor, numero, horario in reversed(self.ultimas_rodadas):
-            if horario > horario_branco and cor != 'branco':
-                contador += 1
-                if contador == 2:
-                    return numero
-        return 0
-
-    def soma_horario_completo(self, horario):
-        """Lógica para somar componentes do horário (hora, minuto, etc.)"""
-        return horario.hour + horario.minute
-    
-    def get_valor_seguro(self, valor):
-        """Retorna 0 se o valor for None para evitar erros de tipo"""
-        return valor if valor is not None else 0
-    
+    # === Métodos de Utilidade ===
+
     def calcular_minuto_destino(self, soma):
         """Calcula o minuto de destino baseado na soma (1 a 60)"""
         if soma is None or soma == 0:
             return None
-        if soma > 60:
-            while soma > 60:
-                soma -= 60
-        elif soma < 1:
-            while soma < 1:
-                soma += 60
-        return soma if 1 <= soma <= 60 else None
-
-    def calcular_minuto_destino_fixo(self, minuto_calculado):
-        """Calcula minuto destino para estratégias fixas"""
-        if minuto_calculado is None:
-            return None
-        if minuto_calculado > 60:
-            minuto_calculado -= 60
-        elif minuto_calculado < 1:
-            minuto_calculado += 60
-        return minuto_calculado if 1 <= minuto_calculado <= 60 else None
-
-    def calcular_horario_destino(self, minuto_destino, hora_base):
-        """Calcula o horário completo de destino"""
-        if minuto_destino is None:
-            return None
-        try:
-            agora = agora_brasil()
-            horario_destino = agora.replace(hour=hora_base, minute=minuto_destino, second=30, microsecond=0)
-            if horario_destino <= agora:
-                horario_destino += timedelta(hours=1)
-            while horario_destino <= agora:
-                horario_destino += timedelta(hours=1)
-            return horario_destino
-        except:
-            return None
+        return (soma - 1) % 60 + 1
+
+    def indice_estrategias(self):
+        """Índice (gatilho, chave) → estratégias ativas em algum gerenciador; refeito só quando a seleção muda
+
+        Cada estratégia é avaliada uma vez por rodada e o alvo vai para todos os
+        gerenciadores (principal e perfis) que a têm ativa."""
+        versao = (self.gerenciador.versao_estrategias, self.versao_perfis)
+        if self.versao_indice != versao:
+            indice = {}
+            destinos = {}
+            gerenciadores = self.gerenciadores()
+            for estrategia in ESTRATEGIAS:
+                ativos = [g for g in gerenciadores if g.is_estrategia_ativa(estrategia.nome)]
+                if ativos:
+                    destinos[estrategia.nome] = ativos
+                    for chave in estrategia.chaves:
+                        indice.setdefault((estrategia.gatilho, chave), []).append(estrategia)
+            self.indice = indice
+            self.destinos = destinos
+            self.versao_indice = versao
+        return self.indice
+
+    def gerenciadores(self):
+        """Gerenciador principal seguido dos gerenciadores de perfil"""
+        return [self.gerenciador, *self.perfis.values()]
+
+    def adicionar_perfil(self, chave, estrategias_ativas, config_confluencia):
+        """Cria o gerenciador de um perfil; ele passa a receber o fluxo de candidatos da próxima rodada"""
+        gerenciador = GerenciadorSinais(self.gerenciador.relogio)
+        gerenciador.set_estrategias_ativas(estrategias_ativas)
+        gerenciador.set_config_confluencia(config_confluencia)
+        self.perfis[chave] = gerenciador
+        self.versao_perfis += 1
+        return gerenciador
+
+    def remover_perfil(self, chave):
+        if self.perfis.pop(chave, None) is not None:
+            self.versao_perfis += 1
+    
+    def disparar(self, estrategias, horario_base, valor):
+        """Calcula o alvo de cada estratégia inscrita no evento e envia ao gerenciador"""
+        for estrategia in estrategias:
+            inicio = time.perf_counter()
+            self.disparar_estrategia(estrategia, horario_base, valor)
+            metrica_estrategia.observar(time.perf_counter() - inicio, estrategia.nome)
+
+    def disparar_estrategia(self, estrategia, horario_base, valor):
+        contexto = self.contexto
+        if estrategia.uma_hora_depois:
+            minuto_destino = estrategia.formula(horario_base, valor)
+            horario_sinal = horario_base.replace(minute=minuto_destino, second=30) + timedelta(hours=1)
+            if horario_sinal <= contexto.agora:
+                horario_sinal += timedelta(days=1)
+        else:
+            minuto_destino = self.calcular_minuto_destino(estrategia.formula(horario_base, valor))
+            if not minuto_destino:
+                return
+            horario_sinal = contexto.horario_alvo(minuto_destino)
+            if horario_sinal is None:
+                return
+        
+        destinos = self.destinos[estrategia.nome]
+        if estrategia.direto:
+            for gerenciador in destinos:
+                gerenciador.adicionar_sinal_direto(estrategia.nome, horario_sinal, minuto_destino,
+                                                   horario_base, contexto.agora)
+        elif len(destinos) == 1:
+            destinos[0].adicionar_estrategia(estrategia.nome, horario_sinal, minuto_destino,
+                                             horario_base, contexto.agora)
+        else:
+            # Perfis: o registro da estratégia é montado uma vez e compartilhado
+            estrategia_data = GerenciadorSinais.montar_estrategia(estrategia.nome, horario_sinal, minuto_destino,
+                                                                  horario_base, contexto.agora)
+            for gerenciador in destinos:
+                gerenciador.receber_estrategia(estrategia_data, contexto.agora)
     
     # === Lógica de Adição de Rodada e Processamento de Sinais ===
+    def adicionar_rodadas(self, rodadas):
+        """Processa um lote de rodadas (cor, numero, horario_real) em ordem cronológica"""
+        for cor, numero, horario_real in rodadas:
+            self.adicionar_rodada(cor, numero, horario_real)
+
     def adicionar_rodada(self, cor, numero, horario_real):
-        self.ultimas_rodadas.append((cor, numero, horario_real))
+        inicio = time.perf_counter()
+        self.contexto = ContextoRodada(self.relogio())
+        try:
+            self.avaliar_rodada(cor, numero, horario_real)
+        finally:
+            self.contexto = None
+        metrica_rodada.observar(time.perf_counter() - inicio)
+
+    def avaliar_rodada(self, cor, numero, horario_real):
+        """Atualiza o estado com a rodada e dispara as estratégias inscritas (usa self.contexto)"""
+        self.ultimas_rodadas.append(cor, numero, horario_real)
+        indice = self.indice_estrategias()
         
         # Atualiza contador de pedras sem branco
         if cor == 'branco':
             self.ultimo_branco = (cor, numero, horario_real)
-            self.brancos_pendentes.append(horario_real)
+            self.brancos_pendentes.append(AcumuladorBranco(horario_real))
             self.contador_sem_branco = 0
             self.ultimo_branco_antes_sequencia = horario_real
             
             # Estratégias imediatas ao sair branco
-            self.gerar_sinais_imediatos_apos_branco(horario_real, numero)
-            self.estrategia_19_branco_minuto_duplo(horario_real)
-            self.estrategia_dobra_branco(horario_real)
+            self.disparar(indice.get(('branco', None), ()), horario_real, numero)
         else:
             self.contador_sem_branco += 1
-            self.processar_estrategias_posteriores(cor, numero, horario_real)
-        
-        # Verifica estratégias de contagem
-        self.verificar_30_sem_brancos(horario_real)
-        self.verificar_50_sem_brancos(horario_real)
-        self.verificar_60_sem_brancos(horario_real)
-        self.verificar_80_sem_brancos(horario_real)
-        
-        self.gerar_sinais_pedra_atual(cor, numero, horario_real)
-        self.verificar_duas_pedras_iguais(cor, numero, horario_real)
-        self.verificar_soma_15_21(cor, numero, horario_real)
-        self.verificar_gemeas(cor, numero, horario_real)
-        
-        # Processa resultado para sinais ativos
-        self.gerenciador.processar_resultado(horario_real, cor)
-
-    # === Implementação das Estratégias ===
-    
-    def estrategia_dobra_branco(self, horario_branco):
-        """ESTRATÉGIA 22: Dobra de Branco"""
-        minuto_branco = horario_branco.minute
-        soma_minutos = minuto_branco + minuto_branco
-        minuto_destino = self.calcular_minuto_destino(soma_minutos)
-        
-        if minuto_destino:
-            horario_sinal = self.calcular_horario_destino(minuto_destino, horario_branco.hour)
-            if horario_sinal and horario_sinal > agora_brasil():
-                estrategia_nome = "22. Dobra de Branco"
-                self.gerenciador.adicionar_estrategia(estrategia_nome, horario_sinal, minuto_destino, horario_branco)
-    
-    def verificar_gemeas(self, cor, numero, horario):
-        """ESTRATÉGIA 23: Gêmeas - Duas pedras iguais no mesmo minuto"""
-        if len(self.ultimas_rodadas) >= 2:
-            rodadas_lista = list(self.ultimas_rodadas)
-            ultima = rodadas_lista[-1]
-            penultima = rodadas_lista[-2]
-            
-            if (ultima[1] == penultima[1] and 
-                ultima[1] != 0 and 
-                ultima[2].replace(second=0) == penultima[2].replace(second=0)):
-                
-                minuto_atual = horario.minute
-                valor_gemeas = ultima[1]
-                
-                soma = minuto_atual + valor_gemeas + 10
-                minuto_destino = self.calcular_minuto_destino(soma)
-                
-                if minuto_destino:
-                    horario_sinal = self.calcular_horario_destino(minuto_destino, horario.hour)
-                    if horario_sinal and horario_sinal > agora_brasil():
-                        estrategia_nome = f"23. Gêmeas {valor_gemeas}"
-                        self.gerenciador.adicionar_estrategia(estrategia_nome, horario_sinal, minuto_destino, horario)
-    
-    def verificar_50_sem_brancos(self, horario_atual):
-        """ESTRATÉGIA 24: 50 rodadas sem branco → sinal direto +4min"""
-        if self.contador_sem_branco == 50:
-            minuto_destino = (horario_atual.minute + 4) % 60
-            if minuto_destino == 0:
-                minuto_destino = 60
-            
-            horario_sinal = self.calcular_horario_destino(minuto_destino, horario_atual.hour)
-            if horario_sinal and horario_sinal > agora_brasil():
-                estrategia_nome = "24. 50 sem Branco +4min"
-                self.gerenciador.adicionar_sinal_direto(estrategia_nome, horario_sinal, minuto_destino, horario_atual)
-    
-    def verificar_60_sem_brancos(self, horario_atual):
-        """ESTRATÉGIA 25: 60 rodadas sem branco → sinal direto +4min"""
-        if self.contador_sem_branco == 60:
-            minuto_destino = (horario_atual.minute + 4) % 60
-            if minuto_destino == 0:
-                minuto_destino = 60
-            
-            horario_sinal = self.calcular_horario_destino(minuto_destino, horario_atual.hour)
-            if horario_sinal and horario_sinal > agora_brasil():
-                estrategia_nome = "25. 60 sem Branco +4min"
-                self.gerenciador.adicionar_sinal_direto(estrategia_nome, horario_sinal, minuto_destino, horario_atual)
-    
-    def verificar_80_sem_brancos(self, horario_atual):
-        """ESTRATÉGIA 26: 80 rodadas sem branco → sinal direto +4min"""
-        if self.contador_sem_branco == 80:
-            minuto_destino = (horario_atual.minute + 4) % 60
-            if minuto_destino == 0:
-                minuto_destino = 60
-            
-            horario_sinal = self.calcular_horario_destino(minuto_destino, horario_atual.hour)
-            if horario_sinal and horario_sinal > agora_brasil():
-                estrategia_nome = "26. 80 sem Branco +4min"
-                self.gerenciador.adicionar_sinal_direto(estrategia_nome, horario_sinal, minuto_destino, horario_atual)
-    
-    def estrategia_19_branco_minuto_duplo(self, horario_branco):
-        """ESTRATÉGIA 19: Branco + Minuto Duplo"""
-        minuto_branco = horario_branco.minute
-        soma_minutos = minuto_branco + minuto_branco
+            self.processar_estrategias_posteriores(numero, horario_real, indice)
         
-        minuto_destino = self.calcular_minuto_destino(soma_minutos)
-        if minuto_destino:
-            horario_sinal = self.calcular_horario_destino(minuto_destino, horario_branco.hour)
-            if horario_sinal and horario_sinal > agora_brasil():
-                self.gerenciador.adicionar_estrategia("19. Branco + Minuto Duplo", horario_sinal, minuto_destino, horario_branco)
-    
-    def verificar_30_sem_brancos(self, horario_atual):
-        """ESTRATÉGIA 21: Sequência após 30 pedras sem brancos"""
+        # ESTRATÉGIA 21: a sequência zera o contador mesmo com a Seq30 desativada
         if self.contador_sem_branco >= 30 and self.ultimo_branco_antes_sequencia:
-            
-            sequencia_somas = [35, 3, 3, 5, 3, 5, 3]
-            minuto_base = self.ultimo_branco_antes_sequencia.minute
-            hora_base = self.ultimo_branco_antes_sequencia.hour
-            minuto_atual = minuto_base
-            
-            for i, soma in enumerate(sequencia_somas):
-                minuto_atual += soma
-                minuto_destino = self.calcular_minuto_destino(minuto_atual)
-                if minuto_destino:
-                    horario_sinal = self.calcular_horario_destino(minuto_destino, hora_base)
-                    if horario_sinal and horario_sinal > agora_brasil():
-                        nome = f"21. Seq30 [{i+1}] +{soma}min"
-                        self.gerenciador.adicionar_estrategia(nome, horario_sinal, minuto_destino, self.ultimo_branco_antes_sequencia)
-            
+            self.disparar(indice.get(('seq30', None), ()), self.ultimo_branco_antes_sequencia, numero)
             self.contador_sem_branco = 0
-    
-    def gerar_sinais_imediatos_apos_branco(self, horario_branco, numero_branco):
-        """Gera estratégias IMEDIATAS usando o minuto como horário de destino"""
-        minuto_branco = horario_branco.minute
-        hora_branco = horario_branco.hour
         
-        estrategias_imediatas = [
-            ("8. Minuto invertido + hora", lambda: self.calcular_minuto_destino( 
-                int(str(minuto_branco).zfill(2)[::-1]) + self.soma_horario_completo(horario_branco))),
-            ("9. Branco + 5min", lambda: self.calcular_minuto_destino_fixo(minuto_branco + 5)),
-            ("10. Branco + 10min", lambda: self.calcular_minuto_destino_fixo(minuto_branco + 10)),
-        ]
+        # ESTRATÉGIAS 24 a 26: 50/60/80 sem branco
+        self.disparar(indice.get(('sem_branco', self.contador_sem_branco), ()), horario_real, numero)
         
-        for nome, calculo_minuto in estrategias_imediatas:
-            try:
-                minuto_destino = calculo_minuto()
-                if minuto_destino:
-                    horario_sinal = self.calcular_horario_destino(minuto_destino, hora_branco)
-                    if horario_sinal and horario_sinal > agora_brasil():
-                        self.gerenciador.adicionar_estrategia(nome, horario_sinal, minuto_destino, horario_branco)
-            except (TypeError, ValueError, Exception):
-                pass
-
-    def processar_estrategias_posteriores(self, cor, numero, horario_pedra):
-        """Processa estratégias POSTERIORES quando aparece uma pedra colorida"""
-        if not self.brancos_pendentes:
-            return
+        if cor != 'branco':
+            self.disparar(indice.get(('pedra', numero), ()), horario_real, numero)
         
-        brancos_processados = []
-        for horario_branco in self.brancos_pendentes:
-            minuto_branco = horario_branco.minute
-            hora_branco = horario_branco.hour
-            
-            if horario_pedra > horario_branco:
-                estrategias_posteriores = [
-                    ("2. Pedra posterior + minuto", lambda: self.calcular_minuto_destino( 
-                        self.get_valor_seguro(self.get_pedra_posterior_para_branco(horario_branco)) + minuto_branco)),
-                    ("4. 2 pedras posteriores + minuto", lambda: self.calcular_minuto_destino( 
-                        self.get_valor_seguro(self.get_soma_2_posteriores_para_branco(horario_branco)) + minuto_branco)),
-                    ("6. 2ª pedra posterior + minuto", lambda: self.calcular_minuto_destino( 
-                        self.get_valor_seguro(self.get_segunda_posterior_para_branco(horario_branco)) + minuto_branco)),
-                ]
-                
-                for nome, calculo_minuto in estrategias_posteriores:
-                    try:
-                        minuto_destino = calculo_minuto()
-                        if minuto_destino:
-                            horario_sinal = self.calcular_horario_destino(minuto_destino, hora_branco)
-                            if horario_sinal and horario_sinal > agora_brasil():
-                                self.gerenciador.adicionar_estrategia(nome, horario_sinal, minuto_destino, horario_branco)
-                    except (TypeError, ValueError, Exception):
-                        pass
-
-                brancos_processados.append(horario_branco)
-            
-        for branco in brancos_processados:
-            if branco in self.brancos_pendentes:
-                self.brancos_pendentes.remove(branco)
+        # Duas pedras iguais no mesmo minuto (ignorando segundos)
+        pares = indice.get(('par_igual', None), ())
+        gemeas = indice.get(('gemeas', None), ())
+        if (pares or gemeas) and self.repetiu_pedra_no_minuto():
+            self.disparar(pares, horario_real, numero)
+            if numero != 0:
+                self.disparar(gemeas, horario_real, numero)
+        
+        # Processa resultado para sinais ativos (principal e perfis)
+        inicio = time.perf_counter()
+        self.gerenciador.processar_resultado(horario_real, cor, self.contexto.agora)
+        for gerenciador in self.perfis.values():
+            gerenciador.processar_resultado(horario_real, cor, self.contexto.agora)
+        metrica_resultado.observar(time.perf_counter() - inicio)
 
-    def gerar_sinais_pedra_atual(self, cor, numero, horario):
-        """Gera sinais baseados em pedras específicas (11, 14, 4)"""
-        if cor == 'branco':
+    def repetiu_pedra_no_minuto(self):
+        """True se as duas últimas pedras têm o mesmo número no mesmo minuto"""
+        rodadas = self.ultimas_rodadas
+        return (len(rodadas) >= 2 and
+                rodadas.numero(-1) == rodadas.numero(-2) and
+                rodadas.minuto_epoch(-1) == rodadas.minuto_epoch(-2))
+
+    def processar_estrategias_posteriores(self, numero, horario_pedra, indice):
+        """Atualiza os brancos pendentes com a pedra colorida e dispara as estratégias 2, 4 e 6"""
+        if not self.brancos_pendentes:
             return
         
-        estrategias_pedra = [
-            (4, "11. Pedra 4 + 4min", 4),
-            (14, "12. Pedra 14 + 5min", 5),
-            (11, "13. Pedra 11 + 3min", 3),
-        ]
+        for branco in self.brancos_pendentes:
+            if horario_pedra <= branco.horario:
+                continue
+            branco.adicionar_pedra(numero)
+            self.disparar(indice.get(('posterior', branco.quantidade), ()), branco.horario, branco)
         
-        for num_pedra, nome, minutos in estrategias_pedra:
-            if numero == num_pedra:
-                minuto_destino = (horario.minute + minutos) % 60
-                if minuto_destino == 0:
-                    minuto_destino = 60
-                
-                horario_sinal = self.calcular_horario_destino(minuto_destino, horario.hour)
-                if horario_sinal and horario_sinal > agora_brasil():
-                    self.gerenciador.adicionar_estrategia(nome, horario_sinal, minuto_destino, horario)
-
-    def verificar_duas_pedras_iguais(self, cor, numero, horario):
-        """Verifica se duas pedras iguais saíram no mesmo minuto"""
-        if len(self.ultimas_rodadas) >= 2:
-            rodadas_lista = list(self.ultimas_rodadas)
-            ultima = rodadas_lista[-1]
-            penultima = rodadas_lista[-2]
-            
-            # Verifica se são do mesmo número e no mesmo minuto (ignorando segundos)
-            if (ultima[1] == penultima[1] and 
-                ultima[2].replace(second=0) == penultima[2].replace(second=0)):
-                
-                # ESTRATÉGIA 14: 2 pedras iguais +1h
-                minuto_destino = horario.minute
-                horario_sinal = horario.replace(hour=horario.hour + 1, minute=minuto_destino, second=30)
-                
-                if horario_sinal <= agora_brasil():
-                    horario_sinal += timedelta(days=1)
-                    
-                if horario_sinal > agora_brasil():
-                    self.gerenciador.adicionar_estrategia("14. 2 pedras iguais +1h", horario_sinal, minuto_destino, horario)
-                
-                # ESTRATÉGIA 20: Duas pedras iguais +14min
-                minuto_destino_20 = (horario.minute + 14) % 60
-                if minuto_destino_20 == 0:
-                    minuto_destino_20 = 60
-                horario_sinal_20 = self.calcular_horario_destino(minuto_destino_20, horario.hour)
-                if horario_sinal_20 and horario_sinal_20 > agora_brasil():
-                    self.gerenciador.adicionar_estrategia("20. 2 pedras iguais +14min", horario_sinal_20, minuto_destino_20, horario)
-
-    def verificar_soma_15_21(self, cor, numero, horario):
-        """Verifica se a pedra é 15 ou 21 → sinal +10min"""
-        if numero in [15, 21]:
-            minuto_destino = (horario.minute + 10) % 60
-            if minuto_destino == 0:
-                minuto_destino = 60
-            
-            horario_sinal = self.calcular_horario_destino(minuto_destino, horario.hour)
-            if horario_sinal and horario_sinal > agora_brasil():
-                self.gerenciador.adicionar_estrategia("16. Soma 15/21 +10min", horario_sinal, minuto_destino, horario)
+        # O branco sai da lista depois da 2ª pedra posterior
+        self.brancos_pendentes = [b for b in self.brancos_pendentes if b.quantidade < 2]
+
+    # === Warm start ===
+
+    def exportar_estado(self):
+        """Contadores e pendências do analisador (as rodadas ficam no banco, uma a uma)"""
+        cor, numero, horario = self.ultimo_branco or (None, None, None)
+        return {
+            # Rodadas do banco mais novas que esta ainda não passaram pelo analisador (warm start as reprocessa)
+            'ultima_rodada_ms': self.ultimas_rodadas.epoch_ms(-1) if len(self.ultimas_rodadas) else None,
+            'contador_sem_branco': self.contador_sem_branco,
+            'ultimo_branco_antes_sequencia': self.ultimo_branco_antes_sequencia,
+            'ultimo_branco': {'cor': cor, 'numero': numero, 'horario': horario} if self.ultimo_branco else None,
+            'brancos_pendentes': [{campo: getattr(b, campo) for campo in AcumuladorBranco.__slots__}
+                                  for b in self.brancos_pendentes],
+            'gerenciador': self.gerenciador.exportar_estado(),
+            'perfis': {chave: {'estrategias_ativas': gerenciador.estrategias_ativas,
+                               'config_confluencia': gerenciador.config_confluencia,
+                               'gerenciador': gerenciador.exportar_estado()}
+                       for chave, gerenciador in self.perfis.items()},
+        }
+
+    def restaurar_estado(self, estado, rodadas=(), finalizados=()):
+        """Reconstrói o analisador a partir do banco: buffer de rodadas, contadores e sinais"""
+        for cor, numero, horario in rodadas:
+            self.ultimas_rodadas.append(cor, numero, horario)
+        if estado is None:
+            self.gerenciador.historico_finalizados.extend(finalizados)
+            return
+
+        self.contador_sem_branco = estado['contador_sem_branco']
+        self.ultimo_branco_antes_sequencia = estado['ultimo_branco_antes_sequencia']
+        branco = estado['ultimo_branco']
+        self.ultimo_branco = (branco['cor'], branco['numero'], branco['horario']) if branco else None
+        self.brancos_pendentes = []
+        for dados in estado['brancos_pendentes']:
+            acumulador = AcumuladorBranco(dados['horario'])
+            for campo in ('primeira', 'segunda', 'soma', 'quantidade'):
+                setattr(acumulador, campo, dados[campo])
+            self.brancos_pendentes.append(acumulador)
+        self.gerenciador.restaurar_estado(estado['gerenciador'], finalizados)
+        for chave, perfil in estado.get('perfis', {}).items():
+            gerenciador = self.adicionar_perfil(chave, perfil['estrategias_ativas'], perfil['config_confluencia'])
+            gerenciador.restaurar_estado(perfil['gerenciador'])
+
+# ----------------------------------------
+# Métricas do /metrics
+# ----------------------------------------
+metricas_coleta = RegistroMetricas()  # Do processo que coleta e analisa
+metricas_web = RegistroMetricas()  # De cada processo que atende as rotas
+
+metrica_busca = metricas_coleta.histograma('blaze_busca_segundos', "Latência da consulta à API Blaze",
+                                           rotulo='feed')
+metrica_erros_busca = metricas_coleta.contador('blaze_busca_erros_total',
+                                               "Consultas com falha, por status HTTP ('rede' = sem resposta)",
+                                               rotulo=('feed', 'status'))
+metrica_rodadas = metricas_coleta.contador('rodadas_novas_total', "Rodadas novas detectadas", rotulo='feed')
+metrica_atraso = metricas_coleta.histograma('rodada_deteccao_atraso_segundos',
+                                            "Do created_at da rodada até a detecção pela coleta",
+                                            limites=(0.5, 1, 1.5, 2, 3, 5, 8, 13, 21, 34, 60), rotulo='feed')
+metrica_rodada = metricas_coleta.histograma('analisador_rodada_segundos', "Tempo de adicionar_rodada")
+metrica_estrategia = metricas_coleta.histograma('analisador_estrategia_segundos',
+                                                "Tempo de disparo de cada estratégia (alvo + gerenciador)",
+                                                rotulo='estrategia')
+metrica_resultado = metricas_coleta.histograma('gerenciador_resultado_segundos', "Tempo de processar_resultado")
+
+def somar_feeds(medida):
+    """Soma uma medida dos gerenciadores de todos os feeds já iniciados"""
+    return sum(medida(feed.analisador.gerenciador) for feed in FEEDS.values() if feed.analisador)
+
+metricas_coleta.medidor('sinais_ativos', "Sinais aguardando resultado",
+                        lambda: somar_feeds(lambda gerenciador: len(gerenciador.sinais_ativos)))
+metricas_coleta.medidor('estrategias_pendentes', "Estratégias verificadas ainda não expiradas",
+                        lambda: somar_feeds(lambda gerenciador: len(gerenciador.todas_estrategias)))
+metricas_coleta.medidor('grupos_confluencia', "Minutos alvo com estratégias agrupadas",
+                        lambda: somar_feeds(lambda gerenciador: len(gerenciador.sinais_agrupados)))
+metricas_coleta.medidor('perfis_usuario', "Perfis de usuário com gerenciador próprio",
+                        lambda: sum(len(feed.analisador.perfis) for feed in FEEDS.values() if feed.analisador))
+metrica_http = metricas_web.histograma('http_requisicao_segundos', "Latência das rotas JSON neste worker",
+                                       rotulo='rota')
+ROTAS_MEDIDAS = frozenset({'data', 'estatisticas'})
+
+# ----------------------------------------
+# Snapshot publicado para o /data
+# ----------------------------------------
+Snapshot = namedtuple('Snapshot', 'versao etag corpo')
+
+class PublicadorSnapshot:
+    """Último estado do /data já serializado; só a thread de coleta publica, as rotas só leem
+
+    Cada publicação troca a referência inteira (imutável), então a leitura é atômica."""
+    def __init__(self):
+        self.prefixo_etag = f"{int(time.time()):x}"  # Distingue ETags entre reinícios
+        self.snapshot = None
+        self.comprimido = (None, {})  # (etag, {codificação: corpo}) da última versão pedida comprimida
+
+    def publicar(self, corpo):
+        """Publica um novo corpo JSON (bytes) com a próxima versão"""
+        versao = self.snapshot.versao + 1 if self.snapshot else 1
+        self.snapshot = Snapshot(versao, f"{self.prefixo_etag}-{versao}", corpo)
+        return self.snapshot
+
+    def instalar(self, versao, etag, corpo):
+        """Instala um snapshot já versionado pelo processo coletor (mesma ETag em todos os workers)"""
+        self.snapshot = Snapshot(versao, etag, corpo)
+        return self.snapshot
+
+    def atual(self):
+        return self.snapshot
+
+    def versoes_comprimidas(self, snapshot):
+        """Versões gzip/br do snapshot: comprimidas na primeira requisição que as aceita e reaproveitadas"""
+        etag, versoes = self.comprimido
+        if etag != snapshot.etag:
+            versoes = comprimir(snapshot.corpo)
+            self.comprimido = (snapshot.etag, versoes)
+        return versoes
+
+publicador_metricas = PublicadorSnapshot()  # Métricas do coletor dedicado (texto Prometheus)
+
+# Canal para os workers web quando este processo é o coletor dedicado
+canal_compartilhado = None
+
+class CanalEventos:
+    """Distribui eventos Server-Sent Events (já formatados uma vez) para as conexões do /stream"""
+    def __init__(self, tamanho_fila=256):
+        self.lock = threading.Lock()
+        self.assinantes = set()
+        self.tamanho_fila = tamanho_fila
+        self.ids = itertools.count(1)
+
+    def assinar(self):
+        """Cria a fila de uma nova conexão"""
+        fila = queue.Queue(maxsize=self.tamanho_fila)
+        with self.lock:
+            self.assinantes.add(fila)
+        return fila
+
+    def cancelar(self, fila):
+        with self.lock:
+            self.assinantes.discard(fila)
+
+    def publicar(self, evento, dados):
+        """Envia o evento (dados = JSON já serializado, str ou bytes) a todas as conexões"""
+        if not self.assinantes:
+            return
+        if isinstance(dados, bytes):
+            dados = dados.decode('utf-8')
+        quadro = f"id: {next(self.ids)}\nevent: {evento}\ndata: {dados}\n\n".encode('utf-8')
+
+        with self.lock:
+            assinantes = list(self.assinantes)
+        for fila in assinantes:
+            try:
+                fila.put_nowait(quadro)
+            except queue.Full:
+                # Cliente lento: perde o evento mais antigo (o próximo snapshot repõe o estado)
+                try:
+                    fila.get_nowait()
+                    fila.put_nowait(quadro)
+                except (queue.Empty, queue.Full):
+                    pass
+
+def formatar_rodada(cor, numero, horario):
+    """Rodada no formato usado pelo painel (ultimo_resultado)"""
+    return {"numero": numero, "cor": cor, "horario": horario.strftime('%H:%M:%S')}
+
+def montar_payload_data(analisador, gerenciador=None):
+    """Monta o dicionário do /data a partir do analisador (e do gerenciador de um perfil, se informado)"""
+    gerenciador = gerenciador or analisador.gerenciador
+    sinais_ativos = gerenciador.get_sinais_ativos()
+    sinais_finalizados = gerenciador.get_sinais_finalizados()
+    estatisticas = gerenciador.estatisticas.get_todas_estatisticas()
+    rodadas = analisador.ultimas_rodadas
+
+    return {
+        "status": "ok",
+        "ultimo_resultado": formatar_rodada(*rodadas[-1]) if len(rodadas) else None,
+        "ativos": len(sinais_ativos),
+        "finalizados": len(sinais_finalizados),
+        "estatisticas": estatisticas,
+        "sinais_ativos": sinais_ativos[-5:],
+        "sinais_finalizados": sinais_finalizados[-5:]
+    }
+
+def montar_payload_estatisticas(analisador, gerenciador=None):
+    """Monta o dicionário do /estatisticas: [acertos, sinais] por janela, estratégia e nível"""
+    estatisticas = (gerenciador or analisador.gerenciador).estatisticas
+    return dict(status="ok",
+                ultimos_n=JanelaEstatisticas.ULTIMOS,
+                janelas=[nome for nome, _ in JanelaEstatisticas.JANELAS],
+                **estatisticas.get_estatisticas_janelas(analisador.relogio()))
+
+def compartilhar_documento(nome, snapshot):
+    """No coletor dedicado, envia a nova versão do documento aos workers web"""
+    if canal_compartilhado is not None:
+        try:
+            canal_compartilhado.publicar_snapshot(*snapshot, nome=nome)
+        except sqlite3.Error as e:
+            print(f"[ERRO CANAL] {e}")
 
+def publicar_metricas(intervalo=5.0):
+    """No coletor dedicado, envia as métricas de coleta aos workers (no máximo a cada intervalo)"""
+    if canal_compartilhado is None:
+        return
+    agora = time.monotonic()
+    if agora - getattr(publicar_metricas, 'ultima', float('-inf')) >= intervalo:
+        publicar_metricas.ultima = agora
+        corpo = metricas_coleta.renderizar().encode('utf-8')
+        compartilhar_documento('metricas', publicador_metricas.publicar(corpo))
+
+def caminho_banco(nome_feed):
+    """Banco durável do feed: DB_PATH para o padrão, 'base-<feed>.ext' para os demais"""
+    if not DB_PATH or nome_feed == FEED_PADRAO:
+        return DB_PATH
+    base, extensao = os.path.splitext(DB_PATH)
+    return f"{base}-{nome_feed}{extensao}"
+
+# ----------------------------------------
+# Perfis de usuário (estratégias ativas + limiares de confluência)
 # ----------------------------------------
+CAMPOS_CONFLUENCIA = ('baixa', 'media', 'alta', 'minima_ativa')
+NOMES_ESTRATEGIAS = frozenset(estrategia.nome for estrategia in ESTRATEGIAS)
+
+def perfil_do_gerenciador(gerenciador):
+    """Perfil normalizado (estratégias ativas na ordem do registro + confluência) de um gerenciador"""
+    return {'estrategias': [e.nome for e in ESTRATEGIAS if gerenciador.is_estrategia_ativa(e.nome)],
+            'confluencia': {campo: gerenciador.config_confluencia[campo] for campo in CAMPOS_CONFLUENCIA}}
+
+PERFIL_PADRAO = perfil_do_gerenciador(GerenciadorSinais())
+
+def normalizar_perfil(dados):
+    """Valida o perfil enviado ao /perfil; campos ausentes ficam com o padrão (ValueError se inválido)"""
+    if not isinstance(dados, dict):
+        raise ValueError("o perfil deve ser um objeto JSON")
+
+    nomes = dados.get('estrategias', PERFIL_PADRAO['estrategias'])
+    if not isinstance(nomes, list) or not all(isinstance(nome, str) for nome in nomes):
+        raise ValueError("'estrategias' deve ser uma lista com os nomes das estratégias ativas")
+    desconhecidas = set(nomes) - NOMES_ESTRATEGIAS
+    if desconhecidas:
+        raise ValueError(f"estratégias desconhecidas: {', '.join(sorted(desconhecidas))}")
+
+    enviada = dados.get('confluencia', {})
+    if not isinstance(enviada, dict):
+        raise ValueError("'confluencia' deve ser um objeto com os limiares")
+    confluencia = dict(PERFIL_PADRAO['confluencia'])
+    confluencia.update(enviada)
+    if set(confluencia) != set(CAMPOS_CONFLUENCIA) or not all(
+            type(valor) is int and 1 <= valor <= len(ESTRATEGIAS) for valor in confluencia.values()):
+        raise ValueError(f"'confluencia' aceita só {', '.join(CAMPOS_CONFLUENCIA)} "
+                         f"(inteiros de 1 a {len(ESTRATEGIAS)})")
+    if not confluencia['baixa'] <= confluencia['media'] <= confluencia['alta']:
+        raise ValueError("os limiares precisam respeitar baixa <= media <= alta")
+
+    return {'estrategias': [e.nome for e in ESTRATEGIAS if e.nome in nomes],
+            'confluencia': {campo: confluencia[campo] for campo in CAMPOS_CONFLUENCIA}}
+
+def chave_perfil(perfil):
+    """None para o perfil padrão; senão um hash curto (usuários com a mesma escolha compartilham o perfil)"""
+    if perfil == PERFIL_PADRAO:
+        return None
+    texto = json.dumps(perfil, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()[:12]
+
+class RegistroPerfis:
+    """Usuário → perfil em memória, acompanhando o que foi gravado em PerfisUsuarios"""
+    def __init__(self, armazem):
+        self.armazem = armazem
+        self.versao = 0  # Última versão lida do banco
+        self.por_usuario = {}  # usuário → (chave, perfil); ausente = perfil padrão
+        self.lock = threading.Lock()
+        self.ultima_leitura = float('-inf')
+
+    def sincronizar(self, intervalo=1.0):
+        """Lê as gravações novas (no máximo uma consulta por intervalo)"""
+        with self.lock:
+            agora = time.monotonic()
+            if agora - self.ultima_leitura < intervalo:
+                return
+            self.ultima_leitura = agora
+            try:
+                alteracoes = self.armazem.alteracoes_desde(self.versao)
+            except sqlite3.Error as e:
+                print(f"[ERRO PERFIS] {e}")
+                return
+            for versao, usuario, perfil in alteracoes:
+                self.versao = versao
+                chave = None if perfil is None else chave_perfil(perfil)
+                if chave is None:
+                    self.por_usuario.pop(usuario, None)
+                else:
+                    self.por_usuario[usuario] = (chave, perfil)
+
+    def salvar(self, usuario, perfil):
+        """Grava o perfil do usuário (None = padrão) e já passa a usá-lo neste processo"""
+        if perfil is not None and chave_perfil(perfil) is None:
+            perfil = None  # Igual ao padrão: não precisa de gerenciador próprio
+        self.armazem.salvar(usuario, perfil)
+        self.sincronizar(intervalo=0)
+
+    def do_usuario(self, usuario):
+        """(chave, perfil) do usuário; chave None = perfil padrão"""
+        return self.por_usuario.get(usuario, (None, PERFIL_PADRAO))
+
+    def em_uso(self):
+        """Perfis não padrão escolhidos por algum usuário: chave → perfil"""
+        with self.lock:
+            return {chave: perfil for chave, perfil in self.por_usuario.values()}
+
+registro_perfis = RegistroPerfis(PerfisUsuarios(PERFIS_PATH))
+
+# ----------------------------------------
+# Feeds monitorados
+# ----------------------------------------
+class SaidaPerfil:
+    """O que as rotas servem para um perfil do feed: snapshots do /data e do /estatisticas e o /stream"""
+    def __init__(self):
+        self.publicador = PublicadorSnapshot()
+        self.publicador_estatisticas = PublicadorSnapshot()  # Janelas móveis do /estatisticas
+        self.canal_eventos = CanalEventos()
+
+class Feed:
+    """Uma mesa/feed: coleta (agendador + ingestor), analisador próprio e documentos publicados por perfil"""
+    def __init__(self, nome, url):
+        self.nome = nome
+        self.url = url
+        self.analisador = None  # Criado só no processo que coleta
+        self.ultimo_id_processado = None
+        self.estado_pendente = False  # Rodadas analisadas desde o último salvar_estado
+        self.ultimo_estado_salvo = float('-inf')
+        self.proxima_expiracao = None  # Quando um sinal publicado como ativo vence (republica sem rodada nova)
+        self.agendador = AgendadorColeta(periodo_minimo=PERIODO_RODADA_MIN, periodo_maximo=PERIODO_RODADA_MAX)
+        self.ingestor = IngestorRodadas()
+        self.armazem = None
+        self.gravador = None  # Gravação bruta (GRAVACAO_DIR), só no processo que coleta
+        self.leitor_historico = LeitorHistorico(caminho_banco(nome)) if caminho_banco(nome) else None
+        self.saidas = {None: SaidaPerfil()}  # Chave do perfil → saída (None = perfil padrão)
+
+    def rotulo(self, chave=None):
+        """Nome nos documentos e eventos do canal: 'feed' ou 'feed@perfil'"""
+        return self.nome if chave is None else f"{self.nome}@{chave}"
+
+    def saida(self, chave=None):
+        """Saída do perfil (criada na primeira vez que o perfil aparece neste processo)"""
+        saida = self.saidas.get(chave)
+        if saida is None:
+            saida = self.saidas[chave] = SaidaPerfil()
+        return saida
+
+    def documentos(self):
+        """Documentos repassados do processo coletor para os workers web (nome → publicador)"""
+        documentos = {}
+        for chave, saida in list(self.saidas.items()):
+            documentos[f"data:{self.rotulo(chave)}"] = saida.publicador
+            documentos[f"estatisticas:{self.rotulo(chave)}"] = saida.publicador_estatisticas
+        return documentos
+
+    def emitir_evento(self, evento, dados, chave=None):
+        """Publica um evento no /stream local do perfil e, no coletor dedicado, no canal dos workers"""
+        self.saida(chave).canal_eventos.publicar(evento, dados)
+        if canal_compartilhado is not None:
+            canal_compartilhado.publicar_evento(evento, dados, self.rotulo(chave))
+
+    def transmitir_sinal(self, evento, sinal, chave=None):
+        """Ouvinte do GerenciadorSinais: repassa sinais novos/atualizados e resultados ao /stream do perfil"""
+        tipo = 'resultado' if evento == 'finalizado' else 'sinal'
+        if self.saida(chave).canal_eventos.assinantes or canal_compartilhado is not None:
+            self.emitir_evento(tipo, app.json.dumps(dict(sinal, evento=evento), separators=(",", ":")), chave)
+
+    def escutar_perfil(self, chave, gerenciador):
+        """Liga o gerenciador do perfil ao /stream e ao histórico durável, recarregando os últimos finalizados"""
+        gerenciador.ouvintes.append(functools.partial(self.transmitir_sinal, chave=chave))
+        gerenciador.ouvintes.append(functools.partial(self.gravar_finalizado, chave=chave))
+        if self.armazem is not None and not gerenciador.historico_finalizados:
+            try:
+                gerenciador.historico_finalizados.extend(
+                    self.armazem.finalizados(gerenciador.historico_finalizados.maxlen, chave))
+            except sqlite3.Error as e:
+                print(f"[ERRO BANCO] {e}")
+
+    def aplicar_perfis(self, em_uso):
+        """Cria/remove gerenciadores de perfil até ficar igual aos perfis em uso; True se mudou algo"""
+        analisador = self.analisador
+        if analisador is None or set(analisador.perfis) == set(em_uso):
+            return False
+        for chave in set(analisador.perfis) - set(em_uso):
+            analisador.remover_perfil(chave)
+            self.saidas.pop(chave, None)
+        for chave, perfil in em_uso.items():
+            if chave not in analisador.perfis:
+                ativas = {nome: nome in perfil['estrategias'] for nome in NOMES_ESTRATEGIAS}
+                self.escutar_perfil(chave, analisador.adicionar_perfil(chave, ativas, dict(perfil['confluencia'])))
+        return True
+
+    def gravar_finalizado(self, evento, sinal, chave=None):
+        """Ouvinte do GerenciadorSinais: acrescenta cada sinal finalizado do perfil ao banco durável"""
+        if evento == 'finalizado' and self.armazem is not None:
+            self.armazem.registrar_finalizado(sinal, chave)
+
+    def publicar_estado(self):
+        """Serializa o estado atual uma única vez por perfil para todas as requisições do /data e do /estatisticas"""
+        expiracoes = [gerenciador.proxima_expiracao() for gerenciador in self.analisador.gerenciadores()]
+        self.proxima_expiracao = min(filter(None, expiracoes), default=None)
+        for chave, gerenciador in [(None, self.analisador.gerenciador), *self.analisador.perfis.items()]:
+            saida = self.saida(chave)
+            corpo = app.json.dumps(montar_payload_data(self.analisador, gerenciador), separators=(",", ":"))
+            snapshot = saida.publicador.publicar(corpo.encode('utf-8'))
+            saida.canal_eventos.publicar('snapshot', corpo)
+            compartilhar_documento(f"data:{self.rotulo(chave)}", snapshot)
+
+            corpo = app.json.dumps(montar_payload_estatisticas(self.analisador, gerenciador), separators=(",", ":"))
+            compartilhar_documento(f"estatisticas:{self.rotulo(chave)}",
+                                   saida.publicador_estatisticas.publicar(corpo.encode('utf-8')))
+
+    def iniciar(self):
+        """Cria o analisador do feed, faz o warm start e publica o primeiro estado"""
+        if self.analisador is None:
+            self.analisador = AnalisadorEstrategiaHorarios()
+            self.analisador.gerenciador.ouvintes.append(self.transmitir_sinal)
+            print(f"🔄 Inicializando o Analisador de Estratégias ({self.nome}).")
+            self.restaurar_estado_duravel()
+            self.abrir_gravacao()
+            for chave, gerenciador in self.analisador.perfis.items():
+                self.escutar_perfil(chave, gerenciador)  # Perfis restaurados do warm start
+            registro_perfis.sincronizar()
+            self.aplicar_perfis(registro_perfis.em_uso())
+        self.publicar_estado()
+
+    def abrir_gravacao(self):
+        """Inicia a gravação bruta do feed em GRAVACAO_DIR (se configurado)"""
+        if not GRAVACAO_DIR:
+            return
+        try:
+            self.gravador = GravadorFeed(GRAVACAO_DIR, self.nome,
+                                         limite_total=GRAVACAO_LIMITE_MB * 1024 * 1024).abrir()
+        except OSError as e:
+            print(f"[ERRO GRAVADOR] {e}")
+            return
+        print(f"📼 Gravando o feed {self.nome} em {GRAVACAO_DIR}")
+
+    def restaurar_estado_duravel(self):
+        """Abre o banco durável e recarrega analisador, estatísticas e IDs já vistos"""
+        caminho = caminho_banco(self.nome)
+        if not caminho:
+            return
+
+        inicio = time.perf_counter()
+        analisador = self.analisador
+        armazem = ArmazemDuravel(caminho)
+        try:
+            armazem.abrir()  # Cria as tabelas num banco novo
+            estado, rodadas, finalizados = armazem.carregar(analisador.ultimas_rodadas.capacidade,
+                                                            analisador.gerenciador.historico_finalizados.maxlen)
+        except sqlite3.Error as e:
+            print(f"[ERRO BANCO] {e}")
+            armazem.fechar()
+            return
+
+        # O estado é gravado no máximo a cada ESTADO_INTERVALO: rodadas gravadas depois dele são reprocessadas
+        ultima_analisada = estado.get('ultima_rodada_ms') if estado is not None else None
+        if ultima_analisada is None:
+            ultima_analisada = float('inf')  # Estado de versão anterior (ou banco sem estado): tudo vai pro buffer
+        horarios = [(cor, numero, datetime.fromtimestamp(epoch_ms / 1000, FUSO_BRASIL))
+                    for _, cor, numero, epoch_ms in rodadas]
+        analisadas = sum(1 for *_, epoch_ms in rodadas if epoch_ms <= ultima_analisada)
+        analisador.restaurar_estado(estado, horarios[:analisadas], finalizados)
+        try:
+            self.reprocessar_rodadas(armazem, horarios[analisadas:], finalizados)
+        except sqlite3.Error as e:
+            print(f"[ERRO BANCO] {e}")
+        for rodada_id, *_ in rodadas[-self.ingestor.capacidade:]:
+            self.ingestor.marcar_visto(rodada_id)
+        if rodadas:
+            self.ultimo_id_processado = rodadas[-1][0]
+
+        self.armazem = armazem
+        analisador.gerenciador.ouvintes.append(self.gravar_finalizado)
+        print(f"💾 Warm start ({self.nome}): {len(rodadas)} rodadas ({len(rodadas) - analisadas} reprocessadas) "
+              f"e {len(finalizados)} sinais finalizados em {(time.perf_counter() - inicio) * 1000:.1f} ms")
 
-# Inicializa o analisador global
-analisar_global = None
-ultimo_id_processado = None
+    def reprocessar_rodadas(self, armazem, rodadas, finalizados):
+        """Acerta os IDs de sinal com o banco e passa pelo analisador as rodadas gravadas depois do último estado
+
+        Roda num relógio simulado (cada rodada vista 1 s depois do horário) e sem ouvintes:
+        os sinais finalizados nessas rodadas já estão no banco e não são regravados."""
+        analisador = self.analisador
+        gerenciadores = {None: analisador.gerenciador, **analisador.perfis}
+        maiores_ids = armazem.ultimos_ids_sinais()
+        for chave, gerenciador in gerenciadores.items():
+            gerenciador.sinais_ativos.ultimo_id = max(gerenciador.sinais_ativos.ultimo_id, maiores_ids.get(chave) or 0)
+        if rodadas:
+            instante = [rodadas[0][2]]
+            relogio = lambda: instante[0]
+            ouvintes = {chave: gerenciador.ouvintes for chave, gerenciador in gerenciadores.items()}
+            analisador.relogio = relogio
+            for gerenciador in gerenciadores.values():
+                gerenciador.relogio = relogio
+                gerenciador.ouvintes = []
+            try:
+                for cor, numero, horario in rodadas:
+                    instante[0] = horario + timedelta(seconds=1)
+                    analisador.adicionar_rodada(cor, numero, horario)
+                    for gerenciador in gerenciadores.values():
+                        gerenciador.limpar_dados_antigos()
+            finally:
+                analisador.relogio = agora_brasil
+                for chave, gerenciador in gerenciadores.items():
+                    gerenciador.relogio = agora_brasil
+                    gerenciador.ouvintes = ouvintes[chave]
+
+        for chave, gerenciador in gerenciadores.items():
+            # Sinal do estado salvo que já foi finalizado (e gravado) depois dele não volta como ativo
+            ativos = {sinal['id']: sinal for sinal in gerenciador.sinais_ativos}
+            for sinal_id in armazem.ids_finalizados(chave, ativos):
+                gerenciador.sinais_ativos.remover(ativos[sinal_id])
+            gerenciador.historico_finalizados.clear()  # O banco é a fonte do histórico (perfis: escutar_perfil)
+        analisador.gerenciador.historico_finalizados.extend(finalizados)
+
+    def processar_resposta(self, dados_rodadas, status):
+        """Trata uma resposta da API: agendamento, rodadas novas, análise e publicação"""
+        if status is None or status >= 400:
+            self.agendador.registrar_erro(status)
+            metrica_erros_busca.incrementar((self.nome, 'rede' if status is None else str(status)))
+        else:
+            self.agendador.registrar_sucesso()
+
+        if dados_rodadas:
+            brutas = [] if self.gravador is not None else None
+            novas = self.ingestor.novas_rodadas(dados_rodadas, brutas)
+            if brutas:
+                self.gravador.registrar(reversed(brutas))  # A API lista da mais nova para a mais antiga
+            if novas:
+                detectado_em = time.time()
+                for rodada_id, cor, numero, horario_real in novas:
+                    print(f"[{horario_real.strftime('%H:%M:%S')}] {self.nome}: {cor.upper()} {numero}")
+                    self.agendador.registrar_rodada(horario_real, detectado_em)
+                    metrica_rodadas.incrementar(self.nome)
+                    metrica_atraso.observar(max(0.0, detectado_em - horario_real.timestamp()), self.nome)
+                    if self.armazem is not None:
+                        self.armazem.registrar_rodada(rodada_id, cor, numero, horario_real)
+                    dados = app.json.dumps(formatar_rodada(cor, numero, horario_real))
+                    for chave in list(self.saidas):
+                        self.emitir_evento('rodada', dados, chave)
+
+                self.analisador.adicionar_rodadas([(cor, numero, horario) for _, cor, numero, horario in novas])
+                self.ultimo_id_processado = novas[-1][0]
+                self.publicar_estado()
+                self.estado_pendente = True
+
+            for gerenciador in self.analisador.gerenciadores():
+                gerenciador.limpar_dados_antigos()
+
+        if self.proxima_expiracao is not None and self.analisador.relogio() > self.proxima_expiracao:
+            self.publicar_estado()  # Sinal vencido sai do /data e do /stream mesmo sem rodada nova (ou sem API)
+        self.salvar_estado()
+
+    def salvar_estado(self, forcar=False):
+        """Grava o estado do analisador se mudou, no máximo a cada ESTADO_INTERVALO segundos (forcar: já)
+
+        Exportar e codificar o estado inteiro custa milissegundos por perfil, então não
+        acontece a cada lote; rodadas e sinais finalizados continuam gravados um a um."""
+        if self.armazem is None or not self.estado_pendente:
+            return
+        agora = time.monotonic()
+        if not forcar and agora - self.ultimo_estado_salvo < ESTADO_INTERVALO:
+            return
+        self.ultimo_estado_salvo = agora
+        self.estado_pendente = False
+        self.armazem.salvar_estado(self.analisador.exportar_estado())
+
+FEEDS = {nome: Feed(nome, url) for nome, url in FEEDS_CONFIGURADOS.items()}
+
+def feed_do_rotulo(rotulo):
+    """'feed' ou 'feed@perfil' → (Feed ou None, chave do perfil)"""
+    nome, _, chave = rotulo.partition('@')
+    return FEEDS.get(nome), chave or None
+
+def documentos_compartilhados():
+    """Todos os documentos repassados aos workers web (nome → publicador), inclusive os de perfil"""
+    documentos = {'metricas': publicador_metricas}
+    for feed in FEEDS.values():
+        documentos.update(feed.documentos())
+    return documentos
+
+def aplicar_perfis():
+    """No processo que coleta: acompanha os perfis gravados e ajusta os gerenciadores de cada feed"""
+    registro_perfis.sincronizar()
+    em_uso = registro_perfis.em_uso()
+    for feed in FEEDS.values():
+        if feed.aplicar_perfis(em_uso):
+            feed.publicar_estado()
 
 # ----------------------------------------
 # Flask e autenticação
@@ -653,43 +1681,164 @@ auth = HTTPBasicAuth()
 USUARIOS_VALIDOS = {"adm": "P@$1zero14x!"}
 for i in range(1, 21):
     USUARIOS_VALIDOS[f"user{i:02}"] = "P@$1zero14x!"
+ADMINISTRADORES = frozenset({"adm"})  # Acesso às rotas /admin
 
 @auth.verify_password
 def verificar(usuario, senha):
     return USUARIOS_VALIDOS.get(usuario) == senha
 
 # ----------------------------------------
-# Função de coleta em thread
+# Motor de coleta (asyncio, todos os feeds)
 # ----------------------------------------
+class MotorColeta:
+    """Coleta de N feeds num único event loop, sobre um pool de conexões compartilhado
+
+    As consultas HTTP (bloqueantes, via requests) vão para um executor pequeno; a análise
+    roda sempre na thread do loop, então cada analisador continua com um único escritor."""
+    def __init__(self, feeds, max_conexoes=8):
+        self.feeds = feeds
+        tamanho = max(1, min(max_conexoes, len(feeds)))
+        self.session = criar_sessao(tamanho)
+        self.executor = ThreadPoolExecutor(max_workers=tamanho, thread_name_prefix="coleta")
+        self.loop = None
+
+    async def acompanhar(self, feed):
+        """Laço de um feed: consulta, processa e dorme o que o agendador mandar"""
+        loop = asyncio.get_running_loop()
+        cliente = ClienteBlaze(feed.url, session=self.session)
+        feed.iniciar()
+
+        while True:
+            try:
+                inicio = time.perf_counter()
+                dados_rodadas, status = await loop.run_in_executor(self.executor, cliente.buscar)
+                metrica_busca.observar(time.perf_counter() - inicio, feed.nome)
+                feed.processar_resposta(dados_rodadas, status)
+                aplicar_perfis()
+                publicar_metricas()
+            except Exception as e:
+                print(f"[ERRO COLETA {feed.nome}] {e}")
+                feed.agendador.registrar_erro()
+            await asyncio.sleep(feed.agendador.proxima_espera())
+
+    async def executar(self):
+        self.loop = asyncio.get_running_loop()
+        await asyncio.gather(*(self.acompanhar(feed) for feed in self.feeds.values()))
+
+    def encerrar(self, timeout=10):
+        """Chamado de outra thread: encerra os feeds dentro do loop, sem concorrer com a análise"""
+        async def encerrar_no_loop():
+            encerrar_feeds()
+        try:
+            asyncio.run_coroutine_threadsafe(encerrar_no_loop(), self.loop).result(timeout)
+        except (RuntimeError, TimeoutError) as e:  # Loop já parado (ou preso): encerra daqui mesmo
+            print(f"[ERRO COLETA] encerramento fora do loop: {e!r}")
+            encerrar_feeds()
+
+motor_coleta = None  # MotorColeta da coleta em thread (modo sem coletor dedicado)
+
 def iniciar_coleta_blaze():
-    global ultimo_id_processado
-    global analisar_global
+    global motor_coleta
+    print(f"🔄 Iniciando coleta da API Blaze ({', '.join(FEEDS)})...")
+    motor_coleta = MotorColeta(FEEDS)
+    asyncio.run(motor_coleta.executar())
 
-    if analisar_global is None:
-        analisar_global = AnalisadorEstrategiaHorarios()
-        print("🔄 Inicializando o Analisador de Estratégias.")
-        
-    print("🔄 Iniciando coleta da API Blaze...")
+def encerrar_feeds():
+    """Grava o estado pendente, esvazia as filas dos bancos e fecha as gravações de todos os feeds"""
+    for feed in FEEDS.values():
+        if feed.armazem is not None:
+            feed.salvar_estado(forcar=True)
+            feed.armazem.fechar()
+            feed.armazem = None
+        if feed.gravador is not None:
+            feed.gravador.fechar()
+            feed.gravador = None
+
+def encerrar_coleta_em_thread():
+    """atexit da coleta em thread (Ctrl+C, SIGTERM do gunicorn): a thread é daemon e morreria sem gravar"""
+    if motor_coleta is not None and motor_coleta.loop is not None:
+        motor_coleta.encerrar()
+
+def executar_coletor(caminho_canal):
+    """Processo coletor dedicado: coleta/analisa uma vez e publica o estado para todos os workers"""
+    global canal_compartilhado
+    canal_compartilhado = CanalSQLite(caminho_canal)
+    canal_compartilhado.criar_tabelas()
+    canal_compartilhado.gravar_documento('coletor', str(os.getpid()).encode('utf-8'))
+    threading.current_thread().name = THREAD_COLETOR
+    print(f"📡 Coletor dedicado publicando em {caminho_canal}")
+
+    # O gunicorn encerra o coletor com SIGTERM: grava o que falta nos bancos antes de sair
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    # Os workers pedem perfis com SIGUSR1 (o pedido em si fica no canal)
+    signal.signal(signal.SIGUSR1, lambda *_: threading.Thread(target=atender_pedidos_perfil, daemon=True).start())
+    try:
+        iniciar_coleta_blaze()
+    finally:
+        encerrar_feeds()
+
+# ----------------------------------------
+# Perfilador sob demanda (/admin/perfilador)
+# ----------------------------------------
+trava_perfilador = threading.Lock()  # Um perfil por vez em cada processo
+ultimo_pedido_perfil = 0
+
+def atender_pedidos_perfil():
+    """Coletor dedicado: executa, em ordem, os perfis pedidos pelos workers e grava o resultado no canal"""
+    global ultimo_pedido_perfil
+    with trava_perfilador:
+        try:
+            for pedido_id, parametros in canal_compartilhado.pedidos_desde(ultimo_pedido_perfil):
+                ultimo_pedido_perfil = pedido_id
+                corpo = perfilar(**json.loads(parametros))
+                canal_compartilhado.gravar_documento(f"perfilador:{pedido_id}", corpo)
+        except sqlite3.Error as e:
+            print(f"[ERRO PERFILADOR] {e}")
+
+def perfilar_no_coletor(parametros):
+    """Worker web: pede o perfil ao coletor dedicado e espera o resultado (None se não vier a tempo)"""
+    canal = CanalSQLite(CANAL_COLETOR)
+    coletor = canal.ler_snapshot(None, 'coletor')
+    if coletor is None:
+        return None
+    pedido_id = canal.criar_pedido(json.dumps(parametros))
+    os.kill(int(coletor[2]), signal.SIGUSR1)
+
+    prazo = time.monotonic() + parametros['duracao'] + 10
+    nome = f"perfilador:{pedido_id}"
+    while time.monotonic() < prazo:
+        resultado = canal.ler_snapshot(None, nome)
+        if resultado:
+            canal.remover_documento(nome)
+            return resultado[2]
+        time.sleep(0.2)
+    return None
+
+def repetir_canal(caminho_canal, intervalo=0.2):
+    """Thread dos workers web: traz documentos e eventos do coletor para as rotas locais"""
+    canal = CanalSQLite(caminho_canal)
+    ultimo_seq = canal.ultimo_evento()
 
     while True:
         try:
-            dados_rodadas = buscar_dados_api(API_URL)
-            if dados_rodadas:
-                rodada = dados_rodadas[0]
-                rodada_id = rodada.get('id')
-
-                if rodada_id and rodada_id != ultimo_id_processado:
-                    cor, numero, horario_real = processar_rodada(dados_rodadas)
-                    if cor and numero is not None and horario_real:
-                        print(f"[{horario_real.strftime('%H:%M:%S')}] {cor.upper()} {numero}")
-                        analisar_global.adicionar_rodada(cor, numero, horario_real)
-                        ultimo_id_processado = rodada_id
-
-                analisar_global.gerenciador.limpar_dados_antigos()
-            time.sleep(3)
-        except Exception as e:
-            print(f"[ERRO THREAD] {e}")
-            time.sleep(5)
+            for seq, rotulo, evento, dados in canal.eventos_desde(ultimo_seq):
+                feed, chave = feed_do_rotulo(rotulo or '')
+                if feed is not None:
+                    feed.saida(chave).canal_eventos.publicar(evento, dados)  # Perfil novo ganha saída aqui
+                ultimo_seq = seq
+
+            for nome, publicador_documento in documentos_compartilhados().items():
+                atual = publicador_documento.atual()
+                novo = canal.ler_snapshot(atual.versao if atual else None, nome)
+                if novo:
+                    snapshot = publicador_documento.instalar(*novo)
+                    tipo, _, rotulo = nome.partition(':')
+                    if tipo == 'data':
+                        feed, chave = feed_do_rotulo(rotulo)
+                        feed.saida(chave).canal_eventos.publicar('snapshot', snapshot.corpo)
+        except sqlite3.Error as e:
+            print(f"[ERRO CANAL] {e}")
+        time.sleep(intervalo)
 
 # ----------------------------------------
 # Inicialização do Thread de Coleta (CORRIGIDO)
@@ -701,47 +1850,271 @@ def start_thread():
         start_thread.thread_started = False
 
     if not start_thread.thread_started:
-        t = threading.Thread(target=iniciar_coleta_blaze, daemon=True)
+        # Com o coletor dedicado, o worker só acompanha o canal; senão coleta por conta própria
+        if CANAL_COLETOR:
+            t = threading.Thread(target=repetir_canal, args=(CANAL_COLETOR,), daemon=True)
+        else:
+            t = threading.Thread(target=iniciar_coleta_blaze, name=THREAD_COLETOR, daemon=True)
+            atexit.register(encerrar_coleta_em_thread)
         t.start()
         start_thread.thread_started = True
 
+@app.before_request
+def marcar_inicio_requisicao():
+    g.inicio_requisicao = time.perf_counter()
+
+@app.after_request
+def medir_requisicao(resposta):
+    if request.endpoint in ROTAS_MEDIDAS and 'inicio_requisicao' in g:
+        metrica_http.observar(time.perf_counter() - g.inicio_requisicao, request.endpoint)
+    return resposta
+
 # ----------------------------------------
 # Rotas do site
 # ----------------------------------------
+# Painel e logo: lidos, renderizados e comprimidos uma vez na subida. O logo vai numa URL
+# com o hash do conteúdo (cache imutável); o HTML revalida por ETag e aponta para ela.
+DIRETORIO_APP = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(DIRETORIO_APP, 'staticlogo.png.jpg'), 'rb') as arquivo:
+    LOGO = RecursoEstatico(arquivo.read(), 'image/jpeg', compressivel=False)  # JPEG já é comprimido
+URL_LOGO = f"/logo.{LOGO.hash}.jpg"
+PAINEL = RecursoEstatico(app.jinja_env.get_template('index.html').render(url_logo=URL_LOGO).encode('utf-8'),
+                         'text/html; charset=utf-8')
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+
+def responder_comprimido(corpo, tipo, versoes, etag=None):
+    """Resposta com a melhor versão pronta que o cliente aceita (Accept-Encoding), com ETag/304"""
+    codificacao = escolher_codificacao(request.accept_encodings, versoes)
+    resposta = app.response_class(versoes[codificacao] if codificacao else corpo, content_type=tipo)
+    resposta.vary.add('Accept-Encoding')
+    if codificacao:
+        resposta.content_encoding = codificacao
+    if etag is not None:
+        # Cada codificação é uma representação diferente, com ETag própria
+        resposta.set_etag(f"{etag}-{codificacao}" if codificacao else etag)
+        return resposta.make_conditional(request)
+    return resposta
+
 @app.route("/")
 def index():
-    # OBS: O arquivo 'index.html' deve estar na pasta 'modelos/'
-    return render_template("index.html")
+    # OBS: O arquivo 'index.html' deve estar na pasta 'modelos/' (renderizado uma vez na subida)
+    resposta = responder_comprimido(PAINEL.corpo, PAINEL.tipo, PAINEL.versoes, PAINEL.hash)
+    resposta.cache_control.no_cache = True
+    return resposta
+
+@app.route("/logo.<versao>.jpg")
+def logo(versao):
+    """Logo com o hash do conteúdo na URL: pode ficar em cache para sempre"""
+    if versao != LOGO.hash:
+        return redirect(URL_LOGO)
+    resposta = app.response_class(LOGO.corpo, content_type=LOGO.tipo)
+    resposta.headers['Cache-Control'] = CACHE_IMUTAVEL
+    resposta.set_etag(LOGO.hash)
+    return resposta.make_conditional(request)
+
+def responder_snapshot(publicador):
+    """Resposta JSON do snapshot atual do publicador (já serializado), comprimida se aceito, com ETag/304"""
+    snapshot = publicador.atual()
+    if snapshot is None:
+        return jsonify({"status": "aguardando inicialização..."})
+
+    versoes = publicador.versoes_comprimidas(snapshot) if request.accept_encodings else {}
+    resposta = responder_comprimido(snapshot.corpo, "application/json", versoes, snapshot.etag)
+    resposta.cache_control.private = True
+    resposta.cache_control.no_cache = True
+    return resposta
+
+def feed_da_requisicao():
+    """Feed pedido em ?feed= (padrão: o primeiro configurado); None se não existir"""
+    return FEEDS.get(request.args.get('feed') or FEED_PADRAO)
+
+def feed_desconhecido():
+    return jsonify({"status": "feed desconhecido", "feeds": list(FEEDS)}), 404
+
+def parametro_inteiro(nome, padrao=None):
+    """Parâmetro inteiro da query string (ValueError se não for número)"""
+    valor = request.args.get(nome, '')
+    return int(valor) if valor else padrao
+
+def saida_do_usuario(feed):
+    """Saída do feed no perfil do usuário autenticado"""
+    registro_perfis.sincronizar()
+    chave, _ = registro_perfis.do_usuario(auth.current_user())
+    return feed.saida(chave)
+
+@app.route("/feeds")
+@auth.login_required
+def feeds():
+    """Feeds monitorados (o primeiro é o padrão do /data, /estatisticas e /stream)"""
+    return jsonify({"padrao": FEED_PADRAO, "feeds": list(FEEDS)})
 
 @app.route("/data")
 @auth.login_required
 def data():
-    """Retorna dados consolidados para o front"""
-    global analisar_global
-    
-    if analisar_global is None:
-        return jsonify({"status": "aguardando inicialização..."})
+    """Retorna dados consolidados para o front (snapshot pronto, com ETag/304); ?feed= escolhe a mesa"""
+    feed = feed_da_requisicao()
+    if feed is None:
+        return feed_desconhecido()
+    return responder_snapshot(saida_do_usuario(feed).publicador)
 
-    sinais_ativos = analisar_global.gerenciador.get_sinais_ativos()
-    
-    # CORRIGIDO: Usando 'analisar_global'
-    sinais_finalizados = analisar_global.gerenciador.get_sinais_finalizados() 
-    
-    estatisticas = analisar_global.gerenciador.estatisticas.get_todas_estatisticas()
+@app.route("/estatisticas")
+@auth.login_required
+def estatisticas():
+    """Assertividade em janelas móveis (últimos N, 1h, 6h, 24h) por estratégia e nível"""
+    feed = feed_da_requisicao()
+    if feed is None:
+        return feed_desconhecido()
+    return responder_snapshot(saida_do_usuario(feed).publicador_estatisticas)
 
-    return jsonify({
-        "status": "ok",
-        "ativos": len(sinais_ativos),
-        "finalizados": len(sinais_finalizados),
-        "estatisticas": estatisticas,
-        "sinais_ativos": sinais_ativos[-5:],
-        "sinais_finalizados": sinais_finalizados[-5:]
-    })
+@app.route("/historico")
+@auth.login_required
+def historico():
+    """Sinais finalizados do perfil do usuário, paginados por cursor
+
+    ?since=<cursor> traz só o que finalizou depois (ordem crescente, para sincronizar por delta);
+    sem ele vêm os mais novos, e ?antes=<cursor> pagina para trás. 'cursor' e 'anterior' na
+    resposta são os limites da página."""
+    feed = feed_da_requisicao()
+    if feed is None:
+        return feed_desconhecido()
+    if feed.leitor_historico is None:
+        return jsonify({"status": "histórico desativado (DB_PATH vazio)"}), 404
+    try:
+        desde = parametro_inteiro('since')
+        antes = parametro_inteiro('antes')
+        limite = max(1, min(parametro_inteiro('limite', 100), 500))
+    except ValueError:
+        return jsonify({"status": "erro", "erro": "since, antes e limite devem ser inteiros"}), 400
+    try:
+        registro_perfis.sincronizar()
+        chave, _ = registro_perfis.do_usuario(auth.current_user())
+        linhas = feed.leitor_historico.pagina(chave, desde, antes, limite + 1)
+    except sqlite3.Error as e:
+        print(f"[ERRO HISTORICO] {e}")
+        return jsonify({"status": "histórico indisponível"}), 503
+
+    mais = len(linhas) > limite
+    linhas = linhas[:limite]
+    seqs = [seq for seq, _ in linhas]
+    cursor = max(seqs) if seqs else desde
+    anterior = min(seqs) if seqs else antes
+    # Os sinais já estão em JSON compacto no banco: só são emendados na resposta
+    corpo = (f'{{"status":"ok","cursor":{app.json.dumps(cursor)},"anterior":{app.json.dumps(anterior)},'
+             f'"mais":{app.json.dumps(mais)},"sinais":[' + ','.join(dados for _, dados in linhas) + ']}').encode('utf-8')
+    # Página montada na hora: só vale comprimir se o cliente aceita (e se for grande, ver comprimir)
+    versoes = comprimir(corpo) if request.accept_encodings else {}
+    return responder_comprimido(corpo, "application/json", versoes)
+
+@app.route("/perfil", methods=["GET", "PUT", "DELETE"])
+@auth.login_required
+def perfil():
+    """Perfil do usuário: estratégias ativas e limiares de confluência (PUT grava, DELETE volta ao padrão)"""
+    usuario = auth.current_user()
+    try:
+        if request.method == "PUT":
+            try:
+                novo = normalizar_perfil(request.get_json(silent=True))
+            except ValueError as e:
+                return jsonify({"status": "erro", "erro": str(e)}), 400
+            registro_perfis.salvar(usuario, novo)
+        elif request.method == "DELETE":
+            registro_perfis.salvar(usuario, None)
+        else:
+            registro_perfis.sincronizar()
+    except sqlite3.Error as e:
+        print(f"[ERRO PERFIS] {e}")
+        return jsonify({"status": "erro", "erro": "perfis indisponíveis"}), 503
+
+    chave, atual = registro_perfis.do_usuario(usuario)
+    return jsonify({"status": "ok", "perfil": chave or "padrao", **atual,
+                    "disponiveis": [estrategia.nome for estrategia in ESTRATEGIAS]})
+
+@app.route("/admin/perfilador")
+@auth.login_required
+def perfilador():
+    """Perfil por amostragem da coleta/análise por alguns segundos, sem reiniciar (só administradores)
+
+    ?segundos= (até 60), ?intervalo_ms=, ?formato=json|colapsado (flamegraph) e
+    ?alvo=coletor|todas|worker (todas = todas as threads do processo coletor;
+    worker = as threads deste worker, inclusive as requisições)."""
+    if auth.current_user() not in ADMINISTRADORES:
+        return jsonify({"status": "acesso negado"}), 403
+    formato = request.args.get('formato', 'json')
+    alvo = request.args.get('alvo', 'coletor')
+    try:
+        duracao = min(max(float(request.args.get('segundos', 10)), 0.1), 60.0)
+        intervalo = min(max(float(request.args.get('intervalo_ms', 5)), 1.0), 1000.0) / 1000
+    except ValueError:
+        return jsonify({"status": "erro", "erro": "segundos e intervalo_ms devem ser números"}), 400
+    if formato not in FORMATOS or alvo not in ('coletor', 'todas', 'worker'):
+        return jsonify({"status": "erro", "erro": "formato: json|colapsado; alvo: coletor|todas|worker"}), 400
+
+    parametros = {'duracao': duracao, 'intervalo': intervalo, 'todas_threads': alvo != 'coletor',
+                  'formato': formato}
+    if CANAL_COLETOR and alvo != 'worker':
+        try:
+            corpo = perfilar_no_coletor(parametros)
+        except (OSError, sqlite3.Error) as e:
+            print(f"[ERRO PERFILADOR] {e}")
+            corpo = None
+        if corpo is None:
+            return jsonify({"status": "coletor não respondeu"}), 504
+    else:
+        if not trava_perfilador.acquire(blocking=False):
+            return jsonify({"status": "já existe um perfil em andamento"}), 409
+        try:
+            corpo = perfilar(**parametros)
+        finally:
+            trava_perfilador.release()
+    return app.response_class(corpo, content_type=FORMATOS[formato])
+
+@app.route("/metrics")
+@auth.login_required
+def metrics():
+    """Métricas no formato texto do Prometheus (coleta + este worker)"""
+    if CANAL_COLETOR:
+        snapshot = publicador_metricas.atual()
+        coleta = snapshot.corpo.decode('utf-8') if snapshot else ''
+    else:
+        coleta = metricas_coleta.renderizar()
+    return app.response_class(coleta + metricas_web.renderizar(),
+                              content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.route("/stream")
+@auth.login_required
+def stream():
+    """Canal Server-Sent Events: snapshot, rodadas, sinais e resultados assim que acontecem"""
+    feed = feed_da_requisicao()
+    if feed is None:
+        return feed_desconhecido()
+    saida = saida_do_usuario(feed)
+    fila = saida.canal_eventos.assinar()
+
+    def gerar():
+        try:
+            snapshot = saida.publicador.atual()
+            if snapshot is not None:
+                yield b"event: snapshot\ndata: " + snapshot.corpo + b"\n\n"
+            while True:
+                try:
+                    yield fila.get(timeout=15)
+                except queue.Empty:
+                    yield b": ping\n\n"  # Mantém a conexão viva em proxies
+        finally:
+            saida.canal_eventos.cancelar(fila)
+
+    return app.response_class(gerar(), mimetype="text/event-stream",
+                              headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 # ----------------------------------------
 # Execução
 # ----------------------------------------
 if __name__ == "__main__":
+    if "--coletor" in sys.argv:
+        # Iniciado pelo gunicorn.conf.py: python app1zero14x.py --coletor
+        executar_coletor(CANAL_COLETOR or "canal_coletor.db")
+        sys.exit(0)
+
     porta = int(os.environ.get("PORT", 10000))
     print(f"🚀 Servidor 1ZERO14X ativo na porta {porta}")
     app.run(host="0.0.0.0", port=porta)
@@ -0,0 +1,257 @@
+# ===============================================
+# 1ZERO14X - Avaliador vetorizado (NumPy) por estratégia
+# ===============================================
+# Guarda o histórico de rodadas em colunas (epoch, pedra, cor) e calcula, para
+# cada estratégia do catálogo de GerenciadorSinais, os minutos alvo e se saiu
+# branco na janela de ±1 minuto, tudo com operações vetorizadas.
+#
+# Cada estratégia é avaliada isoladamente (como se fosse sinal direto), sem
+# confluência. Os alvos seguem o "agora" de cada rodada (created_at + atraso de
+# detecção), como no replay do backtest.py.
+#
+# Uso:
+#   python avaliador_vetorizado.py historico.jsonl [--salvar historico.npz]
+#   python avaliador_vetorizado.py historico.npz
+import argparse
+
+import numpy as np
+
+from app1zero14x import CODIGO_COR, COR_DESCONHECIDA, FUSO_BRASIL, SEQUENCIA_SEQ30, GerenciadorSinais
+
+BRANCO = CODIGO_COR['branco']
+
+DESLOCAMENTO_FUSO = int(FUSO_BRASIL.utcoffset(None).total_seconds())
+
+class HistoricoColunar:
+    """Histórico de rodadas em arrays NumPy (uma posição por rodada, ordem cronológica)"""
+    def __init__(self, epoch, numero, cor):
+        self.epoch = np.asarray(epoch, dtype=np.int64)  # created_at em segundos (UTC)
+        self.numero = np.asarray(numero, dtype=np.uint8)
+        self.cor = np.asarray(cor, dtype=np.uint8)
+
+        local = self.epoch + DESLOCAMENTO_FUSO
+        self.minuto_epoch = self.epoch // 60
+        self.minuto = (local // 60 % 60).astype(np.int64)
+        self.hora = (local // 3600 % 24).astype(np.int64)
+
+    def __len__(self):
+        return len(self.epoch)
+
+    @classmethod
+    def de_rodadas(cls, rodadas):
+        """Monta o histórico a partir de [(cor, numero, horario_real)] já ordenadas"""
+        epoch = [int(horario.timestamp()) for _, _, horario in rodadas]
+        numero = [numero for _, numero, _ in rodadas]
+        cor = [CODIGO_COR.get(cor, COR_DESCONHECIDA) for cor, _, _ in rodadas]
+        return cls(epoch, numero, cor)
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Carrega um histórico salvo com salvar() (.npz)"""
+        with np.load(caminho) as dados:
+            return cls(dados['epoch'], dados['numero'], dados['cor'])
+
+    def salvar(self, caminho):
+        """Salva as colunas em .npz para reavaliações rápidas"""
+        np.savez_compressed(caminho, epoch=self.epoch, numero=self.numero, cor=self.cor)
+
+# === Aritmética de minutos (equivalente à do AnalisadorEstrategiaHorarios) ===
+
+def normalizar_minuto(valor):
+    """Traz a soma para 1..60; 0 vira 0 (sem sinal), como calcular_minuto_destino"""
+    valor = np.asarray(valor, dtype=np.int64)
+    return np.where(valor == 0, 0, (valor - 1) % 60 + 1)
+
+def proximo_alvo(agora, minuto_destino):
+    """Epoch do próximo minuto_destino:30 depois de agora (como ContextoRodada.horario_alvo)"""
+    inicio_hora = agora - (agora + DESLOCAMENTO_FUSO) % 3600
+    alvo = inicio_hora + minuto_destino * 60 + 30
+    return np.where(alvo <= agora, alvo + 3600, alvo)
+
+def eventos(indices, minuto_destino, agora):
+    """Filtra minutos válidos e devolve (indice_gatilho, epoch_alvo)
+
+    O minuto 60 é descartado, como no objeto (replace(minute=60) falha)."""
+    indices = np.asarray(indices, dtype=np.int64)
+    minuto_destino = np.asarray(minuto_destino, dtype=np.int64)
+    validos = (minuto_destino >= 1) & (minuto_destino <= 59)
+    indices = indices[validos]
+    return indices, proximo_alvo(agora[indices], minuto_destino[validos])
+
+# === Gatilhos das estratégias ===
+
+def _brancos(h):
+    return np.flatnonzero(h.cor == BRANCO)
+
+def _colorida_apos_branco(h, ordem):
+    """Para cada branco, o índice da ordem-ésima pedra colorida seguinte (-1 se não houver)"""
+    brancos = _brancos(h)
+    coloridas = np.flatnonzero(h.cor != BRANCO)
+    posicao = np.searchsorted(coloridas, brancos, side='right') + (ordem - 1)
+    existe = posicao < len(coloridas)
+    proxima = np.full(len(brancos), -1, dtype=np.int64)
+    proxima[existe] = coloridas[posicao[existe]]
+    return brancos, proxima
+
+def _pares_iguais(h, sem_zero=False):
+    """Índices i em que a pedra i repete a pedra i-1 no mesmo minuto (ignorando segundos)"""
+    iguais = (h.numero[1:] == h.numero[:-1]) & (h.minuto_epoch[1:] == h.minuto_epoch[:-1])
+    if sem_zero:
+        iguais &= h.numero[1:] != 0
+    return np.flatnonzero(iguais) + 1
+
+def _sequencia_sem_branco(h):
+    """(contagem de pedras sem branco até i, índice do último branco ou -1)"""
+    indices = np.arange(len(h))
+    ultimo_branco = np.maximum.accumulate(np.where(h.cor == BRANCO, indices, -1))
+    return indices - ultimo_branco, ultimo_branco
+
+def estrategia_branco(h, agora, calculo):
+    brancos = _brancos(h)
+    return eventos(brancos, calculo(h.minuto[brancos], h.hora[brancos]), agora)
+
+def estrategia_posterior(h, agora, calculo):
+    """Estratégias 4 e 6: disparam na 2ª pedra colorida posterior ao branco"""
+    brancos, primeira = _colorida_apos_branco(h, 1)
+    _, segunda = _colorida_apos_branco(h, 2)
+    existe = segunda >= 0
+    brancos, primeira, segunda = brancos[existe], primeira[existe], segunda[existe]
+    pedra_1 = h.numero[primeira].astype(np.int64)
+    pedra_2 = h.numero[segunda].astype(np.int64)
+    return eventos(segunda, calculo(pedra_1, pedra_2, h.minuto[brancos]), agora)
+
+def estrategia_pedra_posterior(h, agora):
+    """Estratégia 2: dispara na 1ª pedra colorida posterior ao branco"""
+    brancos, primeira = _colorida_apos_branco(h, 1)
+    existe = primeira >= 0
+    brancos, primeira = brancos[existe], primeira[existe]
+    return eventos(primeira, normalizar_minuto(h.numero[primeira] + h.minuto[brancos]), agora)
+
+def estrategia_pedra(h, agora, pedras, minutos):
+    gatilhos = np.flatnonzero(np.isin(h.numero, pedras) & (h.cor != BRANCO))
+    return eventos(gatilhos, normalizar_minuto(h.minuto[gatilhos] + minutos), agora)
+
+def estrategia_pares_mais_1h(h, agora):
+    gatilhos = _pares_iguais(h)
+    alvo = h.minuto_epoch[gatilhos] * 60 + 30 + 3600
+    alvo = np.where(alvo <= agora[gatilhos], alvo + 86400, alvo)
+    return gatilhos, alvo
+
+def estrategia_pares(h, agora, minutos):
+    gatilhos = _pares_iguais(h)
+    return eventos(gatilhos, normalizar_minuto(h.minuto[gatilhos] + minutos), agora)
+
+def estrategia_gemeas(h, agora):
+    gatilhos = _pares_iguais(h, sem_zero=True)
+    return eventos(gatilhos, normalizar_minuto(h.minuto[gatilhos] + h.numero[gatilhos] + 10), agora)
+
+def estrategia_seq30(h, agora, passo):
+    """Seq30: a cada 30 pedras sem branco (após o primeiro branco), a partir do último branco"""
+    contagem, ultimo_branco = _sequencia_sem_branco(h)
+    gatilhos = np.flatnonzero((ultimo_branco >= 0) & (contagem > 0) & (contagem % 30 == 0))
+    soma = sum(SEQUENCIA_SEQ30[:passo])
+    return eventos(gatilhos, normalizar_minuto(h.minuto[ultimo_branco[gatilhos]] + soma), agora)
+
+def estrategia_sem_branco(h, agora, quantidade):
+    """50/60/80 sem branco: só alcançáveis antes do primeiro branco (a Seq30 zera a contagem)"""
+    contagem, ultimo_branco = _sequencia_sem_branco(h)
+    gatilhos = np.flatnonzero((ultimo_branco < 0) & (contagem == quantidade))
+    return eventos(gatilhos, normalizar_minuto(h.minuto[gatilhos] + 4), agora)
+
+def _minuto_invertido(minuto, hora):
+    return normalizar_minuto((minuto % 10) * 10 + minuto // 10 + hora + minuto)
+
+ESTRATEGIAS_VETORIZADAS = {
+    "2. Pedra posterior + minuto": estrategia_pedra_posterior,
+    "4. 2 pedras posteriores + minuto": lambda h, a: estrategia_posterior(
+        h, a, lambda pedra_1, pedra_2, minuto: normalizar_minuto(pedra_1 + pedra_2 + minuto)),
+    "6. 2ª pedra posterior + minuto": lambda h, a: estrategia_posterior(
+        h, a, lambda pedra_1, pedra_2, minuto: normalizar_minuto(pedra_2 + minuto)),
+    "8. Minuto invertido + hora": lambda h, a: estrategia_branco(h, a, _minuto_invertido),
+    "9. Branco + 5min": lambda h, a: estrategia_branco(
+        h, a, lambda minuto, hora: normalizar_minuto(minuto + 5)),
+    "10. Branco + 10min": lambda h, a: estrategia_branco(
+        h, a, lambda minuto, hora: normalizar_minuto(minuto + 10)),
+    "11. Pedra 4 + 4min": lambda h, a: estrategia_pedra(h, a, [4], 4),
+    "12. Pedra 14 + 5min": lambda h, a: estrategia_pedra(h, a, [14], 5),
+    "13. Pedra 11 + 3min": lambda h, a: estrategia_pedra(h, a, [11], 3),
+    "14. 2 pedras iguais +1h": estrategia_pares_mais_1h,
+    "16. Soma 15/21 +10min": lambda h, a: estrategia_pedra(h, a, [15, 21], 10),
+    "19. Branco + Minuto Duplo": lambda h, a: estrategia_branco(
+        h, a, lambda minuto, hora: normalizar_minuto(minuto * 2)),
+    "20. 2 pedras iguais +14min": lambda h, a: estrategia_pares(h, a, 14),
+    "22. Dobra de Branco": lambda h, a: estrategia_branco(
+        h, a, lambda minuto, hora: normalizar_minuto(minuto * 2)),
+    "23. Gêmeas": estrategia_gemeas,
+    "24. 50 sem Branco +4min": lambda h, a: estrategia_sem_branco(h, a, 50),
+    "25. 60 sem Branco +4min": lambda h, a: estrategia_sem_branco(h, a, 60),
+    "26. 80 sem Branco +4min": lambda h, a: estrategia_sem_branco(h, a, 80),
+}
+for _passo, _soma in enumerate(SEQUENCIA_SEQ30, start=1):
+    ESTRATEGIAS_VETORIZADAS[f"21. Seq30 [{_passo}] +{_soma}min"] = (
+        lambda h, a, passo=_passo: estrategia_seq30(h, a, passo))
+
+# === Pontuação ===
+
+def pontuar(h, gatilhos, alvos, agora):
+    """Retorna (sinais, acertos) para os eventos de uma estratégia
+
+    Um alvo por minuto (repetições do mesmo minuto contam uma vez) e só janelas já
+    encerradas dentro do histórico. WIN = branco com minuto em [alvo-1, alvo+1]
+    processado a partir da rodada que gerou o sinal."""
+    if len(gatilhos) == 0:
+        return 0, 0
+
+    minuto_alvo = alvos // 60
+    minuto_alvo, primeiro = np.unique(minuto_alvo, return_index=True)
+    gatilhos = gatilhos[primeiro]
+
+    encerrados = (minuto_alvo * 60 + 90) < agora[-1]
+    minuto_alvo, gatilhos = minuto_alvo[encerrados], gatilhos[encerrados]
+
+    brancos = _brancos(h)
+    minuto_brancos = h.minuto_epoch[brancos]
+    inicio = np.maximum(np.searchsorted(minuto_brancos, minuto_alvo - 1, side='left'),
+                        np.searchsorted(brancos, gatilhos, side='left'))
+    fim = np.searchsorted(minuto_brancos, minuto_alvo + 1, side='right')
+    return len(minuto_alvo), int(np.count_nonzero(fim > inicio))
+
+def avaliar(h, atraso_deteccao=1, estrategias=None):
+    """Assertividade de cada estratégia do catálogo: {nome: {'sinais', 'acertos', 'assertividade'}}"""
+    if estrategias is None:
+        estrategias = list(GerenciadorSinais().criar_estrategias_padrao())
+
+    agora = h.epoch + atraso_deteccao
+    resultado = {}
+    for nome in estrategias:
+        gatilhos, alvos = ESTRATEGIAS_VETORIZADAS[nome](h, agora)
+        sinais, acertos = pontuar(h, gatilhos, alvos, agora)
+        resultado[nome] = {
+            'sinais': sinais,
+            'acertos': acertos,
+            'assertividade': (acertos / sinais * 100) if sinais else 0,
+        }
+    return resultado
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assertividade vetorizada por estratégia")
+    parser.add_argument('historico', help="Histórico .csv/.jsonl (formato da API) ou .npz")
+    parser.add_argument('--salvar', help="Salva as colunas em .npz para as próximas execuções")
+    parser.add_argument('--atraso', type=int, default=1,
+                        help="Segundos entre o created_at e a detecção simulada")
+    args = parser.parse_args(argv)
+
+    if args.historico.endswith('.npz'):
+        historico = HistoricoColunar.carregar(args.historico)
+    else:
+        from backtest import carregar_rodadas, ler_historico
+        historico = HistoricoColunar.de_rodadas(carregar_rodadas(ler_historico(args.historico)))
+    if args.salvar:
+        historico.salvar(args.salvar)
+
+    print(f"Rodadas: {len(historico)}")
+    for nome, stats in avaliar(historico, args.atraso).items():
+        print(f"  {nome}: {stats['acertos']}/{stats['sinais']} ({stats['assertividade']:.1f}%)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# ===============================================
+# 1ZERO14X - Replay / Backtest offline
+# ===============================================
+# Reproduz um histórico gravado de rodadas (CSV ou JSONL com os campos da API:
+# id, color, roll, created_at, ou a gravação bruta do feed em GRAVACAO_DIR) no AnalisadorEstrategiaHorarios usando um relógio
+# simulado, e gera o resultado (WIN/LOSS) de cada sinal.
+#
+# Uso:
+#   python backtest.py historico.jsonl --saida sinais.csv
+#   python backtest.py gravacao/ --feed principal
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import timedelta
+
+from app1zero14x import AnalisadorEstrategiaHorarios, converter_rodada
+from gravador import feeds_gravados, ler_gravacao, ler_segmento
+
+CAMPOS_SAIDA = ['minuto_alvo', 'nivel_confluencia', 'confluencias', 'estrategias',
+                'resultado', 'horario_resultado', 'sinal_direto']
+
+class RelogioSimulado:
+    """Relógio controlado pelo replay (substitui agora_brasil)"""
+    def __init__(self, inicio=None):
+        self.agora = inicio
+
+    def __call__(self):
+        return self.agora
+
+    def avancar_para(self, horario):
+        """Avança o relógio (nunca volta no tempo)"""
+        if self.agora is None or horario > self.agora:
+            self.agora = horario
+
+def ler_historico(caminho, feed=None):
+    """Lê as rodadas brutas de um arquivo CSV, JSONL, segmento .jsonl.gz ou diretório de gravação"""
+    if os.path.isdir(caminho):
+        yield from ler_gravacao(caminho, feed)
+        return
+    if caminho.endswith('.gz'):
+        yield from ler_segmento(caminho)
+        return
+    with open(caminho, encoding='utf-8', newline='') as arquivo:
+        if caminho.endswith('.csv'):
+            for linha in csv.DictReader(arquivo):
+                linha['roll'] = int(linha['roll'])
+                yield linha
+        else:
+            for linha in arquivo:
+                if linha.strip():
+                    yield json.loads(linha)
+
+def carregar_rodadas(rodadas_brutas):
+    """Converte, deduplica por ID e ordena as rodadas: [(cor, numero, horario_real)]"""
+    ids_vistos = set()
+    rodadas = []
+    for rodada in rodadas_brutas:
+        rodada_id = rodada.get('id')
+        if rodada_id:
+            if rodada_id in ids_vistos:
+                continue
+            ids_vistos.add(rodada_id)
+
+        cor, numero, horario_real = converter_rodada(rodada)
+        if cor and numero is not None and horario_real:
+            rodadas.append((cor, numero, horario_real))
+
+    rodadas.sort(key=lambda r: r[2])
+    return rodadas
+
+def executar_replay(rodadas, atraso_deteccao=timedelta(seconds=1), analisador=None):
+    """Executa o analisador sobre as rodadas e retorna (analisador, sinais_finalizados)"""
+    relogio = RelogioSimulado()
+    if analisador is None:
+        analisador = AnalisadorEstrategiaHorarios(relogio=relogio)
+    else:
+        analisador.relogio = analisador.gerenciador.relogio = relogio
+
+    finalizados = []
+    analisador.gerenciador.ouvintes.append(
+        lambda evento, sinal: finalizados.append(sinal) if evento == 'finalizado' else None)
+
+    for cor, numero, horario_real in rodadas:
+        # A rodada é "detectada" um pouco depois do created_at, como na coleta real
+        relogio.avancar_para(horario_real + atraso_deteccao)
+        analisador.adicionar_rodada(cor, numero, horario_real)
+        analisador.gerenciador.limpar_dados_antigos()
+
+    return analisador, finalizados
+
+def linha_resultado(sinal):
+    """Achata um sinal finalizado para a saída CSV/JSONL"""
+    return {
+        'minuto_alvo': sinal['minuto_alvo'].isoformat(),
+        'nivel_confluencia': sinal['nivel_confluencia'],
+        'confluencias': sinal['confluencias'],
+        'estrategias': '|'.join(sinal['estrategias']),
+        'resultado': sinal['resultado'],
+        'horario_resultado': sinal['horario_resultado'].isoformat(),
+        'sinal_direto': sinal['sinal_direto'],
+    }
+
+def gravar_resultados(finalizados, saida):
+    """Grava um sinal por linha (JSONL se o destino terminar em .jsonl, senão CSV)"""
+    linhas = [linha_resultado(sinal) for sinal in finalizados]
+    if getattr(saida, 'name', '').endswith('.jsonl'):
+        for linha in linhas:
+            saida.write(json.dumps(linha, ensure_ascii=False) + '\n')
+    else:
+        escritor = csv.DictWriter(saida, fieldnames=CAMPOS_SAIDA)
+        escritor.writeheader()
+        escritor.writerows(linhas)
+
+def resumo(analisador, finalizados):
+    """Texto com o placar geral e a assertividade por estratégia"""
+    wins = sum(1 for s in finalizados if s['resultado'] == 'WIN')
+    total = len(finalizados)
+    perc = (wins / total * 100) if total else 0
+    linhas = [f"Sinais: {total} | WIN: {wins} | LOSS: {total - wins} | Assertividade: {perc:.1f}%"]
+
+    estatisticas = analisador.gerenciador.estatisticas
+    for nome in sorted(estatisticas.get_todas_estatisticas()):
+        stats = estatisticas.estatisticas[nome]
+        linhas.append(f"  {nome}: {stats['acertos']}/{stats['sinais']} "
+                      f"({estatisticas.get_assertividade(nome):.1f}%)")
+    return '\n'.join(linhas)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay/backtest offline do 1ZERO14X")
+    parser.add_argument('historico', help="Arquivo .csv, .jsonl ou .jsonl.gz, ou diretório da gravação bruta")
+    parser.add_argument('--feed', help="Feed a ler do diretório de gravação (obrigatório se houver mais de um)")
+    parser.add_argument('--saida', help="Arquivo de saída (.csv ou .jsonl); padrão: stdout em CSV")
+    parser.add_argument('--atraso', type=float, default=1.0,
+                        help="Segundos entre o created_at e a detecção simulada")
+    args = parser.parse_args(argv)
+    if os.path.isdir(args.historico) and not args.feed:
+        feeds = feeds_gravados(args.historico)
+        if len(feeds) > 1:
+            parser.error(f"o diretório tem gravações de {len(feeds)} feeds ({', '.join(feeds)}): escolha um com --feed")
+
+    rodadas = carregar_rodadas(ler_historico(args.historico, args.feed))
+    analisador, finalizados = executar_replay(rodadas, timedelta(seconds=args.atraso))
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8', newline='') as saida:
+            gravar_resultados(finalizados, saida)
+    else:
+        gravar_resultados(finalizados, sys.stdout)
+
+    print(resumo(analisador, finalizados), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# ===============================================
+# 1ZERO14X - Benchmarks dos caminhos quentes
+# ===============================================
+# Mede o analisador e o gerenciador de sinais sobre rodadas sintéticas (semente fixa)
+# e grava o resultado em JSON para comparar entre commits.
+#
+# Uso:
+#   python benchmark.py --saida bench.json
+#   python benchmark.py --comparar bench.json      # mostra a variação contra um resultado anterior
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+from app1zero14x import (AnalisadorEstrategiaHorarios, GerenciadorSinais, app, montar_payload_data,
+                         montar_payload_estatisticas)
+from backtest import RelogioSimulado, executar_replay
+from simulacao import GeradorRodadas
+
+ATRASO_DETECCAO = timedelta(seconds=1)
+
+def resumir_tempos(tempos_ns):
+    """Estatísticas de uma lista de durações em nanossegundos"""
+    tempos = sorted(tempos_ns)
+    total = sum(tempos)
+    quantidade = len(tempos)
+    return {
+        'n': quantidade,
+        'media_us': round(total / quantidade / 1000, 3),
+        'mediana_us': round(tempos[quantidade // 2] / 1000, 3),
+        'p99_us': round(tempos[min(quantidade - 1, int(quantidade * 0.99))] / 1000, 3),
+        'ops_por_s': round(quantidade / (total / 1e9), 1) if total else None,
+    }
+
+def medir(funcao, repeticoes):
+    """Executa a função várias vezes medindo cada chamada"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter_ns()
+        funcao()
+        tempos.append(time.perf_counter_ns() - inicio)
+    return resumir_tempos(tempos)
+
+# === Benchmarks ===
+
+def bench_adicionar_rodada(rodadas):
+    """Vazão de adicionar_rodada sobre toda a sequência sintética"""
+    relogio = RelogioSimulado()
+    analisador = AnalisadorEstrategiaHorarios(relogio=relogio)
+    tempos = []
+    for cor, numero, horario in rodadas:
+        relogio.avancar_para(horario + ATRASO_DETECCAO)
+        inicio = time.perf_counter_ns()
+        analisador.adicionar_rodada(cor, numero, horario)
+        tempos.append(time.perf_counter_ns() - inicio)
+    return resumir_tempos(tempos)
+
+def gerenciador_carregado(pendentes, agora):
+    """Gerenciador com 'pendentes' estratégias aguardando e um sinal direto ativo por minuto alvo"""
+    gerenciador = GerenciadorSinais(relogio=lambda: agora)
+    base = agora.replace(second=30, microsecond=0)
+    for i in range(pendentes):
+        horario = base + timedelta(minutes=2 + i % 600)
+        gerenciador.indexar_estrategia({
+            'estrategia': f"bench {i % 25}", 'horario_previsto': horario, 'minuto_destino': horario.minute,
+            'horario_base': agora, 'timestamp_adicao': agora, 'status': 'pendente',
+            'janela_fim': horario + timedelta(minutes=1),
+        })
+        if i < 600:
+            gerenciador.adicionar_sinal_direto(f"bench {i % 25}", horario, horario.minute, agora, agora)
+    return gerenciador
+
+def bench_gerenciador(pendentes, agora, repeticoes):
+    """processar_resultado, adicionar_estrategia e limpar_dados_antigos com muitos pendentes"""
+    resultados = {}
+    gerenciador = gerenciador_carregado(pendentes, agora)
+    base = agora.replace(second=30, microsecond=0)
+    minutos = itertools.cycle(range(2, 602))
+
+    # Pedra colorida: nada vence nem acerta (caminho de toda rodada)
+    resultados[f'processar_resultado_colorida_{pendentes}'] = medir(
+        lambda: gerenciador.processar_resultado(agora, 'vermelho', agora), repeticoes)
+
+    # Nova estratégia num dos minutos já carregados (confluência com o grupo existente)
+    def adicionar():
+        alvo = base + timedelta(minutes=next(minutos))
+        gerenciador.adicionar_estrategia("bench extra", alvo, alvo.minute, agora, agora)
+    resultados[f'adicionar_estrategia_{pendentes}'] = medir(adicionar, repeticoes)
+
+    # Limpeza sem nada vencido: deve ser só a espiada no topo dos heaps
+    resultados[f'limpar_sem_vencidos_{pendentes}'] = medir(
+        lambda: gerenciador.limpar_dados_antigos(agora), repeticoes)
+
+    # Limpeza com tudo vencido (custo total de drenar os heaps)
+    tempos = []
+    for _ in range(max(1, repeticoes // 100)):
+        cheio = gerenciador_carregado(pendentes, agora)
+        inicio = time.perf_counter_ns()
+        cheio.limpar_dados_antigos(agora + timedelta(days=1))
+        tempos.append(time.perf_counter_ns() - inicio)
+    resultados[f'limpar_tudo_vencido_{pendentes}'] = resumir_tempos(tempos)
+    return resultados
+
+def bench_serializacao(analisador, repeticoes):
+    """Montagem + JSON do /data e do /estatisticas (o que publicar_estado faz a cada lote com rodada nova)
+
+    Não inclui o estado durável do analisador: esse é exportado no máximo a cada ESTADO_INTERVALO."""
+    def serializar(montar):
+        return lambda: app.json.dumps(montar(analisador), separators=(",", ":")).encode('utf-8')
+
+    corpo = serializar(montar_payload_data)()
+    return {
+        'serializar_data': dict(medir(serializar(montar_payload_data), repeticoes), bytes=len(corpo)),
+        'serializar_estatisticas': medir(serializar(montar_payload_estatisticas), repeticoes),
+    }
+
+def versao_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def executar(quantidade, semente, repeticoes):
+    """Roda todos os benchmarks e retorna o documento de resultados"""
+    rodadas = GeradorRodadas(semente).rodadas(quantidade)
+    resultados = {'adicionar_rodada': bench_adicionar_rodada(rodadas)}
+
+    agora = rodadas[-1][2] + ATRASO_DETECCAO
+    for pendentes in (100, 1000, 5000):
+        resultados.update(bench_gerenciador(pendentes, agora, repeticoes))
+
+    analisador, _ = executar_replay(rodadas, ATRASO_DETECCAO)
+    resultados.update(bench_serializacao(analisador, repeticoes))
+
+    return {
+        'commit': versao_codigo(),
+        'python': platform.python_version(),
+        'rodadas': quantidade,
+        'semente': semente,
+        'resultados': resultados,
+    }
+
+def comparar(atual, anterior):
+    """Texto com a variação da mediana de cada benchmark contra um resultado anterior"""
+    linhas = [f"{'benchmark':40} {'antes (us)':>12} {'agora (us)':>12} {'variação':>9}"]
+    for nome, medida in atual['resultados'].items():
+        antes = anterior.get('resultados', {}).get(nome)
+        if not antes:
+            linhas.append(f"{nome:40} {'-':>12} {medida['mediana_us']:>12.3f} {'novo':>9}")
+            continue
+        variacao = (medida['mediana_us'] / antes['mediana_us'] - 1) * 100 if antes['mediana_us'] else 0
+        linhas.append(f"{nome:40} {antes['mediana_us']:>12.3f} {medida['mediana_us']:>12.3f} {variacao:>+8.1f}%")
+    return '\n'.join(linhas)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do analisador e do gerenciador de sinais")
+    parser.add_argument('--rodadas', type=int, default=20000)
+    parser.add_argument('--semente', type=int, default=1)
+    parser.add_argument('--repeticoes', type=int, default=2000)
+    parser.add_argument('--saida', help="Grava o JSON dos resultados neste arquivo (padrão: stdout)")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args(argv)
+
+    documento = executar(args.rodadas, args.semente, args.repeticoes)
+    texto = json.dumps(documento, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as saida:
+            saida.write(texto + '\n')
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            print(comparar(documento, json.load(arquivo)), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
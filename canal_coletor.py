@@ -0,0 +1,106 @@
+# ===============================================
+# 1ZERO14X - Canal local entre o processo coletor e os workers web
+# ===============================================
+# O processo coletor é o único escritor: grava os documentos já serializados (o
+# snapshot do /data, as estatísticas...) e os eventos do /stream num SQLite em modo WAL. Os workers do gunicorn só leem (leitores não
+# bloqueiam o escritor no WAL) e repassam tudo para a memória local. A exceção são
+# os pedidos raros dos workers ao coletor (ex.: um perfil do /admin/perfilador).
+import sqlite3
+import threading
+
+class CanalSQLite:
+    """Documentos + log de eventos do coletor, compartilhados pelos processos via SQLite (WAL)"""
+    def __init__(self, caminho, eventos_mantidos=5000):
+        self.caminho = caminho
+        self.eventos_mantidos = eventos_mantidos
+        self.local = threading.local()  # Uma conexão por thread
+        self.eventos_pendentes = []  # Gravados junto com o próximo documento (uma transação)
+
+    def conexao(self):
+        conexao = getattr(self.local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self.local.conexao = conexao
+        return conexao
+
+    def criar_tabelas(self):
+        """Cria as tabelas do canal (lado do coletor)"""
+        conexao = self.conexao()
+        conexao.execute("""CREATE TABLE IF NOT EXISTS documentos (
+            nome TEXT PRIMARY KEY, versao INTEGER, etag TEXT, corpo BLOB)""")
+        conexao.execute("""CREATE TABLE IF NOT EXISTS eventos (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT, evento TEXT, dados TEXT, feed TEXT)""")
+        if 'feed' not in {coluna[1] for coluna in conexao.execute("PRAGMA table_info(eventos)")}:
+            conexao.execute("ALTER TABLE eventos ADD COLUMN feed TEXT")  # Canal de versão anterior
+        conexao.execute("""CREATE TABLE IF NOT EXISTS pedidos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, parametros TEXT)""")
+
+    # === Lado do coletor (escritor) ===
+
+    def publicar_evento(self, evento, dados, feed=None):
+        """Enfileira um evento (dados = JSON em texto) do feed para a próxima gravação"""
+        self.eventos_pendentes.append((evento, dados, feed))
+
+    def publicar_snapshot(self, versao, etag, corpo, nome='data'):
+        """Grava os eventos pendentes e a nova versão do documento numa única transação"""
+        conexao = self.conexao()
+        eventos, self.eventos_pendentes = self.eventos_pendentes, []
+        conexao.execute("BEGIN")
+        try:
+            conexao.executemany("INSERT INTO eventos (evento, dados, feed) VALUES (?, ?, ?)", eventos)
+            conexao.execute("INSERT OR REPLACE INTO documentos (nome, versao, etag, corpo) VALUES (?, ?, ?, ?)",
+                            (nome, versao, etag, corpo))
+            if eventos:
+                ultimo = conexao.execute("SELECT max(seq) FROM eventos").fetchone()[0]
+                conexao.execute("DELETE FROM eventos WHERE seq <= ?", (ultimo - self.eventos_mantidos,))
+            conexao.execute("COMMIT")
+        except sqlite3.Error:
+            conexao.execute("ROLLBACK")
+            raise
+
+    def gravar_documento(self, nome, corpo):
+        """Grava um documento avulso (sem versão nem eventos), de qualquer thread do coletor"""
+        self.conexao().execute("INSERT OR REPLACE INTO documentos (nome, versao, etag, corpo) VALUES (?, 1, NULL, ?)",
+                               (nome, corpo))
+
+    def pedidos_desde(self, pedido_id):
+        """Pedidos dos workers com id maior que o informado: [(id, parametros)]"""
+        return self.conexao().execute("SELECT id, parametros FROM pedidos WHERE id > ? ORDER BY id",
+                                      (pedido_id,)).fetchall()
+
+    # === Lado dos workers web (leitores) ===
+
+    def ler_snapshot(self, versao_atual=None, nome='data'):
+        """Retorna (versao, etag, corpo) se houver versão diferente da atual, senão None"""
+        try:
+            linha = self.conexao().execute(
+                "SELECT versao, etag, corpo FROM documentos WHERE nome = ? AND versao IS NOT ?",
+                (nome, versao_atual)).fetchone()
+        except sqlite3.OperationalError:
+            return None  # Coletor ainda não criou as tabelas
+        return (linha[0], linha[1], bytes(linha[2])) if linha else None
+
+    def ultimo_evento(self):
+        """Seq do evento mais recente (os workers começam a acompanhar a partir dele)"""
+        try:
+            return self.conexao().execute("SELECT coalesce(max(seq), 0) FROM eventos").fetchone()[0]
+        except sqlite3.OperationalError:
+            return 0
+
+    def eventos_desde(self, seq, limite=500):
+        """Eventos com seq maior que o informado: [(seq, feed, evento, dados)]"""
+        try:
+            return self.conexao().execute(
+                "SELECT seq, feed, evento, dados FROM eventos WHERE seq > ? ORDER BY seq LIMIT ?",
+                (seq, limite)).fetchall()
+        except sqlite3.OperationalError:
+            return []
+
+    def criar_pedido(self, parametros):
+        """Registra um pedido ao coletor (parametros = JSON em texto) e retorna o id"""
+        return self.conexao().execute("INSERT INTO pedidos (parametros) VALUES (?)", (parametros,)).lastrowid
+
+    def remover_documento(self, nome):
+        self.conexao().execute("DELETE FROM documentos WHERE nome = ?", (nome,))
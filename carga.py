@@ -0,0 +1,344 @@
+# ===============================================
+# 1ZERO14X - Teste de carga ponta a ponta
+# ===============================================
+# Sobe um servidor local que imita o roulette_games/recent da Blaze (rodadas do
+# GeradorRodadas liberadas num relógio acelerado), inicia o app real no gunicorn
+# (gunicorn.conf.py, com o coletor dedicado) apontando para ele via API_URL e simula
+# N clientes autenticados do painel consultando o /data no ritmo do front.
+#
+# Cada estágio reporta latência (p50/p99), vazão, erros e dois atrasos:
+#   coleta  = rodada criada → primeira consulta do coletor que a viu
+#   entrega = rodada criada → cliente viu a rodada no /data
+#
+# Uso:
+#   python carga.py --usuarios 20,50,100,200 --duracao 60
+#   python carga.py --url http://localhost:10000 --api-porta 18770   # app já rodando com
+#       API_URL=http://127.0.0.1:18770/api/singleplayer-originals/originals/roulette_games/recent/1
+import argparse
+import json
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from app1zero14x import FUSO_BRASIL, USUARIOS_VALIDOS
+from simulacao import GeradorRodadas
+
+CAMINHO_API = '/api/singleplayer-originals/originals/roulette_games/recent/1'
+PASTA_APP = os.path.dirname(os.path.abspath(__file__))
+
+def percentil(valores, fracao):
+    """Percentil por posição numa lista já ordenada (None se vazia)"""
+    if not valores:
+        return None
+    return valores[min(len(valores) - 1, int(len(valores) * fracao))]
+
+# ----------------------------------------
+# API Blaze simulada
+# ----------------------------------------
+class BlazeSimulada:
+    """Imita o roulette_games/recent: libera uma rodada a cada periodo/aceleracao segundos reais
+
+    O created_at é o instante real da liberação (em segundos inteiros, o mesmo que o
+    painel mostra), então o atraso medido pelo app e pelos clientes é o de verdade."""
+    def __init__(self, porta=0, periodo=30.0, aceleracao=1.0, semente=0, janela=20):
+        self.periodo_real = periodo / aceleracao
+        self.gerador = GeradorRodadas(semente, periodo=periodo, jitter=0).gerar(10 ** 9)
+        self.inicio = math.ceil(time.time())
+        self.janela = deque(maxlen=janela)  # Rodadas liberadas, da mais antiga para a mais nova
+        self.liberadas = 0
+        self.criada_em = {}  # horário do painel ('HH:MM:SS' no fuso do Brasil) → epoch da criação
+        self.atrasos_coleta = []  # (epoch da criação, segundos até a primeira consulta que a viu)
+        self.consultas = 0
+        self.lock = threading.Lock()
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', porta), self.criar_handler())
+        self.servidor.daemon_threads = True
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.servidor.server_address[1]}{CAMINHO_API}"
+
+    def iniciar(self):
+        threading.Thread(target=self.servidor.serve_forever, name="blaze-simulada", daemon=True).start()
+        return self
+
+    def parar(self):
+        self.servidor.shutdown()
+
+    def liberar(self, agora):
+        """Libera as rodadas cujo horário já chegou (chamado com o lock)"""
+        while True:
+            criada = self.inicio + round(self.liberadas * self.periodo_real)
+            if criada > agora:
+                return
+            rodada = next(self.gerador)
+            rodada['id'] = f"carga{self.liberadas}"
+            rodada['created_at'] = datetime.fromtimestamp(criada, timezone.utc).isoformat().replace('+00:00', 'Z')
+            self.janela.append((rodada, criada, [False]))  # [vista pelo coletor?]
+            self.criada_em[datetime.fromtimestamp(criada, FUSO_BRASIL).strftime('%H:%M:%S')] = criada
+            self.liberadas += 1
+
+    def corpo(self):
+        """Resposta da API (mais nova primeiro), registrando o atraso de coleta das rodadas inéditas"""
+        agora = time.time()
+        with self.lock:
+            self.consultas += 1
+            self.liberar(agora)
+            for _, criada, vista in self.janela:
+                if not vista[0]:
+                    vista[0] = True
+                    self.atrasos_coleta.append((criada, agora - criada))
+            dados = [rodada for rodada, _, _ in reversed(self.janela)]
+        return json.dumps({'data': dados}).encode('utf-8')
+
+    def criar_handler(self):
+        blaze = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, como a API real
+
+            def do_GET(self):
+                corpo = blaze.corpo()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+# ----------------------------------------
+# App real (gunicorn + coletor dedicado)
+# ----------------------------------------
+def iniciar_app(porta, api_url, workers, pasta_temp, periodo_real):
+    """Sobe o gunicorn com bancos e canal temporários; a saída vai para app.log na pasta temporária"""
+    ambiente = dict(os.environ, API_URL=api_url, FEEDS='', PORT=str(porta), WEB_CONCURRENCY=str(workers),
+                    PERIODO_RODADA_MIN=str(min(5.0, periodo_real / 2)),  # Deixa o agendador aprender o relógio acelerado
+                    CANAL_COLETOR=os.path.join(pasta_temp, 'canal.db'),
+                    DB_PATH=os.path.join(pasta_temp, 'carga.db'), GRAVACAO_DIR='')
+    ambiente.pop('PERFIS_PATH', None)
+    log = open(os.path.join(pasta_temp, 'app.log'), 'wb')
+    return subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app1zero14x:app'],
+                            cwd=PASTA_APP, env=ambiente, stdout=log, stderr=subprocess.STDOUT)
+
+def parar_app(processo):
+    processo.send_signal(signal.SIGTERM)
+    try:
+        processo.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+
+def aguardar_primeira_rodada(url, credenciais, tempo_maximo):
+    """Espera o /data responder com uma rodada (app no ar e coletor publicando)"""
+    limite = time.monotonic() + tempo_maximo
+    while time.monotonic() < limite:
+        try:
+            resposta = requests.get(f"{url}/data", auth=credenciais, timeout=5)
+            if resposta.ok and resposta.json().get('ultimo_resultado'):
+                return True
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    return False
+
+def aguardar_rodadas(blaze, quantidade):
+    """Deixa passar 'quantidade' rodadas sem medir (aquecimento do agendador do app)"""
+    if quantidade <= 0:
+        return
+    print(f"⏳ Aquecendo por {quantidade} rodadas (~{quantidade * blaze.periodo_real:.0f} s)...")
+    time.sleep(quantidade * blaze.periodo_real)
+
+# ----------------------------------------
+# Clientes do painel
+# ----------------------------------------
+class MedicoesEstagio:
+    """Medições de um estágio, acumuladas por todos os clientes"""
+    def __init__(self, usuarios):
+        self.usuarios = usuarios
+        self.latencias = []
+        self.status = Counter()
+        self.atrasos_entrega = []
+        self.bytes_recebidos = 0
+        self.inicio = self.fim = None
+        self.lock = threading.Lock()
+
+    def registrar(self, latencia, status, tamanho=0, atraso_entrega=None):
+        with self.lock:
+            self.latencias.append(latencia)
+            self.status[status] += 1
+            self.bytes_recebidos += tamanho
+            if atraso_entrega is not None:
+                self.atrasos_entrega.append(atraso_entrega)
+
+    def resumo(self, blaze):
+        latencias = sorted(self.latencias)
+        entrega = sorted(self.atrasos_entrega)
+        coleta = sorted(atraso for criada, atraso in blaze.atrasos_coleta if self.inicio <= criada < self.fim)
+        duracao = self.fim - self.inicio
+        respondidas = self.status[200] + self.status[304]
+        return {
+            'usuarios': self.usuarios,
+            'requisicoes': len(latencias),
+            'req_por_s': round(respondidas / duracao, 1),
+            'erros': sum(quantidade for status, quantidade in self.status.items() if status not in (200, 304)),
+            'taxa_304': round(self.status[304] / respondidas, 3) if respondidas else None,
+            'latencia_p50_ms': arredondar_ms(percentil(latencias, 0.5)),
+            'latencia_p99_ms': arredondar_ms(percentil(latencias, 0.99)),
+            'latencia_max_ms': arredondar_ms(latencias[-1] if latencias else None),
+            'kb_por_s': round(self.bytes_recebidos / duracao / 1024, 1),
+            'coleta_p50_s': arredondar_s(percentil(coleta, 0.5)),
+            'coleta_p99_s': arredondar_s(percentil(coleta, 0.99)),
+            'entrega_p50_s': arredondar_s(percentil(entrega, 0.5)),
+            'entrega_p99_s': arredondar_s(percentil(entrega, 0.99)),
+            'status': {str(status): quantidade for status, quantidade in sorted(self.status.items(), key=str)},
+        }
+
+def arredondar_ms(segundos):
+    return None if segundos is None else round(segundos * 1000, 1)
+
+def arredondar_s(segundos):
+    return None if segundos is None else round(segundos, 2)
+
+def executar_cliente(url, credenciais, intervalo, fim, blaze, medicoes):
+    """Um painel aberto: /data a cada 'intervalo' (com If-None-Match, como o navegador), até 'fim'"""
+    session = requests.Session()
+    session.auth = credenciais
+    etag = None
+    ultimo_horario = None
+    time.sleep(random.uniform(0, intervalo))  # Clientes espalhados, não sincronizados
+    while time.time() < fim:
+        proxima = time.monotonic() + intervalo
+        cabecalhos = {'If-None-Match': etag} if etag else {}
+        inicio = time.perf_counter()
+        try:
+            resposta = session.get(f"{url}/data", headers=cabecalhos, timeout=30)
+            latencia = time.perf_counter() - inicio
+            atraso_entrega = None
+            if resposta.status_code == 200:
+                etag = resposta.headers.get('ETag')
+                horario = (resposta.json().get('ultimo_resultado') or {}).get('horario')
+                if horario != ultimo_horario:
+                    criada = blaze.criada_em.get(horario)
+                    if ultimo_horario is not None and criada is not None:
+                        atraso_entrega = time.time() - criada
+                    ultimo_horario = horario
+            medicoes.registrar(latencia, resposta.status_code, len(resposta.content), atraso_entrega)
+        except (requests.RequestException, ValueError) as e:
+            medicoes.registrar(time.perf_counter() - inicio, type(e).__name__)
+        time.sleep(max(0.0, proxima - time.monotonic()))
+
+def executar_estagio(url, usuarios, duracao, intervalo, blaze):
+    """Roda 'usuarios' clientes por 'duracao' segundos (contas do app em rodízio)"""
+    contas = sorted(USUARIOS_VALIDOS.items())
+    medicoes = MedicoesEstagio(usuarios)
+    medicoes.inicio = time.time()
+    fim = medicoes.inicio + duracao
+    threads = [threading.Thread(target=executar_cliente, daemon=True,
+                                args=(url, contas[indice % len(contas)], intervalo, fim, blaze, medicoes))
+               for indice in range(usuarios)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    medicoes.fim = time.time()
+    return medicoes.resumo(blaze)
+
+def degradado(resumo, limite_p99_ms, limite_entrega_s):
+    """Motivos pelos quais o estágio passou dos limites (lista vazia = ok)"""
+    motivos = []
+    if resumo['erros']:
+        motivos.append(f"{resumo['erros']} erros")
+    if resumo['latencia_p99_ms'] is not None and resumo['latencia_p99_ms'] > limite_p99_ms:
+        motivos.append(f"p99 {resumo['latencia_p99_ms']} ms")
+    if resumo['entrega_p99_s'] is not None and resumo['entrega_p99_s'] > limite_entrega_s:
+        motivos.append(f"entrega p99 {resumo['entrega_p99_s']} s")
+    return motivos
+
+def imprimir_estagio(resumo, motivos):
+    print(f"👥 {resumo['usuarios']:>4} usuários | {resumo['req_por_s']:>7} req/s | "
+          f"p50 {resumo['latencia_p50_ms']} ms | p99 {resumo['latencia_p99_ms']} ms | "
+          f"304 {resumo['taxa_304']} | coleta p50/p99 {resumo['coleta_p50_s']}/{resumo['coleta_p99_s']} s | "
+          f"entrega p50/p99 {resumo['entrega_p50_s']}/{resumo['entrega_p99_s']} s | "
+          + (f"❌ {', '.join(motivos)}" if motivos else "✅"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga ponta a ponta do 1ZERO14X")
+    parser.add_argument('--usuarios', default='20,50,100,200',
+                        help="Clientes simultâneos de cada estágio, separados por vírgula")
+    parser.add_argument('--duracao', type=float, default=60.0, help="Segundos de cada estágio")
+    parser.add_argument('--intervalo', type=float, default=4.0, help="Segundos entre consultas de cada cliente (front: 4)")
+    parser.add_argument('--periodo', type=float, default=30.0, help="Segundos (simulados) entre rodadas")
+    parser.add_argument('--aceleracao', type=float, default=5.0,
+                        help="Relógio acelerado: rodada a cada periodo/aceleracao segundos reais "
+                             "(com --url, suba o app com PERIODO_RODADA_MIN abaixo desse período)")
+    parser.add_argument('--aquecimento', type=int, default=20,
+                        help="Rodadas antes do primeiro estágio (o agendador do app parte de 30 s e "
+                             "converge aos poucos para o período simulado)")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=2, help="Workers do gunicorn (WEB_CONCURRENCY)")
+    parser.add_argument('--porta', type=int, default=18700, help="Porta do app iniciado pelo teste")
+    parser.add_argument('--api-porta', type=int, default=0, help="Porta da API simulada (0 = livre)")
+    parser.add_argument('--url', help="Usa um app já rodando (apontado para a API simulada) em vez de iniciar um")
+    parser.add_argument('--limite-p99-ms', type=float, default=500.0, help="Latência p99 máxima aceitável")
+    parser.add_argument('--limite-entrega', type=float,
+                        help="Atraso de entrega p99 máximo em segundos (padrão: intervalo + 3)")
+    parser.add_argument('--saida', help="Grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    estagios = [int(valor) for valor in args.usuarios.split(',') if valor.strip()]
+    limite_entrega = args.limite_entrega if args.limite_entrega is not None else args.intervalo + 3
+
+    blaze = BlazeSimulada(args.api_porta, args.periodo, args.aceleracao, args.semente).iniciar()
+    print(f"🎰 API simulada em {blaze.url} (rodada a cada {blaze.periodo_real:.1f} s)")
+
+    processo = None
+    pasta_temp = tempfile.mkdtemp(prefix='1zero14x_carga_')
+    url = args.url.rstrip('/') if args.url else f"http://127.0.0.1:{args.porta}"
+    if not args.url:
+        processo = iniciar_app(args.porta, blaze.url, args.workers, pasta_temp, blaze.periodo_real)
+        print(f"🚀 App no gunicorn ({args.workers} workers) em {url}; log em {pasta_temp}/app.log")
+
+    resultados = []
+    try:
+        if not aguardar_primeira_rodada(url, next(iter(sorted(USUARIOS_VALIDOS.items()))),
+                                        60 + 3 * blaze.periodo_real):
+            print(f"[ERRO CARGA] o app não publicou nenhuma rodada em {url}", file=sys.stderr)
+            return 1
+        aguardar_rodadas(blaze, args.aquecimento)
+
+        for usuarios in estagios:
+            resumo = executar_estagio(url, usuarios, args.duracao, args.intervalo, blaze)
+            resumo['degradado'] = degradado(resumo, args.limite_p99_ms, limite_entrega)
+            imprimir_estagio(resumo, resumo['degradado'])
+            resultados.append(resumo)
+    finally:
+        if processo is not None:
+            parar_app(processo)
+        blaze.parar()
+
+    aprovados = [resumo['usuarios'] for resumo in resultados if not resumo['degradado']]
+    capacidade = max(aprovados) if aprovados else None
+    print(f"📈 Maior estágio dentro dos limites (p99 ≤ {args.limite_p99_ms:g} ms, entrega p99 ≤ "
+          f"{limite_entrega:g} s, sem erros): {capacidade if capacidade is not None else 'nenhum'} usuários")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as saida:
+            json.dump({'parametros': vars(args), 'capacidade': capacidade, 'estagios': resultados},
+                      saida, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
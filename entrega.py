@@ -0,0 +1,43 @@
+# ===============================================
+# 1ZERO14X - Entrega comprimida (gzip e, se instalado, brotli)
+# ===============================================
+# Nada é comprimido por requisição: os arquivos do painel são comprimidos uma vez na
+# subida (nível máximo) e cada versão de snapshot JSON uma vez, na primeira
+# requisição que aceita compressão; as próximas só escolhem a versão pronta.
+import gzip
+import hashlib
+
+try:
+    import brotli  # Opcional: pip install brotli
+except ImportError:
+    brotli = None
+
+TAMANHO_MINIMO = 512  # Abaixo disso o cabeçalho extra não compensa
+ORDEM_PREFERENCIA = ('br', 'gzip')
+
+def comprimir(corpo, maximo=False):
+    """{codificação: corpo comprimido} só com as versões que ficaram menores que o original
+
+    maximo=True usa o nível mais alto (para o que é comprimido uma vez na subida)."""
+    versoes = {}
+    if len(corpo) < TAMANHO_MINIMO:
+        return versoes
+    versoes['gzip'] = gzip.compress(corpo, compresslevel=9 if maximo else 6, mtime=0)
+    if brotli is not None:
+        versoes['br'] = brotli.compress(corpo, quality=11 if maximo else 5)
+    return {codificacao: versao for codificacao, versao in versoes.items() if len(versao) < len(corpo)}
+
+def escolher_codificacao(aceitas, versoes):
+    """Melhor codificação disponível que o cliente aceita (aceitas = request.accept_encodings)"""
+    for codificacao in ORDEM_PREFERENCIA:
+        if codificacao in versoes and aceitas[codificacao]:
+            return codificacao
+    return None
+
+class RecursoEstatico:
+    """Conteúdo que não muda enquanto o processo vive: hash do conteúdo e versões comprimidas prontas"""
+    def __init__(self, corpo, tipo, compressivel=True):
+        self.corpo = corpo
+        self.tipo = tipo
+        self.hash = hashlib.sha256(corpo).hexdigest()[:16]
+        self.versoes = comprimir(corpo, maximo=True) if compressivel else {}
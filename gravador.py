@@ -0,0 +1,202 @@
+# ===============================================
+# 1ZERO14X - Gravação bruta do feed (segmentos gzip rotativos) e leitura para replay
+# ===============================================
+# Cada rodada distinta recebida da API é gravada exatamente como veio (um objeto JSON
+# por linha) em segmentos .jsonl.gz. O segmento aberto tem o sufixo .parcial e é
+# fechado (renomeado) quando passa do tamanho ou da idade máxima; depois disso os
+# segmentos mais antigos são apagados até o total caber no limite. A compressão e a
+# escrita rodam numa thread própria: a coleta só enfileira (e descarta se a fila encher).
+#
+# Leitura (backtest, regressões):
+#   for rodada in ler_gravacao('gravacao/', 'principal'): ...
+#   python backtest.py gravacao/ --feed principal
+# Um replay lê um feed só; sem prefixo/--feed o diretório precisa ter gravações de um feed.
+import atexit
+import json
+import mmap
+import os
+import queue
+import re
+import threading
+import time
+import zlib
+
+EXTENSAO = '.jsonl.gz'
+SUFIXO_ABERTO = '.parcial'
+
+def padrao_segmento(prefixo=None):
+    """Regex do nome gerado por abrir_segmento (exato: o feed 'double' não casa com 'double-turbo')"""
+    feed = re.escape(prefixo) if prefixo else r'.+'
+    return re.compile(rf'(?P<feed>{feed})-(?P<abertura>\d{{8}}-\d{{6}})-(?P<sequencia>\d+){re.escape(EXTENSAO)}')
+
+class GravadorFeed:
+    """Grava as rodadas brutas de um feed em segmentos comprimidos, com rotação e limite de espaço"""
+    def __init__(self, diretorio, prefixo, tamanho_segmento=16 * 1024 * 1024, duracao_segmento=6 * 3600,
+                 limite_total=512 * 1024 * 1024, intervalo_flush=60.0, tamanho_fila=10000):
+        self.diretorio = diretorio
+        self.prefixo = prefixo
+        self.tamanho_segmento = tamanho_segmento  # Bytes comprimidos por segmento
+        self.duracao_segmento = duracao_segmento  # Segundos até fechar o segmento aberto
+        self.limite_total = limite_total  # Bytes somando todos os segmentos do prefixo
+        self.intervalo_flush = intervalo_flush  # Perda máxima (em segundos) se o processo morrer
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.descartadas = 0
+        self.thread = None
+        self.arquivo = None  # Arquivo bruto do segmento aberto (tell() = bytes comprimidos)
+        self.compressor = None
+        self.caminho_aberto = None
+        self.aberto_em = 0.0
+        self.ultimo_flush = 0.0
+
+    def abrir(self):
+        """Cria o diretório, fecha segmentos deixados abertos por uma queda e inicia a thread de gravação"""
+        os.makedirs(self.diretorio, exist_ok=True)
+        padrao = padrao_segmento(self.prefixo)
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith(SUFIXO_ABERTO) and padrao.fullmatch(nome[:-len(SUFIXO_ABERTO)]):
+                caminho = os.path.join(self.diretorio, nome)
+                os.replace(caminho, caminho[:-len(SUFIXO_ABERTO)])  # O leitor tolera o final truncado
+        self.thread = threading.Thread(target=self.gravar, name=f"gravador-{self.prefixo}", daemon=True)
+        self.thread.start()
+        atexit.register(self.fechar)  # Fecha o segmento também no modo de processo único (Ctrl+C)
+        return self
+
+    # === Escrita (chamada pela thread de coleta; nunca bloqueia) ===
+
+    def registrar(self, rodadas):
+        """Enfileira rodadas brutas (dicionários da API) na ordem em que devem ser gravadas"""
+        for rodada in rodadas:
+            try:
+                self.fila.put_nowait(rodada)
+            except queue.Full:
+                self.descartadas += 1
+                if self.descartadas % 1000 == 1:
+                    print(f"[ERRO GRAVADOR] fila cheia em {self.prefixo}: {self.descartadas} rodadas descartadas")
+
+    def fechar(self):
+        """Grava o que falta na fila, fecha o segmento aberto e encerra a thread"""
+        if self.thread is not None:
+            self.fila.put(None)
+            self.thread.join()
+            self.thread = None
+
+    # === Thread de gravação ===
+
+    def gravar(self):
+        while True:
+            try:
+                rodada = self.fila.get(timeout=self.intervalo_flush)
+            except queue.Empty:
+                rodada = False  # Só confere idade/flush do segmento aberto
+            if rodada is None:
+                break
+            try:
+                if rodada is not False:
+                    self.escrever((json.dumps(rodada, ensure_ascii=False, separators=(",", ":")) + "\n")
+                                  .encode('utf-8'))
+                self.manter()
+            except (OSError, TypeError, ValueError) as e:
+                print(f"[ERRO GRAVADOR] {self.prefixo}: {e}")
+        try:
+            self.fechar_segmento()
+        except OSError as e:
+            print(f"[ERRO GRAVADOR] {self.prefixo}: {e}")
+
+    def escrever(self, linha):
+        if self.arquivo is None:
+            self.abrir_segmento()
+        self.arquivo.write(self.compressor.compress(linha))
+
+    def manter(self):
+        """Rotaciona por tamanho/idade e descarrega o compressor de tempos em tempos"""
+        if self.arquivo is None:
+            return
+        agora = time.time()
+        if self.arquivo.tell() >= self.tamanho_segmento or agora - self.aberto_em >= self.duracao_segmento:
+            self.fechar_segmento()
+            self.aplicar_limite()
+        elif agora - self.ultimo_flush >= self.intervalo_flush:
+            self.arquivo.write(self.compressor.flush(zlib.Z_SYNC_FLUSH))
+            self.arquivo.flush()
+            self.ultimo_flush = agora
+
+    def abrir_segmento(self):
+        self.aberto_em = self.ultimo_flush = time.time()
+        nome = f"{self.prefixo}-{time.strftime('%Y%m%d-%H%M%S', time.gmtime(self.aberto_em))}"
+        sequencia = 1  # Desempata segmentos abertos no mesmo segundo (mantém a ordem pelo nome)
+        caminho = os.path.join(self.diretorio, f"{nome}-{sequencia:03d}{EXTENSAO}")
+        while os.path.exists(caminho) or os.path.exists(caminho + SUFIXO_ABERTO):
+            sequencia += 1
+            caminho = os.path.join(self.diretorio, f"{nome}-{sequencia:03d}{EXTENSAO}")
+        self.caminho_aberto = caminho
+        self.arquivo = open(caminho + SUFIXO_ABERTO, 'wb')
+        # wbits 31 = formato gzip (legível pelo gzip/zcat)
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def fechar_segmento(self):
+        if self.arquivo is None:
+            return
+        self.arquivo.write(self.compressor.flush())
+        self.arquivo.close()
+        os.replace(self.caminho_aberto + SUFIXO_ABERTO, self.caminho_aberto)
+        self.arquivo = self.compressor = self.caminho_aberto = None
+
+    def aplicar_limite(self):
+        """Apaga os segmentos fechados mais antigos até o total caber no limite"""
+        segmentos = segmentos_gravados(self.diretorio, self.prefixo)
+        tamanhos = [os.path.getsize(caminho) for caminho in segmentos]
+        total = sum(tamanhos)
+        for caminho, tamanho in zip(segmentos, tamanhos):
+            if total <= self.limite_total:
+                break
+            os.remove(caminho)
+            total -= tamanho
+
+# ----------------------------------------
+# Leitura
+# ----------------------------------------
+def feeds_gravados(diretorio):
+    """Prefixos (feeds) que têm segmentos fechados no diretório"""
+    padrao = padrao_segmento()
+    return sorted({casou['feed'] for casou in map(padrao.fullmatch, os.listdir(diretorio)) if casou})
+
+def segmentos_gravados(diretorio, prefixo=None):
+    """Segmentos fechados em ordem cronológica de abertura (horário e sequência no nome, depois do feed)"""
+    padrao = padrao_segmento(prefixo)
+    segmentos = []
+    for nome in os.listdir(diretorio):
+        casou = padrao.fullmatch(nome)
+        if casou:
+            segmentos.append((casou['abertura'], int(casou['sequencia']), nome))
+    return [os.path.join(diretorio, nome) for *_, nome in sorted(segmentos)]
+
+def ler_segmento(caminho, tamanho_bloco=1024 * 1024):
+    """Rodadas de um segmento mapeado em memória e descomprimido aos blocos; final truncado (queda) é ignorado"""
+    with open(caminho, 'rb') as arquivo:
+        if os.fstat(arquivo.fileno()).st_size == 0:
+            return
+        with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            descompressor = zlib.decompressobj(31)
+            resto = b''
+            for inicio in range(0, len(mapa), tamanho_bloco):
+                try:
+                    dados = resto + descompressor.decompress(mapa[inicio:inicio + tamanho_bloco])
+                except zlib.error as e:
+                    print(f"[ERRO GRAVADOR] {caminho} corrompido: {e}")
+                    return
+                linhas = dados.split(b'\n')
+                resto = linhas.pop()
+                for linha in linhas:
+                    if linha:
+                        yield json.loads(linha)
+
+def ler_gravacao(diretorio, prefixo=None):
+    """Todas as rodadas gravadas de um feed em ordem de gravação
+
+    Sem prefixo, o diretório precisa ter um feed só: feeds diferentes não se misturam num replay."""
+    if prefixo is None:
+        feeds = feeds_gravados(diretorio)
+        if len(feeds) > 1:
+            raise ValueError(f"{diretorio} tem gravações de {len(feeds)} feeds ({', '.join(feeds)}): informe o prefixo")
+    for caminho in segmentos_gravados(diretorio, prefixo):
+        yield from ler_segmento(caminho)
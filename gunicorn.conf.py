@@ -0,0 +1,49 @@
+# ===============================================
+# 1ZERO14X - Configuração do Gunicorn
+# ===============================================
+# Um único processo coletor/analisador (python app1zero14x.py --coletor) consulta a
+# API e publica o estado num SQLite em WAL; os workers web só leem esse canal.
+# Assim, adicionar workers aumenta a vazão sem multiplicar as chamadas à Blaze.
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("CANAL_COLETOR", os.path.join(tempfile.gettempdir(), "1zero14x_canal.db"))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+threads = 64
+
+_coletor = {"processo": None, "ativo": True}
+
+def _iniciar_coletor(server):
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    _coletor["processo"] = subprocess.Popen([sys.executable, os.path.join(pasta, "app1zero14x.py"), "--coletor"],
+                                            cwd=pasta, env=os.environ.copy())
+    server.log.info("Coletor dedicado iniciado (pid %s)", _coletor["processo"].pid)
+
+def _supervisionar(server):
+    """Reinicia o coletor se ele cair (o gunicorn só supervisiona os workers)"""
+    while _coletor["ativo"]:
+        time.sleep(5)
+        if _coletor["ativo"] and _coletor["processo"].poll() is not None:
+            server.log.warning("Coletor encerrou (código %s); reiniciando", _coletor["processo"].returncode)
+            _iniciar_coletor(server)
+
+def on_starting(server):
+    _iniciar_coletor(server)
+    threading.Thread(target=_supervisionar, args=(server,), daemon=True).start()
+
+def on_exit(server):
+    _coletor["ativo"] = False
+    processo = _coletor["processo"]
+    if processo and processo.poll() is None:
+        processo.terminate()
+        try:
+            processo.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            processo.kill()
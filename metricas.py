@@ -0,0 +1,127 @@
+# ===============================================
+# 1ZERO14X - Métricas (texto no formato Prometheus)
+# ===============================================
+# Contadores, medidores e histogramas de baldes fixos, feitos para ficar ligados em
+# produção: observar um valor é um bisect + três somas sob um lock.
+import threading
+from bisect import bisect_left
+
+# Baldes padrão em segundos (de 100 µs a 10 s)
+BALDES_LATENCIA = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _pares(nomes, valores):
+    """Rótulo único (nome, valor) ou vários (tupla de nomes, tupla de valores)"""
+    if isinstance(nomes, tuple):
+        return list(zip(nomes, valores))
+    return [(nomes, valores)]
+
+def _rotulos(pares):
+    pares = [(nome, valor) for nome, valor in pares if nome]
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+class Contador:
+    """Contador crescente, opcionalmente separado por rótulo(s)"""
+    tipo = 'counter'
+
+    def __init__(self, nome, ajuda, rotulo=None):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulo = rotulo
+        self.valores = {}
+        self.lock = threading.Lock()
+
+    def incrementar(self, rotulo=None, quantidade=1):
+        with self.lock:
+            self.valores[rotulo] = self.valores.get(rotulo, 0) + quantidade
+
+    def linhas(self):
+        with self.lock:
+            valores = list(self.valores.items())
+        for rotulo, valor in sorted(valores, key=lambda item: str(item[0])):
+            yield f"{self.nome}{_rotulos(_pares(self.rotulo, rotulo))} {_numero(valor)}"
+
+class Medidor:
+    """Valor instantâneo lido de uma função na hora de renderizar"""
+    tipo = 'gauge'
+
+    def __init__(self, nome, ajuda, funcao):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.funcao = funcao
+
+    def linhas(self):
+        try:
+            valor = self.funcao()
+        except Exception:
+            return  # Fonte ainda não existe (ex.: analisador não iniciado)
+        if valor is not None:
+            yield f"{self.nome} {_numero(valor)}"
+
+class Histograma:
+    """Histograma de baldes fixos (le = limite superior), opcionalmente por rótulo(s)"""
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, limites=BALDES_LATENCIA, rotulo=None):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.limites = tuple(limites)
+        self.rotulo = rotulo
+        self.series = {}  # rótulo → [contagens por balde (+Inf no fim), soma]
+        self.lock = threading.Lock()
+
+    def observar(self, valor, rotulo=None):
+        indice = bisect_left(self.limites, valor)
+        with self.lock:
+            serie = self.series.get(rotulo)
+            if serie is None:
+                serie = self.series[rotulo] = [[0] * (len(self.limites) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def linhas(self):
+        with self.lock:
+            series = [(rotulo, list(contagens), soma) for rotulo, (contagens, soma) in self.series.items()]
+        for rotulo, contagens, soma in sorted(series, key=lambda item: str(item[0])):
+            pares = _pares(self.rotulo, rotulo)
+            acumulado = 0
+            for limite, contagem in zip(self.limites + ('+Inf',), contagens):
+                acumulado += contagem
+                le = limite if limite == '+Inf' else _numero(float(limite))
+                yield f"{self.nome}_bucket{_rotulos(pares + [('le', le)])} {acumulado}"
+            yield f"{self.nome}_sum{_rotulos(pares)} {_numero(soma)}"
+            yield f"{self.nome}_count{_rotulos(pares)} {acumulado}"
+
+class RegistroMetricas:
+    """Conjunto de métricas renderizado junto no formato texto do Prometheus"""
+    def __init__(self):
+        self.metricas = []
+
+    def registrar(self, metrica):
+        self.metricas.append(metrica)
+        return metrica
+
+    def contador(self, nome, ajuda, rotulo=None):
+        return self.registrar(Contador(nome, ajuda, rotulo))
+
+    def medidor(self, nome, ajuda, funcao):
+        return self.registrar(Medidor(nome, ajuda, funcao))
+
+    def histograma(self, nome, ajuda, limites=BALDES_LATENCIA, rotulo=None):
+        return self.registrar(Histograma(nome, ajuda, limites, rotulo))
+
+    def renderizar(self):
+        linhas = []
+        for metrica in self.metricas:
+            linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            linhas.extend(metrica.linhas())
+        return '\n'.join(linhas) + '\n'
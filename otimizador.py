@@ -0,0 +1,299 @@
+# ===============================================
+# 1ZERO14X - Otimizador de confluência e estratégias
+# ===============================================
+# Varre combinações de limiares de confluência (baixa/media/alta/minima_ativa) e de
+# subconjuntos de estratégias sobre um histórico gravado, em paralelo em todos os
+# núcleos, e ordena as configurações por assertividade e volume de sinais.
+#
+# Os disparos das estratégias não dependem da configuração (o índice só filtra quem
+# é chamado), então o histórico é reproduzido uma única vez, com todas ativas, para
+# gravar o fluxo de candidatos (rodada, estratégia, minuto alvo). Cada configuração
+# é avaliada sobre esse fluxo com NumPy; os minutos com casos raros (sinal direto no
+# mesmo minuto, estratégias chegando depois de um WIN antecipado) passam por uma
+# simulação exata do GerenciadorSinais.
+#
+# Uso:
+#   python otimizador.py historico.jsonl --top 20 --saida ranking.csv
+#   python otimizador.py historico.jsonl --aleatorio 5000 --nivel ALTA --min-sinais-dia 3
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+
+from app1zero14x import ESTRATEGIAS, GerenciadorSinais
+from backtest import RelogioSimulado, carregar_rodadas, executar_replay, ler_historico
+
+NIVEIS = ('MINIMA', 'BAIXA', 'MÉDIA', 'ALTA', 'DIRETO')
+DIRETO = NIVEIS.index('DIRETO')
+
+class GravadorCandidatos(GerenciadorSinais):
+    """Gerenciador que só grava as estratégias disparadas, com o índice da rodada"""
+    def __init__(self, relogio):
+        super().__init__(relogio)
+        self.rodada = 0
+        self.candidatos = []  # (rodada, nome, minuto alvo em minutos epoch, direto)
+
+    def adicionar_estrategia(self, estrategia, horario, minuto_destino, horario_base=None, agora=None):
+        self.candidatos.append((self.rodada, estrategia, int(horario.timestamp()) // 60, False))
+
+    def adicionar_sinal_direto(self, estrategia, horario, minuto_destino, horario_base=None, agora=None):
+        self.candidatos.append((self.rodada, estrategia, int(horario.timestamp()) // 60, True))
+
+    def processar_resultado(self, horario_resultado, cor, agora=None):
+        self.rodada += 1  # Última etapa de cada rodada no analisador
+
+    def limpar_dados_antigos(self, agora=None):
+        pass
+
+class FluxoCandidatos:
+    """Candidatos ordenados por (minuto alvo, ordem de disparo) e brancos do histórico"""
+    def __init__(self, rodadas, atraso_deteccao=timedelta(seconds=1)):
+        from app1zero14x import AnalisadorEstrategiaHorarios
+
+        relogio = RelogioSimulado()
+        analisador = AnalisadorEstrategiaHorarios(relogio=relogio)
+        analisador.gerenciador = GravadorCandidatos(relogio)
+        executar_replay(rodadas, atraso_deteccao, analisador)
+
+        self.nomes = [estrategia.nome for estrategia in ESTRATEGIAS]
+        indice_nome = {nome: i for i, nome in enumerate(self.nomes)}
+        ultimo_minuto = int(rodadas[-1][2].timestamp()) // 60 if rodadas else 0
+
+        # Alvos cuja janela passa do fim do histórico ficariam pendentes: ficam de fora
+        candidatos = [c for c in analisador.gerenciador.candidatos if c[2] + 2 <= ultimo_minuto]
+        rodada = np.array([c[0] for c in candidatos], dtype=np.int64)
+        minuto = np.array([c[2] for c in candidatos], dtype=np.int64)
+        ordem = np.argsort(minuto, kind='stable')  # Estável: mantém a ordem de disparo no minuto
+        self.rodada = rodada[ordem]
+        self.minuto = minuto[ordem]
+        self.estrategia = np.array([indice_nome[c[1]] for c in candidatos], dtype=np.int16)[ordem]
+        self.direto = np.array([c[3] for c in candidatos], dtype=bool)[ordem]
+
+        brancos = [(i, int(horario.timestamp()) // 60) for i, (cor, _, horario) in enumerate(rodadas)
+                   if cor == 'branco']
+        self.branco_rodada = np.array([b[0] for b in brancos], dtype=np.int64)
+        self.branco_minuto = np.array([b[1] for b in brancos], dtype=np.int64)
+        self.dias = max(1e-9, (rodadas[-1][2] - rodadas[0][2]).total_seconds() / 86400) if rodadas else 1e-9
+
+    def primeiro_branco(self, rodada_minima, minuto_alvo):
+        """Rodada do primeiro branco a partir de rodada_minima na janela do alvo (-1 = nenhum)"""
+        if not len(self.branco_rodada):
+            return np.full(len(rodada_minima), -1, dtype=np.int64)
+        # Rodadas e minutos dos brancos crescem juntos: o primeiro que atende as duas condições
+        j = np.maximum(np.searchsorted(self.branco_rodada, rodada_minima, 'left'),
+                       np.searchsorted(self.branco_minuto, minuto_alvo - 1, 'left'))
+        dentro = j < len(self.branco_rodada)
+        j = np.minimum(j, len(self.branco_rodada) - 1)
+        return np.where(dentro & (self.branco_minuto[j] <= minuto_alvo + 1), self.branco_rodada[j], -1)
+
+def nivel(contagem, confluencia):
+    """Mesmo critério de GerenciadorSinais.get_nivel_confluencia, em índices de NIVEIS"""
+    return np.where(contagem >= confluencia['alta'], 3,
+                    np.where(contagem >= confluencia['media'], 2,
+                             np.where(contagem >= confluencia['baixa'], 1, 0)))
+
+def simular_minuto(fluxo, inicio, fim, selecionados, confluencia):
+    """Simulação exata de um minuto alvo (candidatos fluxo[inicio:fim]); retorna [(nivel, acertou)]"""
+    minuto_alvo = fluxo.minuto[inicio]
+    na_janela = np.abs(fluxo.branco_minuto - minuto_alvo) <= 1
+    brancos = list(fluxo.branco_rodada[na_janela])
+    sinais, ativos, grupo = [], [], 0
+
+    def finalizar_brancos(ate_rodada):
+        nonlocal ativos
+        while brancos and brancos[0] < ate_rodada:
+            brancos.pop(0)
+            sinais.extend((nivel_ativo, True) for nivel_ativo in ativos)
+            ativos = []
+
+    for i in range(inicio, fim):
+        if not selecionados[i]:
+            continue
+        finalizar_brancos(fluxo.rodada[i])  # O resultado da rodada vem depois dos disparos dela
+        if fluxo.direto[i]:
+            ativos.append(DIRETO)
+            continue
+        grupo += 1
+        if grupo >= confluencia['minima_ativa']:
+            nivel_grupo = int(nivel(grupo, confluencia))
+            if ativos:
+                ativos[0] = nivel_grupo  # Atualiza o primeiro sinal ativo do minuto (mesmo se direto)
+            else:
+                ativos.append(nivel_grupo)
+    finalizar_brancos(float('inf'))
+    sinais.extend((nivel_ativo, False) for nivel_ativo in ativos)
+    return sinais
+
+def avaliar_configuracao(fluxo, ativas, confluencia):
+    """Retorna (acertos, sinais) por nível (arrays na ordem de NIVEIS) para uma configuração"""
+    selecionados = np.asarray(ativas, dtype=bool)[fluxo.estrategia]
+    minutos_lentos = set(np.unique(fluxo.minuto[selecionados & fluxo.direto]).tolist())
+
+    # Caminho rápido: grupos de confluência (todas as estratégias não diretas do minuto)
+    conf = selecionados & ~fluxo.direto
+    minuto = fluxo.minuto[conf]
+    rodada = fluxo.rodada[conf]
+    acertos = np.zeros(len(NIVEIS), dtype=np.int64)
+    sinais = np.zeros(len(NIVEIS), dtype=np.int64)
+
+    if len(minuto):
+        novo = np.r_[True, minuto[1:] != minuto[:-1]]
+        inicios = np.flatnonzero(novo)
+        contagens = np.diff(np.r_[inicios, len(minuto)])
+        # Chave (grupo, rodada) crescente: conta os disparos do grupo até uma rodada com um searchsorted
+        passo = int(rodada.max()) + 2
+        chave = (np.cumsum(novo) - 1) * passo + rodada
+
+        validos = np.flatnonzero(contagens >= confluencia['minima_ativa'])
+        inicios, contagens = inicios[validos], contagens[validos]
+        alvos = minuto[inicios]
+        criacao = rodada[inicios + confluencia['minima_ativa'] - 1]
+        ultima = rodada[inicios + contagens - 1]
+
+        vitoria = fluxo.primeiro_branco(criacao, alvos)
+        acertou = vitoria >= 0
+        # Contagem no momento do WIN (disparos da própria rodada entram antes do resultado)
+        limite = validos * passo + np.where(acertou, vitoria, passo - 1)
+        contagem_final = np.searchsorted(chave, limite, 'right') - inicios
+
+        lento = np.isin(alvos, list(minutos_lentos)) | (acertou & (ultima > vitoria))
+        minutos_lentos.update(alvos[lento].tolist())
+        rapido = ~lento
+        niveis = nivel(contagem_final[rapido], confluencia)
+        acertos += np.bincount(niveis, weights=acertou[rapido], minlength=len(NIVEIS)).astype(np.int64)
+        sinais += np.bincount(niveis, minlength=len(NIVEIS))
+
+    # Caminho exato para os minutos raros
+    for minuto_alvo in minutos_lentos:
+        inicio = np.searchsorted(fluxo.minuto, minuto_alvo, 'left')
+        fim = np.searchsorted(fluxo.minuto, minuto_alvo, 'right')
+        for nivel_sinal, acertou_sinal in simular_minuto(fluxo, inicio, fim, selecionados, confluencia):
+            sinais[nivel_sinal] += 1
+            acertos[nivel_sinal] += acertou_sinal
+    return acertos, sinais
+
+# === Espaço de busca ===
+
+def configuracoes_grade(quantidade_estrategias, minimas=range(2, 7), limiares=range(2, 8)):
+    """Grade: minima_ativa × (baixa < media < alta) × {todas, todas menos uma}"""
+    todas = (True,) * quantidade_estrategias
+    subconjuntos = [todas] + [tuple(j != i for j in range(quantidade_estrategias))
+                              for i in range(quantidade_estrategias)]
+    for minima, (baixa, media, alta), ativas in itertools.product(
+            minimas, itertools.combinations(limiares, 3), subconjuntos):
+        yield ativas, {'baixa': baixa, 'media': media, 'alta': alta, 'minima_ativa': minima}
+
+def configuracoes_aleatorias(quantidade_estrategias, quantidade, semente=0):
+    """Busca aleatória: limiares ordenados e subconjuntos com densidade sorteada"""
+    aleatorio = random.Random(semente)
+    for _ in range(quantidade):
+        densidade = aleatorio.uniform(0.3, 1.0)
+        ativas = tuple(aleatorio.random() < densidade for _ in range(quantidade_estrategias))
+        baixa, media, alta = sorted(aleatorio.sample(range(2, 9), 3))
+        yield ativas, {'baixa': baixa, 'media': media, 'alta': alta,
+                       'minima_ativa': aleatorio.randint(2, 7)}
+
+# === Execução paralela ===
+
+_fluxo = None
+
+def _iniciar_processo(fluxo):
+    global _fluxo
+    _fluxo = fluxo
+
+def _avaliar_lote(lote):
+    return [(ativas, confluencia, *avaliar_configuracao(_fluxo, ativas, confluencia))
+            for ativas, confluencia in lote]
+
+def otimizar(fluxo, configuracoes, processos=None, tamanho_lote=64):
+    """Avalia todas as configurações num pool de processos; retorna [(ativas, confluencia, acertos, sinais)]"""
+    lotes = []
+    lote = []
+    for configuracao in configuracoes:
+        lote.append(configuracao)
+        if len(lote) == tamanho_lote:
+            lotes.append(lote)
+            lote = []
+    if lote:
+        lotes.append(lote)
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo,
+                             initargs=(fluxo,)) as executor:
+        return [resultado for parcial in executor.map(_avaliar_lote, lotes) for resultado in parcial]
+
+def ranquear(fluxo, resultados, nivel_minimo='todos', min_sinais_dia=0.0):
+    """Linhas ordenadas por assertividade e depois por volume (só níveis >= nivel_minimo)"""
+    if nivel_minimo == 'todos':
+        considerados = list(range(len(NIVEIS)))
+    else:
+        considerados = list(range(NIVEIS.index(nivel_minimo), DIRETO))
+
+    linhas = []
+    for ativas, confluencia, acertos, sinais in resultados:
+        total = int(sinais[considerados].sum())
+        wins = int(acertos[considerados].sum())
+        por_dia = total / fluxo.dias
+        if total == 0 or por_dia < min_sinais_dia:
+            continue
+        linha = dict(confluencia)
+        linha.update({
+            'assertividade': round(wins / total * 100, 2),
+            'sinais': total,
+            'acertos': wins,
+            'sinais_por_dia': round(por_dia, 2),
+            'desativadas': '|'.join(nome for nome, ativa in zip(fluxo.nomes, ativas) if not ativa),
+        })
+        for i, nome_nivel in enumerate(NIVEIS):
+            linha[f'{nome_nivel.lower()}_acertos'] = int(acertos[i])
+            linha[f'{nome_nivel.lower()}_sinais'] = int(sinais[i])
+        linhas.append(linha)
+    linhas.sort(key=lambda linha: (linha['assertividade'], linha['sinais']), reverse=True)
+    return linhas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Otimizador de confluência/estratégias do 1ZERO14X")
+    parser.add_argument('historico', help="Arquivo .csv ou .jsonl com as rodadas gravadas")
+    parser.add_argument('--aleatorio', type=int, help="Quantidade de configurações sorteadas (padrão: grade)")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--nivel', default='todos', choices=('todos',) + NIVEIS[:DIRETO],
+                        help="Considera só sinais deste nível para cima")
+    parser.add_argument('--min-sinais-dia', type=float, default=0.0)
+    parser.add_argument('--processos', type=int, default=os.cpu_count())
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--saida', help="CSV com o ranking completo")
+    parser.add_argument('--atraso', type=float, default=1.0,
+                        help="Segundos entre o created_at e a detecção simulada")
+    args = parser.parse_args(argv)
+
+    rodadas = carregar_rodadas(ler_historico(args.historico))
+    fluxo = FluxoCandidatos(rodadas, timedelta(seconds=args.atraso))
+    if args.aleatorio:
+        configuracoes = configuracoes_aleatorias(len(fluxo.nomes), args.aleatorio, args.semente)
+    else:
+        configuracoes = configuracoes_grade(len(fluxo.nomes))
+
+    linhas = ranquear(fluxo, otimizar(fluxo, configuracoes, args.processos), args.nivel, args.min_sinais_dia)
+    print(f"{len(rodadas)} rodadas, {len(fluxo.minuto)} candidatos, {len(linhas)} configurações ranqueadas",
+          file=sys.stderr)
+
+    campos = ['assertividade', 'sinais', 'acertos', 'sinais_por_dia', 'minima_ativa', 'baixa', 'media', 'alta',
+              'desativadas'] + [f'{n.lower()}_{c}' for n in NIVEIS for c in ('acertos', 'sinais')]
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8', newline='') as saida:
+            escritor = csv.DictWriter(saida, fieldnames=campos)
+            escritor.writeheader()
+            escritor.writerows(linhas)
+
+    for linha in linhas[:args.top]:
+        print(f"{linha['assertividade']:6.2f}%  {linha['sinais']:6d} sinais ({linha['sinais_por_dia']:.1f}/dia)  "
+              f"minima={linha['minima_ativa']} baixa={linha['baixa']} media={linha['media']} alta={linha['alta']}  "
+              f"sem: {linha['desativadas'] or '-'}")
+
+if __name__ == "__main__":
+    main()
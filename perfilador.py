@@ -0,0 +1,98 @@
+# ===============================================
+# 1ZERO14X - Perfilador por amostragem (sob demanda)
+# ===============================================
+# Uma thread lê sys._current_frames() a cada intervalo durante um tempo limitado e
+# conta as pilhas das threads escolhidas. Não instala hooks no interpretador: quando
+# não há perfil em andamento, nada roda e o custo é zero.
+#
+# Saídas: estatísticas por função (amostras próprias e totais) ou pilhas colapsadas
+# ("a;b;c N" por linha), aceitas pelo flamegraph.pl e pelo speedscope.
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+THREAD_COLETOR = 'coletor'  # Nome da thread que coleta e analisa
+PREFIXO_COLETA = 'coleta'  # Executor das consultas HTTP da coleta
+
+def thread_da_coleta(nome):
+    return nome == THREAD_COLETOR or nome.startswith(PREFIXO_COLETA)
+
+def rotulo_quadro(codigo):
+    """função (arquivo:linha da definição)"""
+    return f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+
+class PerfiladorAmostragem:
+    """Conta as pilhas das threads selecionadas, amostradas a cada 'intervalo' segundos"""
+    def __init__(self, intervalo=0.005, filtro=thread_da_coleta):
+        self.intervalo = intervalo
+        self.filtro = filtro  # nome da thread → bool
+        self.pilhas = Counter()  # (quadro raiz, ..., quadro folha) → amostras
+        self.amostras = 0
+        self.duracao = 0.0
+
+    def amostrar(self, ignorar):
+        nomes = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, quadro in sys._current_frames().items():
+            if ident == ignorar or not self.filtro(nomes.get(ident, '')):
+                continue
+            pilha = []
+            while quadro is not None:
+                pilha.append(rotulo_quadro(quadro.f_code))
+                quadro = quadro.f_back
+            self.pilhas[tuple(reversed(pilha))] += 1
+        self.amostras += 1
+
+    def executar(self, duracao):
+        """Amostra por 'duracao' segundos na thread atual (bloqueia) e retorna o próprio perfilador"""
+        propria = threading.get_ident()
+        inicio = time.perf_counter()
+        fim = inicio + duracao
+        proxima = inicio
+        while True:
+            agora = time.perf_counter()
+            if agora >= fim:
+                break
+            if agora >= proxima:
+                self.amostrar(propria)
+                proxima += self.intervalo
+            time.sleep(max(0.0, min(proxima, fim) - time.perf_counter()))
+        self.duracao = time.perf_counter() - inicio
+        return self
+
+    def colapsado(self):
+        """Pilhas colapsadas: 'raiz;...;folha contagem' por linha"""
+        return ''.join(f"{';'.join(pilha)} {contagem}\n" for pilha, contagem in self.pilhas.most_common())
+
+    def estatisticas(self, limite=50):
+        """Funções com mais amostras: próprias (no topo da pilha) e totais (em qualquer ponto da pilha)"""
+        proprias = Counter()
+        totais = Counter()
+        for pilha, contagem in self.pilhas.items():
+            proprias[pilha[-1]] += contagem
+            for funcao in set(pilha):
+                totais[funcao] += contagem
+
+        pilhas = sum(self.pilhas.values()) or 1
+        return {
+            'amostras': self.amostras,
+            'pilhas_amostradas': sum(self.pilhas.values()),
+            'intervalo_ms': self.intervalo * 1000,
+            'duracao_s': round(self.duracao, 3),
+            'funcoes': [{'funcao': funcao, 'total': total, 'proprias': proprias[funcao],
+                         'total_pct': round(total / pilhas * 100, 1),
+                         'proprias_pct': round(proprias[funcao] / pilhas * 100, 1)}
+                        for funcao, total in totais.most_common(limite)],
+        }
+
+FORMATOS = {'json': 'application/json', 'colapsado': 'text/plain; charset=utf-8'}
+
+def perfilar(duracao, intervalo=0.005, todas_threads=False, formato='json', limite=50):
+    """Executa um perfil completo e devolve o corpo (bytes) no formato pedido (ver FORMATOS)"""
+    filtro = (lambda nome: True) if todas_threads else thread_da_coleta
+    perfilador = PerfiladorAmostragem(intervalo, filtro).executar(duracao)
+    if formato == 'colapsado':
+        return perfilador.colapsado().encode('utf-8')
+    return json.dumps(perfilador.estatisticas(limite), ensure_ascii=False).encode('utf-8')
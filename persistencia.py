@@ -0,0 +1,243 @@
+# ===============================================
+# 1ZERO14X - Armazenamento durável (SQLite em WAL)
+# ===============================================
+# Rodadas e sinais finalizados (de todos os perfis) são só acrescentados; o estado do analisador (contadores,
+# brancos pendentes, sinais ativos, estratégias aguardando confluência e estatísticas)
+# fica numa linha substituída no máximo a cada ESTADO_INTERVALO segundos e, à força, no
+# encerramento da coleta. A gravação roda numa thread própria que junta tudo o que
+# chegou na fila numa única transação, sem travar o loop de coleta.
+#
+# Recuperação: o estado guarda o epoch da última rodada analisada. No warm start as
+# rodadas gravadas depois dele (queda entre dois estados) são reprocessadas sem regravar
+# nada, e os IDs de sinal continuam do maior sinal_id já gravado em cada perfil.
+import json
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+# Campos de sinais/estado que são horários (gravados em ISO 8601)
+CAMPOS_HORARIO = frozenset({
+    'minuto_alvo', 'horario_previsto', 'janela_inicio', 'janela_fim', 'timestamp_criacao',
+    'horario_resultado', 'horario_base', 'timestamp_adicao', 'horario',
+    'ultimo_branco_antes_sequencia',
+})
+
+def _serializar(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    raise TypeError(f"tipo não serializável: {type(valor).__name__}")
+
+def codificar(dados):
+    """JSON compacto com horários em ISO 8601"""
+    return json.dumps(dados, default=_serializar, ensure_ascii=False, separators=(",", ":"))
+
+def _restaurar_horarios(dados):
+    for campo in CAMPOS_HORARIO.intersection(dados):
+        if isinstance(dados[campo], str):
+            dados[campo] = datetime.fromisoformat(dados[campo])
+    return dados
+
+def decodificar(texto):
+    """Inverso de codificar: devolve os campos de horário como datetime"""
+    return json.loads(texto, object_hook=_restaurar_horarios)
+
+class ArmazemDuravel:
+    """Rodadas, sinais finalizados e estado do analisador num SQLite (WAL), gravados em lote"""
+    def __init__(self, caminho, lote_maximo=500):
+        self.caminho = caminho
+        self.lote_maximo = lote_maximo
+        self.fila = queue.Queue()
+        self.thread = None
+
+    def conectar(self):
+        conexao = sqlite3.connect(self.caminho, timeout=10, isolation_level=None)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        return conexao
+
+    def abrir(self):
+        """Cria as tabelas (se preciso) e inicia a thread de gravação"""
+        conexao = self.conectar()
+        conexao.execute("""CREATE TABLE IF NOT EXISTS rodadas (
+            id TEXT PRIMARY KEY, epoch_ms INTEGER NOT NULL, cor TEXT NOT NULL, numero INTEGER NOT NULL)""")
+        conexao.execute("CREATE INDEX IF NOT EXISTS rodadas_epoch ON rodadas (epoch_ms)")
+        conexao.execute("""CREATE TABLE IF NOT EXISTS sinais (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT, sinal_id INTEGER, minuto_alvo INTEGER NOT NULL,
+            resultado TEXT NOT NULL, dados TEXT NOT NULL, perfil TEXT)""")
+        if 'perfil' not in {coluna[1] for coluna in conexao.execute("PRAGMA table_info(sinais)")}:
+            conexao.execute("ALTER TABLE sinais ADD COLUMN perfil TEXT")  # Banco de versão anterior
+        conexao.execute("CREATE INDEX IF NOT EXISTS sinais_perfil ON sinais (perfil, seq)")
+        conexao.execute("CREATE TABLE IF NOT EXISTS estado (chave TEXT PRIMARY KEY, valor TEXT NOT NULL)")
+        conexao.close()
+
+        self.thread = threading.Thread(target=self.gravar, daemon=True)
+        self.thread.start()
+        return self
+
+    # === Escrita (enfileirada; chamada pela thread de coleta) ===
+
+    def registrar_rodada(self, rodada_id, cor, numero, horario):
+        self.fila.put(('rodada', (rodada_id, round(horario.timestamp() * 1000), cor, numero)))
+
+    def registrar_finalizado(self, sinal, perfil=None):
+        """Acrescenta um sinal finalizado do perfil (serializado já, pois o dicionário segue sendo usado)"""
+        self.fila.put(('sinal', (sinal.get('id'), int(sinal['minuto_alvo'].timestamp()),
+                                 sinal['resultado'], codificar(sinal), perfil)))
+
+    def salvar_estado(self, estado):
+        """Substitui o estado do analisador (só a última versão do lote é gravada)"""
+        self.fila.put(('estado', codificar(estado)))
+
+    def fechar(self):
+        """Grava o que falta na fila e encerra a thread"""
+        if self.thread is not None:
+            self.fila.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def gravar(self):
+        """Thread de gravação: uma transação por lote de itens da fila"""
+        conexao = self.conectar()
+        encerrar = False
+        while not encerrar:
+            itens = [self.fila.get()]
+            while len(itens) < self.lote_maximo:
+                try:
+                    itens.append(self.fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            rodadas, sinais, estado = [], [], None
+            for item in itens:
+                if item is None:
+                    encerrar = True
+                elif item[0] == 'rodada':
+                    rodadas.append(item[1])
+                elif item[0] == 'sinal':
+                    sinais.append(item[1])
+                else:
+                    estado = item[1]
+
+            try:
+                conexao.execute("BEGIN")
+                conexao.executemany("INSERT OR IGNORE INTO rodadas (id, epoch_ms, cor, numero) "
+                                    "VALUES (?, ?, ?, ?)", rodadas)
+                conexao.executemany("INSERT INTO sinais (sinal_id, minuto_alvo, resultado, dados, perfil) "
+                                    "VALUES (?, ?, ?, ?, ?)", sinais)
+                if estado is not None:
+                    conexao.execute("INSERT OR REPLACE INTO estado (chave, valor) VALUES ('analisador', ?)",
+                                    (estado,))
+                conexao.execute("COMMIT")
+            except sqlite3.Error as e:
+                print(f"[ERRO BANCO] {e}")
+                if conexao.in_transaction:
+                    conexao.execute("ROLLBACK")
+        conexao.close()
+
+    # === Leitura (warm start) ===
+
+    def carregar(self, limite_rodadas, limite_finalizados):
+        """Retorna (estado, rodadas [(id, cor, numero, epoch_ms)], finalizados do perfil padrão) do banco"""
+        conexao = self.conectar()
+        try:
+            linha = conexao.execute("SELECT valor FROM estado WHERE chave = 'analisador'").fetchone()
+            estado = decodificar(linha[0]) if linha else None
+            rodadas = conexao.execute(
+                "SELECT id, cor, numero, epoch_ms FROM rodadas ORDER BY epoch_ms DESC LIMIT ?",
+                (limite_rodadas,)).fetchall()
+        finally:
+            conexao.close()
+        return estado, rodadas[::-1], self.finalizados(limite_finalizados)
+
+    def finalizados(self, limite, perfil=None):
+        """Últimos sinais finalizados do perfil, do mais antigo para o mais novo"""
+        conexao = self.conectar()
+        try:
+            linhas = conexao.execute("SELECT dados FROM sinais WHERE perfil IS ? ORDER BY seq DESC LIMIT ?",
+                                     (perfil, limite)).fetchall()
+        finally:
+            conexao.close()
+        return [decodificar(dados) for (dados,) in reversed(linhas)]
+
+    def ultimos_ids_sinais(self):
+        """{perfil: maior sinal_id finalizado}; o warm start não reusa IDs que já estão no banco"""
+        conexao = self.conectar()
+        try:
+            return dict(conexao.execute("SELECT perfil, max(sinal_id) FROM sinais GROUP BY perfil").fetchall())
+        finally:
+            conexao.close()
+
+    def ids_finalizados(self, perfil, ids):
+        """Quais destes IDs de sinal do perfil já foram gravados como finalizados"""
+        ids = list(ids)
+        if not ids:
+            return set()
+        conexao = self.conectar()
+        try:
+            linhas = conexao.execute(
+                f"SELECT sinal_id FROM sinais WHERE perfil IS ? AND sinal_id IN ({','.join('?' * len(ids))})",
+                (perfil, *ids)).fetchall()
+        finally:
+            conexao.close()
+        return {sinal_id for (sinal_id,) in linhas}
+
+class LeitorHistorico:
+    """Leitura paginada dos sinais finalizados (rotas web; uma conexão por thread, sem bloquear o escritor)
+
+    O cursor é o seq da tabela sinais: cresce na ordem em que os sinais finalizam."""
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.local = threading.local()
+
+    def conexao(self):
+        conexao = getattr(self.local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            self.local.conexao = conexao
+        return conexao
+
+    def pagina(self, perfil=None, desde=None, antes=None, limite=100):
+        """[(seq, dados JSON)]: depois de 'desde' em ordem crescente (delta), senão os mais novos
+        (antes de 'antes', se informado) em ordem decrescente"""
+        if desde is not None:
+            return self.conexao().execute(
+                "SELECT seq, dados FROM sinais WHERE perfil IS ? AND seq > ? ORDER BY seq LIMIT ?",
+                (perfil, desde, limite)).fetchall()
+        return self.conexao().execute(
+            "SELECT seq, dados FROM sinais WHERE perfil IS ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+            (perfil, antes if antes is not None else 2 ** 63 - 1, limite)).fetchall()
+
+class PerfisUsuarios:
+    """Perfil (estratégias ativas + confluência) escolhido por cada usuário, compartilhado entre processos
+
+    Cada gravação ganha uma versão crescente: o coletor e os workers leem só o que mudou
+    desde a última versão vista. Perfil None = voltar ao padrão."""
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.lock = threading.Lock()  # Uma conexão só: gravações raras, leituras no máximo 1/s
+        self.conexao = None
+
+    def conectar(self):
+        if self.conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=10, isolation_level=None, check_same_thread=False)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("""CREATE TABLE IF NOT EXISTS perfis (
+                usuario TEXT PRIMARY KEY, perfil TEXT, versao INTEGER NOT NULL)""")
+            self.conexao = conexao
+        return self.conexao
+
+    def salvar(self, usuario, perfil):
+        with self.lock:
+            self.conectar().execute(
+                "INSERT OR REPLACE INTO perfis (usuario, perfil, versao) "
+                "VALUES (?, ?, (SELECT coalesce(max(versao), 0) + 1 FROM perfis))",
+                (usuario, None if perfil is None else codificar(perfil)))
+
+    def alteracoes_desde(self, versao):
+        """Perfis gravados depois da versão informada: [(versao, usuario, perfil ou None)]"""
+        with self.lock:
+            linhas = self.conectar().execute(
+                "SELECT versao, usuario, perfil FROM perfis WHERE versao > ? ORDER BY versao",
+                (versao,)).fetchall()
+        return [(v, usuario, None if perfil is None else decodificar(perfil)) for v, usuario, perfil in linhas]
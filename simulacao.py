@@ -0,0 +1,82 @@
+# ===============================================
+# 1ZERO14X - Gerador de rodadas sintéticas
+# ===============================================
+# Gera rodadas reprodutíveis (mesma semente = mesma sequência) no formato da API
+# (id, color, roll, created_at), com controle da frequência de brancos, de rajadas
+# de brancos e de pedras iguais seguidas. Usado no benchmark e serve de entrada
+# para o backtest.
+#
+# Uso:
+#   python simulacao.py 20000 --semente 1 > historico.jsonl
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+from app1zero14x import converter_rodada
+
+class GeradorRodadas:
+    """Sequência sintética de rodadas controlada por semente"""
+    def __init__(self, semente=0, prob_branco=1 / 15, prob_rajada=0.01, tamanho_rajada=6,
+                 prob_branco_rajada=0.35, prob_par_igual=0.03, periodo=30.0, jitter=0.4,
+                 inicio=datetime(2026, 1, 1, tzinfo=timezone.utc)):
+        self.aleatorio = random.Random(semente)
+        self.prob_branco = prob_branco  # Chance de branco fora de rajada
+        self.prob_rajada = prob_rajada  # Chance de começar uma rajada a cada rodada
+        self.tamanho_rajada = tamanho_rajada  # Rodadas de cada rajada
+        self.prob_branco_rajada = prob_branco_rajada  # Chance de branco dentro da rajada
+        self.prob_par_igual = prob_par_igual  # Chance de repetir a pedra anterior
+        self.periodo = periodo  # Segundos entre rodadas
+        self.jitter = jitter  # Variação (segundos) do created_at
+        self.inicio = inicio
+
+    def sortear_numero(self, anterior, restantes_rajada):
+        aleatorio = self.aleatorio
+        if anterior is not None and aleatorio.random() < self.prob_par_igual:
+            return anterior
+        prob_branco = self.prob_branco_rajada if restantes_rajada else self.prob_branco
+        if aleatorio.random() < prob_branco:
+            return 0
+        return aleatorio.randint(1, 14)
+
+    def gerar(self, quantidade):
+        """Gera as rodadas (dicionários no formato da API) em ordem cronológica"""
+        horario = self.inicio
+        anterior = None
+        restantes_rajada = 0
+        for indice in range(quantidade):
+            if not restantes_rajada and self.aleatorio.random() < self.prob_rajada:
+                restantes_rajada = self.tamanho_rajada
+            numero = self.sortear_numero(anterior, restantes_rajada)
+            restantes_rajada = max(0, restantes_rajada - 1)
+            anterior = numero
+
+            horario += timedelta(seconds=self.periodo + self.aleatorio.uniform(-self.jitter, self.jitter))
+            yield {
+                'id': f"sim{indice}",
+                'color': 'branco' if numero == 0 else ('vermelho' if numero <= 7 else 'preto'),
+                'roll': numero,
+                'created_at': horario.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            }
+
+    def rodadas(self, quantidade):
+        """As mesmas rodadas já convertidas: [(cor, numero, horario_real)]"""
+        return [converter_rodada(rodada) for rodada in self.gerar(quantidade)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera rodadas sintéticas (JSONL no formato da API)")
+    parser.add_argument('quantidade', type=int)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--prob-branco', type=float, default=1 / 15)
+    parser.add_argument('--prob-rajada', type=float, default=0.01)
+    parser.add_argument('--prob-par-igual', type=float, default=0.03)
+    args = parser.parse_args(argv)
+
+    gerador = GeradorRodadas(args.semente, prob_branco=args.prob_branco, prob_rajada=args.prob_rajada,
+                             prob_par_igual=args.prob_par_igual)
+    for rodada in gerador.gerar(args.quantidade):
+        sys.stdout.write(json.dumps(rodada) + '\n')
+
+if __name__ == "__main__":
+    main()